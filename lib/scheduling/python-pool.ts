@@ -0,0 +1,413 @@
+import { spawn, type ChildProcessWithoutNullStreams } from 'child_process'
+import path from 'path'
+import readline from 'readline'
+
+/**
+ * Persistent pool of warm Python workers (`python -m terminierung.serve`).
+ *
+ * Each worker imports the scheduling modules once and then answers
+ * newline-delimited JSON requests, so a queue release no longer pays
+ * interpreter startup + matplotlib import on every call.
+ *
+ * - one in-flight request per worker (Python runs single-threaded anyway)
+ * - per-request timeout: the worker is killed and replaced
+ * - recycle after N requests to bound memory growth in long sessions
+ * - periodic ping of idle workers, unresponsive ones are replaced
+ * - optional progress events (config.progress) are forwarded while a request runs
+ * - the timeout covers queue wait + run: a request never waits longer than timeoutMs in total
+ * - workers that die before answering are respawned with exponential backoff; after
+ *   MAX_STARTUP_FAILURES in a row the pool gives up and rejects with PythonPoolUnavailableError
+ *   (python-runner then falls back to one process per call)
+ */
+
+export interface PythonPoolOptions {
+  size?: number
+  maxRequestsPerWorker?: number
+  healthCheckIntervalMs?: number
+  healthCheckTimeoutMs?: number
+  preloadScripts?: string[]
+}
+
+/** One NDJSON progress line from a long-running optimizer (see python/terminierung/progress_stream.py) */
+export interface PythonProgressEvent {
+  type: 'progress'
+  stage: string
+  iteration: number
+  evaluations: number
+  elapsedMs: number
+  best: Record<string, number>
+  bestSequence?: string[]
+  [key: string]: unknown
+}
+
+export type ProgressHandler = (event: PythonProgressEvent) => void
+
+/** Timeout error that still carries the last reported best-so-far state */
+export class PythonTimeoutError extends Error {
+  constructor(message: string, readonly lastProgress?: PythonProgressEvent) {
+    super(message)
+    this.name = 'PythonTimeoutError'
+  }
+}
+
+/** The pool cannot start workers (e.g. python3 or the serve module is missing) */
+export class PythonPoolUnavailableError extends Error {
+  constructor(message: string) {
+    super(message)
+    this.name = 'PythonPoolUnavailableError'
+  }
+}
+
+interface WorkerResponse {
+  id: number | null
+  type?: 'progress'
+  ok: boolean
+  result?: unknown
+  stderr?: string
+  error?: string
+  pong?: boolean
+}
+
+interface PendingRequest {
+  id: number
+  resolve: (response: WorkerResponse) => void
+  reject: (error: Error) => void
+  timer?: NodeJS.Timeout
+  onProgress?: ProgressHandler
+  lastProgress?: PythonProgressEvent
+}
+
+interface QueuedTask {
+  message: Record<string, unknown>
+  timeoutMs: number
+  /** Absolute deadline (Date.now()-based) for queue wait + run */
+  deadline: number
+  timer: NodeJS.Timeout
+  onProgress?: ProgressHandler
+  resolve: (response: WorkerResponse) => void
+  reject: (error: Error) => void
+}
+
+const PYTHON_DIR = 'python'
+const WORKER_MODULE = 'terminierung.serve'
+
+const MAX_STARTUP_FAILURES = 5
+const STARTUP_BACKOFF_BASE_MS = 500
+const STARTUP_BACKOFF_MAX_MS = 10_000
+
+const DEFAULT_PRELOAD = [
+  path.join('python', 'terminierung', 'Becker_Terminierung_langfristig_v2.py'),
+  path.join('python', 'terminierung', 'Becker_Mittelfristige_Terminierung_v2.py'),
+  path.join('python', 'terminierung', 'Becker_Feinterminierung_v2.py'),
+]
+
+class PythonWorker {
+  readonly proc: ChildProcessWithoutNullStreams
+  handled = 0
+  busy = false
+  dead = false
+  /** Has answered at least once (exit before that counts as a startup failure) */
+  responded = false
+  /** Stopped by the pool (kill/retire), not by a crash */
+  stopping = false
+  private pending: PendingRequest | null = null
+
+  constructor(
+    preloadScripts: string[],
+    private readonly onExit: (worker: PythonWorker) => void,
+    private readonly onFirstResponse: () => void
+  ) {
+    this.proc = spawn('python3', ['-m', WORKER_MODULE, '--preload', ...preloadScripts], {
+      cwd: path.join(process.cwd(), PYTHON_DIR),
+    })
+
+    const lines = readline.createInterface({ input: this.proc.stdout })
+    lines.on('line', (line) => this.handleLine(line))
+
+    // Preload-/Crash-Meldungen des Workers selbst (Request-stderr kommt im Response-JSON)
+    this.proc.stderr.on('data', (chunk) => {
+      const text = chunk.toString().trim()
+      if (text) console.warn(`[python-pool] worker ${this.proc.pid}: ${text}`)
+    })
+
+    this.proc.on('exit', () => this.markDead(new Error('Python worker exited')))
+    this.proc.on('error', (error) => this.markDead(error))
+  }
+
+  /** timeoutMs = remaining budget; totalTimeoutMs only labels the timeout error */
+  send(
+    id: number,
+    message: Record<string, unknown>,
+    timeoutMs: number,
+    onProgress?: ProgressHandler,
+    totalTimeoutMs = timeoutMs
+  ): Promise<WorkerResponse> {
+    return new Promise((resolve, reject) => {
+      this.busy = true
+      const pending: PendingRequest = { id, resolve, reject, onProgress }
+      pending.timer = setTimeout(() => {
+        this.kill()
+        this.settle(
+          null,
+          new PythonTimeoutError(`Python worker timed out after ${totalTimeoutMs}ms`, pending.lastProgress)
+        )
+      }, timeoutMs)
+      this.pending = pending
+      this.proc.stdin.write(JSON.stringify({ ...message, id }) + '\n')
+    })
+  }
+
+  kill() {
+    this.stopping = true
+    if (!this.dead) this.proc.kill('SIGKILL')
+  }
+
+  retire() {
+    // Sauberes Ende: stdin schließen, der Worker beendet seine Leseschleife
+    this.stopping = true
+    this.proc.stdin.end()
+  }
+
+  private handleLine(line: string) {
+    if (!line.trim()) return
+    let response: WorkerResponse
+    try {
+      response = JSON.parse(line) as WorkerResponse
+    } catch (error) {
+      this.settle(null, new Error(`Failed to parse Python worker output: ${(error as Error).message}`))
+      return
+    }
+    if (!this.responded) {
+      this.responded = true
+      this.onFirstResponse()
+    }
+    if (!this.pending || response.id !== this.pending.id) return
+    if (response.type === 'progress') {
+      const event = response as unknown as PythonProgressEvent
+      this.pending.lastProgress = event
+      try {
+        this.pending.onProgress?.(event)
+      } catch (error) {
+        console.warn('[python-pool] progress handler failed:', error)
+      }
+      return
+    }
+    this.settle(response, null)
+  }
+
+  private settle(response: WorkerResponse | null, error: Error | null) {
+    const pending = this.pending
+    if (!pending) return
+    this.pending = null
+    this.busy = false
+    if (pending.timer) clearTimeout(pending.timer)
+    if (error) pending.reject(error)
+    else if (response) pending.resolve(response)
+  }
+
+  private markDead(error: Error) {
+    if (this.dead) return
+    this.dead = true
+    this.settle(null, error)
+    this.onExit(this)
+  }
+}
+
+export class PythonWorkerPool {
+  private readonly workers: PythonWorker[] = []
+  private readonly queue: QueuedTask[] = []
+  private readonly size: number
+  private readonly maxRequestsPerWorker: number
+  private readonly healthCheckTimeoutMs: number
+  private readonly preloadScripts: string[]
+  private healthTimer: NodeJS.Timeout | null = null
+  private readonly respawnTimers = new Set<NodeJS.Timeout>()
+  private nextId = 1
+  private closed = false
+  /** Workers in a row that exited before their first response */
+  private startupFailures = 0
+  private unavailable: PythonPoolUnavailableError | null = null
+
+  constructor(options: PythonPoolOptions = {}) {
+    this.size = Math.max(1, options.size ?? 2)
+    this.maxRequestsPerWorker = Math.max(1, options.maxRequestsPerWorker ?? 200)
+    this.healthCheckTimeoutMs = options.healthCheckTimeoutMs ?? 5_000
+    this.preloadScripts = options.preloadScripts ?? DEFAULT_PRELOAD
+
+    for (let i = 0; i < this.size; i++) this.spawnWorker()
+
+    const interval = options.healthCheckIntervalMs ?? 30_000
+    if (interval > 0) {
+      this.healthTimer = setInterval(() => void this.healthCheck(), interval)
+      this.healthTimer.unref()
+    }
+  }
+
+  async run(
+    script: string,
+    payload: unknown,
+    timeoutMs: number,
+    onProgress?: ProgressHandler
+  ): Promise<{ result: unknown; stderr: string }> {
+    const response = await this.enqueue({ type: 'run', script, payload }, timeoutMs, onProgress)
+    if (!response.ok) {
+      throw new Error(`Python worker failed: ${response.error ?? 'unknown error'}\n${response.stderr ?? ''}`)
+    }
+    return { result: response.result, stderr: (response.stderr ?? '').trim() }
+  }
+
+  async close() {
+    this.closed = true
+    if (this.healthTimer) clearInterval(this.healthTimer)
+    for (const timer of this.respawnTimers) clearTimeout(timer)
+    this.respawnTimers.clear()
+    this.rejectQueue(new Error('Python worker pool closed'))
+    for (const worker of this.workers.splice(0)) worker.retire()
+  }
+
+  private enqueue(
+    message: Record<string, unknown>,
+    timeoutMs: number,
+    onProgress?: ProgressHandler
+  ): Promise<WorkerResponse> {
+    if (this.closed) return Promise.reject(new Error('Python worker pool closed'))
+    if (this.unavailable) return Promise.reject(this.unavailable)
+    return new Promise((resolve, reject) => {
+      // Die Frist läuft ab Einreihen: ein Request, der keinen freien Worker findet, läuft hier ab
+      const timer = setTimeout(() => {
+        const idx = this.queue.indexOf(task)
+        if (idx === -1) return
+        this.queue.splice(idx, 1)
+        reject(new PythonTimeoutError(`Python worker timed out after ${timeoutMs}ms (still queued)`))
+      }, timeoutMs)
+      const task: QueuedTask = {
+        message,
+        timeoutMs,
+        deadline: Date.now() + timeoutMs,
+        timer,
+        onProgress,
+        resolve,
+        reject,
+      }
+      this.queue.push(task)
+      this.dispatch()
+    })
+  }
+
+  private rejectQueue(error: Error) {
+    for (const task of this.queue.splice(0)) {
+      clearTimeout(task.timer)
+      task.reject(error)
+    }
+  }
+
+  private dispatch() {
+    while (this.queue.length > 0) {
+      const worker = this.workers.find((w) => !w.busy && !w.dead)
+      if (!worker) return
+      const task = this.queue.shift()!
+      clearTimeout(task.timer)
+      const remainingMs = task.deadline - Date.now()
+      if (remainingMs <= 0) {
+        task.reject(new PythonTimeoutError(`Python worker timed out after ${task.timeoutMs}ms (still queued)`))
+        continue
+      }
+      worker
+        .send(this.nextId++, task.message, remainingMs, task.onProgress, task.timeoutMs)
+        .then(task.resolve, task.reject)
+        .finally(() => {
+          if (task.message.type === 'run') worker.handled += 1
+          if (!worker.dead && worker.handled >= this.maxRequestsPerWorker) this.recycle(worker)
+          this.dispatch()
+        })
+    }
+  }
+
+  private spawnWorker() {
+    const worker = new PythonWorker(
+      this.preloadScripts,
+      (dead) => this.replace(dead),
+      () => {
+        this.startupFailures = 0
+      }
+    )
+    this.workers.push(worker)
+    return worker
+  }
+
+  private replace(worker: PythonWorker) {
+    const idx = this.workers.indexOf(worker)
+    if (idx === -1) return
+    this.workers.splice(idx, 1)
+    if (this.closed || this.unavailable) return
+
+    if (worker.responded || worker.stopping) {
+      this.spawnWorker()
+      this.dispatch()
+      return
+    }
+
+    // Vor der ersten Antwort gestorben (python3 fehlt, Importfehler, ...): nicht in einer Schleife neu starten
+    this.startupFailures += 1
+    if (this.startupFailures >= MAX_STARTUP_FAILURES) {
+      this.unavailable = new PythonPoolUnavailableError(
+        `Python workers failed to start ${this.startupFailures} times in a row`
+      )
+      console.error(`[python-pool] ${this.unavailable.message}, giving up`)
+      for (const timer of this.respawnTimers) clearTimeout(timer)
+      this.respawnTimers.clear()
+      this.rejectQueue(this.unavailable)
+      return
+    }
+    const delayMs = Math.min(STARTUP_BACKOFF_BASE_MS * 2 ** (this.startupFailures - 1), STARTUP_BACKOFF_MAX_MS)
+    console.warn(`[python-pool] worker exited during startup, respawning in ${delayMs}ms`)
+    const timer = setTimeout(() => {
+      this.respawnTimers.delete(timer)
+      if (this.closed || this.unavailable) return
+      this.spawnWorker()
+      this.dispatch()
+    }, delayMs)
+    timer.unref()
+    this.respawnTimers.add(timer)
+  }
+
+  private recycle(worker: PythonWorker) {
+    const idx = this.workers.indexOf(worker)
+    if (idx === -1) return
+    this.workers.splice(idx, 1)
+    worker.retire()
+    if (!this.closed) this.spawnWorker()
+  }
+
+  private async healthCheck() {
+    const idle = this.workers.filter((w) => !w.busy && !w.dead)
+    await Promise.all(
+      idle.map(async (worker) => {
+        try {
+          const response = await worker.send(this.nextId++, { type: 'ping' }, this.healthCheckTimeoutMs)
+          if (!response.pong) worker.kill()
+        } catch {
+          // Timeout killt den Worker bereits, exit-Handler ersetzt ihn
+        }
+      })
+    )
+    this.dispatch()
+  }
+}
+
+// Singleton über globalThis, damit Next.js-HMR im Dev-Modus keine Worker-Leichen hinterlässt
+const globalForPool = globalThis as unknown as { pythonWorkerPool?: PythonWorkerPool }
+
+export function isPythonPoolEnabled(): boolean {
+  return process.env.PYTHON_WORKER_POOL !== '0' && process.env.PYTHON_WORKER_POOL !== 'false'
+}
+
+export function getPythonWorkerPool(): PythonWorkerPool {
+  if (!globalForPool.pythonWorkerPool) {
+    globalForPool.pythonWorkerPool = new PythonWorkerPool({
+      size: Number(process.env.PYTHON_WORKER_POOL_SIZE) || undefined,
+      maxRequestsPerWorker: Number(process.env.PYTHON_WORKER_MAX_REQUESTS) || undefined,
+    })
+  }
+  return globalForPool.pythonWorkerPool
+}
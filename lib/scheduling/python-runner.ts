@@ -1,12 +1,29 @@
 import { spawn } from 'child_process'
 import path from 'path'
+import {
+  getPythonWorkerPool,
+  isPythonPoolEnabled,
+  PythonPoolUnavailableError,
+  PythonTimeoutError,
+  type ProgressHandler,
+  type PythonProgressEvent,
+} from './python-pool'
+
+export type { ProgressHandler, PythonProgressEvent }
+export { PythonTimeoutError }
 
 interface RunOptions<TInput> {
   script: string
   payload: TInput
   timeoutMs?: number
+  /** Warmen Worker-Pool nutzen (Default: an, abschaltbar per PYTHON_WORKER_POOL=0) */
+  usePool?: boolean
+  /** Live-Fortschritt der Optimierer (nur wenn payload.config.progress = true) */
+  onProgress?: ProgressHandler
 }
 
+const PROGRESS_PREFIX = '{"type": "progress"'
+
 export interface PythonResult<TOutput> {
   result: TOutput
   stderr: string
@@ -16,6 +33,29 @@ export async function runPythonOperator<TInput, TOutput>({
   script,
   payload,
   timeoutMs = 30_000,
+  usePool = isPythonPoolEnabled(),
+  onProgress,
+}: RunOptions<TInput>): Promise<PythonResult<TOutput>> {
+  if (usePool) {
+    const scriptPath = path.isAbsolute(script) ? script : path.join(process.cwd(), script)
+    try {
+      const { result, stderr } = await getPythonWorkerPool().run(scriptPath, payload, timeoutMs, onProgress)
+      return { result: result as TOutput, stderr }
+    } catch (error) {
+      // Pool kann keine Worker starten -> wie ohne Pool ein Prozess pro Aufruf
+      if (!(error instanceof PythonPoolUnavailableError)) throw error
+      console.warn(`[python-runner] ${error.message}, running ${script} in a one-off process`)
+    }
+  }
+  return runPythonOnce({ script, payload, timeoutMs, onProgress })
+}
+
+/** Einmal-Prozess pro Aufruf (ursprünglicher Pfad, z.B. für Debugging ohne Pool) */
+export async function runPythonOnce<TInput, TOutput>({
+  script,
+  payload,
+  timeoutMs = 30_000,
+  onProgress,
 }: RunOptions<TInput>): Promise<PythonResult<TOutput>> {
   return new Promise((resolve, reject) => {
     try {
@@ -25,15 +65,38 @@ export async function runPythonOperator<TInput, TOutput>({
       const input = JSON.stringify(payload)
       let stdout = ''
       let stderr = ''
+      let stderrLine = ''
+      let lastProgress: PythonProgressEvent | undefined
+
+      // Progress-Events kommen als NDJSON-Zeilen auf stderr und werden dort herausgefiltert
+      const consumeStderrLine = (line: string) => {
+        if (line.startsWith(PROGRESS_PREFIX)) {
+          try {
+            lastProgress = JSON.parse(line) as PythonProgressEvent
+            onProgress?.(lastProgress)
+            return
+          } catch {
+            // keine gültige Progress-Zeile -> normal loggen
+          }
+        }
+        stderr += line + '\n'
+      }
 
       py.stdout.on('data', (chunk) => {
         stdout += chunk.toString()
       })
       py.stderr.on('data', (chunk) => {
-        stderr += chunk.toString()
+        const lines = (stderrLine + chunk.toString()).split('\n')
+        stderrLine = lines.pop() ?? ''
+        lines.forEach(consumeStderrLine)
       })
 
-      py.on('close', (code) => {
+      py.on('close', (code, signal) => {
+        if (stderrLine) consumeStderrLine(stderrLine)
+        if (code === null && signal === 'SIGTERM') {
+          reject(new PythonTimeoutError(`Python timed out after ${timeoutMs}ms: ${stderr}`, lastProgress))
+          return
+        }
         if (code !== 0) {
           reject(new Error(`Python exited with code ${code}: ${stderr}`))
           return
@@ -0,0 +1 @@
+"""Legacy-Operatoren (PAP)."""
@@ -501,21 +501,25 @@ def _schedule(payload: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def error_result(exc: BaseException) -> Dict[str, Any]:
+    """Fehlerantwort (leerer Plan + PIPO_ERROR) – auch für terminierung.serve."""
+    return {
+        "paretoSet": [],
+        "selectedPlanId": None,
+        "releasedOps": [],
+        "debug": [
+            {"stage": "PIPO_ERROR", "message": str(exc)},
+        ],
+    }
+
+
 def main() -> None:
     try:
         payload = _load_payload()
         result = _schedule(payload)
         print(json.dumps(result))
     except Exception as exc:  # pragma: no cover
-        error_result = {
-            "paretoSet": [],
-            "selectedPlanId": None,
-            "releasedOps": [],
-            "debug": [
-                {"stage": "PIPO_ERROR", "message": str(exc)},
-            ],
-        }
-        print(json.dumps(error_result))
+        print(json.dumps(error_result(exc)))
 
 
 if __name__ == "__main__":
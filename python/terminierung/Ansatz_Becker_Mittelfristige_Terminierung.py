@@ -62,7 +62,9 @@ import statistics
 import sys
 from dataclasses import dataclass
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
-from itertools import combinations
+
+from montecarlo import TardinessSampler
+from similarity import StepInterner, mean_pairwise_jaccard_bits
 
 try:  # matplotlib ist optional; falls nicht installiert, funktionieren Kernfeatures dennoch.
     import matplotlib.pyplot as plt  # type: ignore
@@ -164,57 +166,51 @@ def order_op_signature(order: OrderData) -> frozenset:
     return frozenset(keys)
 
 
-def jaccard(a: frozenset, b: frozenset) -> float:
-    if not a and not b:
-        return 1.0
-    u = a | b
-    if not u:
-        return 1.0
-    return len(a & b) / float(len(u))
+def order_op_bits(orders: Sequence[OrderData]) -> Dict[str, int]:
+    """Op-Signaturen aller Aufträge als Bitmasken (gemeinsame Bitpositionen, siehe similarity)."""
+    interner = StepInterner()
+    return {o.order_id: interner.mask(order_op_signature(o)) for o in orders}
 
 
-def mean_intrabatch_jaccard(order_ids: Sequence[str], op_sigs: Dict[str, frozenset]) -> float:
-    n = len(order_ids)
-    if n <= 1:
-        return 1.0
-    pairs = list(combinations(order_ids, 2))
-    s = 0.0
-    for i, j in pairs:
-        s += jaccard(op_sigs.get(i, frozenset()), op_sigs.get(j, frozenset()))
-    return s / len(pairs)
+def mean_intrabatch_jaccard(order_ids: Sequence[str], op_sigs: Dict[str, int]) -> float:
+    return mean_pairwise_jaccard_bits([op_sigs.get(oid, 0) for oid in order_ids], empty=1.0)
 
 
 # ---------------------------------------------------------------------------
 # GA-Komponenten
 # ---------------------------------------------------------------------------
 
+def build_tardiness_sampler(orders: Sequence[OrderData], replications: int, base_seed: int) -> TardinessSampler:
+    """
+    Zieht die Stichprobe Replikationen × Aufträge einmal; alle damit bewerteten
+    Sequenzen teilen sich dieselben Dauern (Common Random Numbers).
+    """
+    return TardinessSampler(
+        [o.duration_tfn for o in orders],
+        [o.ready_at for o in orders],
+        [o.due_date for o in orders],
+        replications,
+        base_seed,
+        seed_stride=9973,
+    )
+
+
 def simulate_sequence_tardiness(
     sequence: Sequence[int],
     orders: Sequence[OrderData],
     replications: int,
     base_seed: int,
+    sampler: Optional[TardinessSampler] = None,
 ) -> Tuple[float, float]:
     """
     Simuliert Tardiness für eine Sequenz mit Monte-Carlo Sampling.
     """
-    totals: List[float] = []
-    for r in range(replications):
-        rng = random.Random(base_seed + r * 9973)
-        current_time = min((orders[idx].ready_at for idx in sequence), default=0.0)
-        total_tardiness = 0.0
-        for idx in sequence:
-            order = orders[idx]
-            current_time = max(current_time, order.ready_at)
-            current_time += random_triangular(rng, order.duration_tfn)
-            if order.due_date is not None:
-                total_tardiness += max(0.0, current_time - order.due_date)
-        totals.append(total_tardiness)
-
-    if not totals:
+    if not sequence:
         return 0.0, 0.0
-    mean_val = statistics.fmean(totals)
-    var_val = statistics.pvariance(totals) if len(totals) > 1 else 0.0
-    return mean_val, var_val
+    if sampler is None:
+        sampler = build_tardiness_sampler(orders, replications, base_seed)
+    start_time = min(orders[idx].ready_at for idx in sequence)
+    return sampler.evaluate(sequence, start_time)
 
 
 def order_crossover(parent_a: Sequence[int], parent_b: Sequence[int], rng: random.Random) -> List[int]:
@@ -255,9 +251,11 @@ def optimize_sequence_ga(
     elite: int,
     reps: int,
     seed: int,
+    sampler: Optional[TardinessSampler] = None,
 ) -> Tuple[List[int], List[float], Tuple[float, float]]:
     """
     GA zur Minimierung von E[Tardiness)] + lam * Var[Tardiness].
+    Alle Kandidaten werden gegen dieselbe Monte-Carlo-Stichprobe bewertet.
     """
     rng = random.Random(seed)
     n = len(orders)
@@ -274,6 +272,10 @@ def optimize_sequence_ga(
         rng.shuffle(shuffled)
         pop.append(shuffled)
 
+    if sampler is None:
+        sampler = build_tardiness_sampler(orders, reps, seed * 7919)
+    start_time = min(o.ready_at for o in orders)
+
     cache: Dict[Tuple[int, ...], Tuple[float, float, float]] = {}
     best_seq = pop[0][:]
     best_val = float("inf")
@@ -283,15 +285,12 @@ def optimize_sequence_ga(
     for gen in range(generations):
         fitness_vals: List[float] = []
         metrics_for_pop: List[Tuple[float, float]] = []
+        # Neue Permutationen der Generation gebündelt auswerten
+        fresh = list(dict.fromkeys(tuple(perm) for perm in pop if tuple(perm) not in cache))
+        for key, (mu, var) in zip(fresh, sampler.evaluate_many(fresh, start_time)):
+            cache[key] = (mu + lam * var, mu, var)
         for perm in pop:
-            key = tuple(perm)
-            if key in cache:
-                obj, mu, var = cache[key]
-            else:
-                base_seed = seed * 7919 ^ hash(key) ^ (gen * 104729)
-                mu, var = simulate_sequence_tardiness(perm, orders, reps, base_seed)
-                obj = mu + lam * var
-                cache[key] = (obj, mu, var)
+            obj, mu, var = cache[tuple(perm)]
             fitness_vals.append(obj)
             metrics_for_pop.append((mu, var))
 
@@ -390,7 +389,7 @@ def build_batches(
     priorities_map: Dict[str, float],
     q_min: int,
     q_max: int,
-    op_sigs: Dict[str, frozenset],
+    op_sigs: Dict[str, int],
     alpha: float = 0.7,   # Gewicht für Termindruck (Priority). 1-alpha für Ähnlichkeit.
 ) -> List[Dict[str, Any]]:
     """
@@ -762,7 +761,7 @@ def simple_fifo_result(
     q_min = int(config.get("qMin", 3) or 3)
     q_max = int(config.get("qMax", max(q_min, 6)) or max(q_min, 6))
     # NEU: Signaturen & α lesen
-    op_sigs = {o.order_id: order_op_signature(o) for o in orders}
+    op_sigs = order_op_bits(orders)
     alpha = float(config.get("batchSimilarityWeight", 0.7) or 0.7)
 
     batches = build_batches(
@@ -830,6 +829,9 @@ def schedule_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
         ),
     )
 
+    # Gemeinsame Stichprobe für GA und Baseline -> Verbesserung ist nicht durch Rauschen verzerrt
+    sampler = build_tardiness_sampler(orders, reps, seed * 7919)
+
     best_seq, history, best_components = optimize_sequence_ga(
         orders=orders,
         lam=lam,
@@ -839,13 +841,14 @@ def schedule_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
         elite=elite,
         reps=reps,
         seed=seed,
+        sampler=sampler,
     )
 
     if not best_seq:
         best_seq = baseline_seq
 
     baseline_mu, baseline_var = simulate_sequence_tardiness(
-        baseline_seq, orders, reps, seed * 13 + 17
+        baseline_seq, orders, reps, seed * 7919, sampler=sampler
     )
     best_mu, best_var = best_components
     baseline_obj = baseline_mu + lam * baseline_var
@@ -862,7 +865,7 @@ def schedule_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
     q_max = int(config.get("qMax", max(q_min, 6)) or max(q_min, 6))
 
     # NEU: Signaturen & α lesen
-    op_sigs = {o.order_id: order_op_signature(o) for o in orders}
+    op_sigs = order_op_bits(orders)
     alpha = float(config.get("batchSimilarityWeight", 0.7) or 0.7)
 
     batches = build_batches(
@@ -13,6 +13,7 @@ import base64
 import io
 import json
 import math
+import os
 import random
 import sys
 from dataclasses import dataclass, field
@@ -22,6 +23,15 @@ import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 
+from op_tables import KIND_DEM, KIND_MON, OpRange, OpTables
+from genome_cache import FitnessCache, genome_key
+from harmony import HarmonyImproviser, PositionHistogram, UnusedPool
+from parallel_eval import ParallelEvaluator
+from pareto import HypervolumeTracker, ParetoArchive, non_dominated_fronts, objective_vector, reference_point
+from progress_stream import ProgressReporter
+from sim_checkpoints import PrefixCheckpoints
+from step_resolver import StepResolver, count_rule
+
 
 @dataclass
 class Operation:
@@ -41,13 +51,16 @@ class OrderData:
     dem_ops: List[Dict[str, Any]] = field(default_factory=list)
     mon_ops: List[Dict[str, Any]] = field(default_factory=list)
     sequence_variants: List[Tuple[str, List[str]]] = field(default_factory=list)  # [(seq_id, steps), ...]
+    # Op-Bereich je Sequenzvariante in den kompilierten Op-Tabellen (einmal in _build_orders aufgelöst)
+    variant_ranges: List[OpRange] = field(default_factory=list)
 
 
 @dataclass
 class Plan:
     plan_id: str
     sequence: List[int]  # Auftragsreihenfolge
-    operations: List[Dict[str, Any]]
+    # None = nur Metriken bewertet; die Timeline wird erst für Pareto-Front/Auswahl erzeugt (_materialize)
+    operations: Optional[List[Dict[str, Any]]]
     metrics: Dict[str, float]
     rank: int = 0
     crowding: float = 0.0
@@ -146,12 +159,16 @@ def parse_all_sequence_variants(process_sequences: Any) -> List[Tuple[str, List[
 
 def build_ops_from_sequence(
     steps: List[str],
-    dem_ops: List[Dict[str, Any]],
-    mon_ops: List[Dict[str, Any]],
+    dem_resolver: StepResolver,
+    mon_resolver: StepResolver,
+    match_stats: Optional[Dict[str, int]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Map sequence steps to operations with durations.
 
+    dem_resolver/mon_resolver: einmal pro Auftrag in _build_orders gebaute StepResolver über
+    die Demontage-/Montage-Ops. match_stats zählt, welche Matching-Regel pro Step gegriffen hat.
+
     Sequenz-Format: [I, BG1, BG2, ..., ×, BG3, BG4, ..., Q]
     - I = Inspektion (ignoriert)
     - Steps VOR × = Demontage-Reihenfolge
@@ -173,7 +190,7 @@ def build_ops_from_sequence(
     if separator_idx == -1:
         # Fallback: Alte Logik wenn kein × gefunden
         print(f"WARN: build_ops_from_sequence - no × separator found, using legacy matching", file=sys.stderr)
-        return _build_ops_legacy(steps, dem_ops, mon_ops)
+        return _build_ops_legacy(steps, dem_resolver.ops, mon_resolver.ops)
 
     # Extrahiere Demontage-Steps (zwischen I und ×)
     dem_steps = []
@@ -195,44 +212,11 @@ def build_ops_from_sequence(
         if step:
             mon_steps.append(step)
 
-    # Erstelle Mapping: Step-Name -> Op
-    dem_ops_by_name: Dict[str, Dict[str, Any]] = {}
-    for op in dem_ops:
-        meta = op.get("meta", {})
-        primary_name = meta.get("step") if isinstance(meta, dict) else None
-        fallback_name = op.get("label") or op.get("setupFamily") or op.get("bg") or op.get("id", "")
-
-        if primary_name:
-            dem_ops_by_name[primary_name] = op
-        if fallback_name and fallback_name != primary_name:
-            dem_ops_by_name[fallback_name] = op
-
-    mon_ops_by_name: Dict[str, Dict[str, Any]] = {}
-    for op in mon_ops:
-        meta = op.get("meta", {})
-        primary_name = meta.get("step") if isinstance(meta, dict) else None
-        fallback_name = op.get("label") or op.get("setupFamily") or op.get("bg") or op.get("id", "")
-
-        if primary_name:
-            mon_ops_by_name[primary_name] = op
-        if fallback_name and fallback_name != primary_name:
-            mon_ops_by_name[fallback_name] = op
-
     # Verarbeite Demontage-Steps in Sequenz-Reihenfolge
     matched_dem = 0
     for step_name in dem_steps:
-        op = dem_ops_by_name.get(step_name)
-        if not op:
-            # Fallback: Versuche Prefix-Matching
-            for key, candidate_op in dem_ops_by_name.items():
-                if step_name in key or key in step_name:
-                    op = candidate_op
-                    break
-                step_normalized = step_name.replace("BGT-", "BG-")
-                key_normalized = key.replace("BGT-", "BG-")
-                if step_normalized == key_normalized:
-                    op = candidate_op
-                    break
+        op, rule = dem_resolver.resolve(step_name)
+        count_rule(match_stats, rule)
 
         if op:
             dur = float(op.get("expectedDuration", 0.0))
@@ -249,17 +233,8 @@ def build_ops_from_sequence(
     # Verarbeite Remontage-Steps in Sequenz-Reihenfolge
     matched_mon = 0
     for step_name in mon_steps:
-        op = mon_ops_by_name.get(step_name)
-        if not op:
-            for key, candidate_op in mon_ops_by_name.items():
-                if step_name in key or key in step_name:
-                    op = candidate_op
-                    break
-                step_normalized = step_name.replace("BGT-", "BG-")
-                key_normalized = key.replace("BGT-", "BG-")
-                if step_normalized == key_normalized:
-                    op = candidate_op
-                    break
+        op, rule = mon_resolver.resolve(step_name)
+        count_rule(match_stats, rule)
 
         if op:
             dur = float(op.get("expectedDuration", 0.0))
@@ -330,10 +305,18 @@ def _build_ops_legacy(
 # NEU: Kapazitätssimulation mit fixen/flexiblen Stationen
 # ============================================================================
 
+def _op_step(op: Dict[str, Any]) -> Any:
+    """Baugruppentyp einer Op: meta.step, sonst sequenceStep."""
+    meta = op.get("meta")
+    return meta.get("step") if isinstance(meta, dict) else op.get("sequenceStep")
+
+
 def simulate_with_capacity(
     order_sequence: Sequence[int],
     variant_choices: Sequence[int],
     orders: Sequence[OrderData],
+    tables: OpTables,
+    op_ranges: Sequence[Sequence[OpRange]],
     start_time: float,
     dem_machines: int,
     mon_machines: int,
@@ -341,9 +324,15 @@ def simulate_with_capacity(
     mon_flex_share: float = 0.0,
     setup_minutes: float = 0.0,
     with_timeline: bool = False,
+    checkpoints: Optional[PrefixCheckpoints] = None,
 ) -> Tuple[Dict[str, Any], Optional[List[Dict[str, Any]]]]:
     """
     Parallelmaschinen-Simulation mit Ressourcenpools Demontage/Montage.
+    - Ops kommen aus den kompilierten Tabellen: op_ranges[i][v] = Ops von orders[i] in Variante v.
+    - Ohne `with_timeline` werden keine Op-Dicts gebaut: Maschinen-Statistik und Fertigstellungen
+      laufen als Akkumulatoren mit, die Metriken sind identisch.
+    - Mit `checkpoints` wird der Zustand (mit Timeline inkl. Timeline-Blöcke) alle N Positionen abgelegt
+      und ein gemeinsamer Präfix mit früheren Plänen gleicher Vorab-Zuweisung nicht erneut simuliert.
     - Ops werden AUFTRAGSSEQUENTIELL abgearbeitet: nächste Op erst nach Abschluss der vorherigen.
     - Fixed machines werden VORAB nach durchschnittlicher Bearbeitungszeit zugewiesen.
     - Flexible machines können alle Typen bearbeiten. Bei BG-Typ-Wechsel wird Setup-Zeit addiert.
@@ -356,23 +345,26 @@ def simulate_with_capacity(
     if not orders:
         return {"makespan": 0.0, "tardiness": 0.0, "idleTime": 0.0, "setupTime": 0.0}, (timeline if with_timeline else None)
 
-    # Baue Ops pro Auftrag basierend auf Sequenzvarianten-Wahl
+    # Op-Bereich pro Auftrag basierend auf Sequenzvarianten-Wahl
     # WICHTIG: variant_choices ist nach ORDER-Index indiziert (nicht nach Sequenz-Position),
     # da _generate_variant_choices für orders[i] die Variante generiert
-    ops_by_order: Dict[str, List[Dict[str, Any]]] = {}
-    for i, order_idx in enumerate(order_sequence):
+    chosen_ranges: List[Optional[OpRange]] = [None] * len(orders)
+    for order_idx in order_sequence:
         order = orders[order_idx]
         variant_idx = variant_choices[order_idx] if order_idx < len(variant_choices) else 0
+        ranges = op_ranges[order_idx]
 
-        if not order.sequence_variants:
+        if not ranges:
             raise ValueError(f"[PIPO] Order {order.order_id} has no sequence_variants; aborting instead of falling back")
-        if variant_idx >= len(order.sequence_variants):
-            raise IndexError(f"[PIPO] Variant index {variant_idx} out of range for order {order.order_id} (variants={len(order.sequence_variants)})")
+        if variant_idx >= len(ranges):
+            raise IndexError(f"[PIPO] Variant index {variant_idx} out of range for order {order.order_id} (variants={len(ranges)})")
 
-        _, steps = order.sequence_variants[variant_idx]
-        ops = build_ops_from_sequence(steps, clone_operations(order.dem_ops), clone_operations(order.mon_ops))
+        chosen_ranges[order_idx] = ranges[variant_idx]
 
-        ops_by_order[order.order_id] = ops
+    kinds = tables.kinds
+    steps = tables.steps
+    durations = tables.durations
+    step_valid = tables.step_valid
 
     # Maschinen-Setup
     dem_total = max(1, dem_machines)
@@ -381,206 +373,213 @@ def simulate_with_capacity(
     mon_flex_count = max(0, min(mon_total, int(round(mon_total * mon_flex_share)))) if mon_flex_share > 0 else 0
     dem_fixed = dem_total - dem_flex_count
     mon_fixed = mon_total - mon_flex_count
-    dem_available = [start_time] * dem_total
-    mon_available = [start_time] * mon_total
-
-    # Vorab-Zuweisung fixer Stationen nach durchschnittlicher Bearbeitungszeit
-    dem_step_durations: Dict[str, List[float]] = {}
-    mon_step_durations: Dict[str, List[float]] = {}
-
-    for order in orders:
-        ops = ops_by_order.get(order.order_id, [])
-        for op in ops:
-            station = (op.get("stationId") or "").lower()
-            step = op.get("meta", {}).get("step") if isinstance(op.get("meta"), dict) else op.get("sequenceStep")
-            dur = float(op.get("expectedDuration") or 0.0)
-            if step and dur > 0:
-                if "dem" in station:
-                    if step not in dem_step_durations:
-                        dem_step_durations[step] = []
-                    dem_step_durations[step].append(dur)
-                else:
-                    if step not in mon_step_durations:
-                        mon_step_durations[step] = []
-                    mon_step_durations[step].append(dur)
 
-    dem_step_avg = [(step, sum(durs) / len(durs)) for step, durs in dem_step_durations.items()]
-    mon_step_avg = [(step, sum(durs) / len(durs)) for step, durs in mon_step_durations.items()]
+    # Vorab-Zuweisung fixer Stationen nach durchschnittlicher Bearbeitungszeit (Step-IDs, 0 = kein Step)
+    step_durations: Tuple[Dict[int, List[float]], Dict[int, List[float]]] = ({}, {})
+    for chosen in chosen_ranges:
+        if chosen is None:
+            continue
+        for k in range(chosen[0], chosen[1]):
+            sid = steps[k]
+            dur = durations[k]
+            if step_valid[sid] and dur > 0:
+                bucket = step_durations[kinds[k]]
+                if sid not in bucket:
+                    bucket[sid] = []
+                bucket[sid].append(dur)
+
+    dem_step_avg = [(sid, sum(durs) / len(durs)) for sid, durs in step_durations[KIND_DEM].items()]
+    mon_step_avg = [(sid, sum(durs) / len(durs)) for sid, durs in step_durations[KIND_MON].items()]
     dem_step_avg.sort(key=lambda x: -x[1])
     mon_step_avg.sort(key=lambda x: -x[1])
 
-    dem_last_step: List[Optional[str]] = [None] * dem_total
-    mon_last_step: List[Optional[str]] = [None] * mon_total
+    dem_last_step: List[int] = [0] * dem_total
+    mon_last_step: List[int] = [0] * mon_total
 
-    for i, (step, _) in enumerate(dem_step_avg):
+    for i, (sid, _) in enumerate(dem_step_avg):
         if i < dem_fixed:
-            dem_last_step[i] = step
+            dem_last_step[i] = sid
 
-    for i, (step, _) in enumerate(mon_step_avg):
+    for i, (sid, _) in enumerate(mon_step_avg):
         if i < mon_fixed:
-            mon_last_step[i] = step
+            mon_last_step[i] = sid
+
+    # Pools je Op-Art (Index = KIND_DEM / KIND_MON), Demontage und Montage laufen identisch
+    pool_total = (dem_total, mon_total)
+    pool_fixed = (dem_fixed, mon_fixed)
+    pool_flex = (dem_flex_count, mon_flex_count)
+    pool_available = ([start_time] * dem_total, [start_time] * mon_total)
+    pool_last_step = (dem_last_step, mon_last_step)
+    pool_prefix = ("DEM", "MON")
+
+    # Maschinen-Statistik (min_start, max_end, belegte Zeit) und Fertigstellung je Position
+    # direkt mitführen, damit die Metriken auch ohne Timeline berechnet werden können
+    pool_min_start = ([math.inf] * dem_total, [math.inf] * mon_total)
+    pool_max_end = ([-math.inf] * dem_total, [-math.inf] * mon_total)
+    pool_busy = ([0.0] * dem_total, [0.0] * mon_total)
+    pool_used = ([False] * dem_total, [False] * mon_total)
+    completion_vals: List[float] = []
 
     global_completion = start_time
 
+    # Delta-Re-Simulation: beim tiefsten passenden Prefix-Checkpoint aufsetzen. Die Vorab-Zuweisung
+    # hängt von allen Variantenwahlen ab und ist deshalb Teil des Kontexts (eigene Trie-Wurzel),
+    # ebenso der Modus (nur mit Timeline enthalten die Schnappschüsse Timeline-Blöcke).
+    start_pos = 0
+    interval = 0
+    timeline_mark = 0
+    if checkpoints is not None:
+        interval = checkpoints.interval
+        tokens = [(order_idx, chosen_ranges[order_idx][0]) for order_idx in order_sequence]  # type: ignore[index]
+        start_pos, path, node = checkpoints.resume(tokens, (with_timeline, tuple(dem_last_step), tuple(mon_last_step)))
+        if start_pos:
+            pools, total_setup_time, global_completion, machine_state, _, _, _ = path[-1]
+            pool_available = (list(pools[0]), list(pools[1]))
+            pool_last_step = (list(pools[2]), list(pools[3]))
+            pool_min_start = (list(machine_state[0]), list(machine_state[1]))
+            pool_max_end = (list(machine_state[2]), list(machine_state[3]))
+            pool_busy = (list(machine_state[4]), list(machine_state[5]))
+            pool_used = (list(machine_state[6]), list(machine_state[7]))
+            tardiness_vals = [t for state in path for t in state[4]]
+            completion_vals = [c for state in path for c in state[5]]
+            timeline = [entry for state in path for entry in state[6]]
+            timeline_mark = len(timeline)
+
     # Simuliere Aufträge in der gegebenen Reihenfolge
-    for order_idx in order_sequence:
+    for pos in range(start_pos, len(order_sequence)):
+        order_idx = order_sequence[pos]
         order = orders[order_idx]
-        ops = ops_by_order.get(order.order_id, [])
+        begin, end_k = chosen_ranges[order_idx]  # type: ignore[misc]
         order_clock = start_time
         order_completion = start_time
 
-        for op in ops:
-            station = (op.get("stationId") or "").lower()
-            step = op.get("meta", {}).get("step") if isinstance(op.get("meta"), dict) else op.get("sequenceStep")
-            dur = float(op.get("expectedDuration") or 0.0)
+        for k in range(begin, end_k):
+            dur = durations[k]
             if dur <= 0:
                 continue
+            kind = kinds[k]
+            sid = steps[k]
+            available = pool_available[kind]
+            last_step = pool_last_step[kind]
+            n_fixed = pool_fixed[kind]
+            n_total = pool_total[kind]
+
+            chosen_idx = None
+            setup_applied = False
+            machine_type = "fixed"
+
+            # 1. Fixed: Nutze die fixe Station, die diesem step zugewiesen ist
+            if n_fixed > 0 and step_valid[sid]:
+                for i in range(n_fixed):
+                    if last_step[i] == sid:
+                        chosen_idx = i
+                        break
 
-            if "dem" in station:
-                chosen_idx = None
-                setup_applied = False
-                machine_type = "fixed"
-
-                # 1. Fixed: Nutze die fixe Station, die diesem step zugewiesen ist
-                if dem_fixed > 0 and step:
-                    for i in range(dem_fixed):
-                        if dem_last_step[i] == step:
-                            chosen_idx = i
-                            break
-
-                # 2. Flex: flexible machine (kann umgerüstet werden)
-                # WICHTIG: Priorisiere Maschinen die bereits denselben Step haben (kein Setup nötig)
-                if chosen_idx is None and dem_flex_count > 0:
-                    # 2a. Erst: Suche Flex-Maschine die bereits denselben Step hat (Setup vermeiden)
-                    same_step_earliest_time = float('inf')
-                    same_step_idx = None
-                    for i in range(dem_fixed, dem_total):
-                        if dem_last_step[i] == step and dem_available[i] < same_step_earliest_time:
-                            same_step_earliest_time = dem_available[i]
-                            same_step_idx = i
-
-                    if same_step_idx is not None:
-                        chosen_idx = same_step_idx
-                        machine_type = "flex"
-                        setup_applied = False  # Kein Setup, da gleicher Step
-                    else:
-                        # 2b. Sonst: Nutze früheste verfügbare Flex-Maschine
-                        flex_earliest_time = float('inf')
-                        flex_earliest_idx = None
-                        for i in range(dem_fixed, dem_total):
-                            if dem_available[i] < flex_earliest_time:
-                                flex_earliest_time = dem_available[i]
-                                flex_earliest_idx = i
-                        if flex_earliest_idx is not None:
-                            chosen_idx = flex_earliest_idx
-                            machine_type = "flex"
-                            if setup_minutes > 0 and dem_last_step[chosen_idx] is not None and dem_last_step[chosen_idx] != step:
-                                setup_applied = True
-
-                # 3. Fallback: Nutze eine beliebige freie Maschine
-                if chosen_idx is None:
-                    earliest_time = float('inf')
-                    for i in range(dem_total):
-                        if dem_available[i] < earliest_time:
-                            earliest_time = dem_available[i]
-                            chosen_idx = i
-                    if chosen_idx is not None and chosen_idx < dem_fixed:
-                        machine_type = "fixed-fallback"
-
-                if chosen_idx is None:
-                    continue
-
-                op_start = max(order_clock, dem_available[chosen_idx])
-                if setup_applied:
-                    op_start += setup_minutes
-                    total_setup_time += setup_minutes
-                op_end = op_start + dur
-                dem_available[chosen_idx] = op_end
-                dem_last_step[chosen_idx] = step
-                machine = f"DEM-{chosen_idx+1}"
-                order_clock = op_end
-                order_completion = max(order_completion, op_end)
-            else:
-                # Montage
-                chosen_idx = None
-                setup_applied = False
-                machine_type = "fixed"
-
-                if mon_fixed > 0 and step:
-                    for i in range(mon_fixed):
-                        if mon_last_step[i] == step:
-                            chosen_idx = i
-                            break
-
-                # WICHTIG: Priorisiere Maschinen die bereits denselben Step haben (kein Setup nötig)
-                if chosen_idx is None and mon_flex_count > 0:
-                    # 2a. Erst: Suche Flex-Maschine die bereits denselben Step hat (Setup vermeiden)
-                    same_step_earliest_time = float('inf')
-                    same_step_idx = None
-                    for i in range(mon_fixed, mon_total):
-                        if mon_last_step[i] == step and mon_available[i] < same_step_earliest_time:
-                            same_step_earliest_time = mon_available[i]
-                            same_step_idx = i
-
-                    if same_step_idx is not None:
-                        chosen_idx = same_step_idx
+            # 2. Flex: flexible machine (kann umgerüstet werden)
+            # WICHTIG: Priorisiere Maschinen die bereits denselben Step haben (kein Setup nötig)
+            if chosen_idx is None and pool_flex[kind] > 0:
+                # 2a. Erst: Suche Flex-Maschine die bereits denselben Step hat (Setup vermeiden)
+                same_step_earliest_time = float('inf')
+                same_step_idx = None
+                for i in range(n_fixed, n_total):
+                    if last_step[i] == sid and available[i] < same_step_earliest_time:
+                        same_step_earliest_time = available[i]
+                        same_step_idx = i
+
+                if same_step_idx is not None:
+                    chosen_idx = same_step_idx
+                    machine_type = "flex"
+                    setup_applied = False  # Kein Setup, da gleicher Step
+                else:
+                    # 2b. Sonst: Nutze früheste verfügbare Flex-Maschine
+                    flex_earliest_time = float('inf')
+                    flex_earliest_idx = None
+                    for i in range(n_fixed, n_total):
+                        if available[i] < flex_earliest_time:
+                            flex_earliest_time = available[i]
+                            flex_earliest_idx = i
+                    if flex_earliest_idx is not None:
+                        chosen_idx = flex_earliest_idx
                         machine_type = "flex"
-                        setup_applied = False  # Kein Setup, da gleicher Step
-                    else:
-                        # 2b. Sonst: Nutze früheste verfügbare Flex-Maschine
-                        flex_earliest_time = float('inf')
-                        flex_earliest_idx = None
-                        for i in range(mon_fixed, mon_total):
-                            if mon_available[i] < flex_earliest_time:
-                                flex_earliest_time = mon_available[i]
-                                flex_earliest_idx = i
-                        if flex_earliest_idx is not None:
-                            chosen_idx = flex_earliest_idx
-                            machine_type = "flex"
-                            if setup_minutes > 0 and mon_last_step[chosen_idx] is not None and mon_last_step[chosen_idx] != step:
-                                setup_applied = True
-
-                if chosen_idx is None:
-                    earliest_time = float('inf')
-                    for i in range(mon_total):
-                        if mon_available[i] < earliest_time:
-                            earliest_time = mon_available[i]
-                            chosen_idx = i
-                    if chosen_idx is not None and chosen_idx < mon_fixed:
-                        machine_type = "fixed-fallback"
-
-                if chosen_idx is None:
-                    continue
-
-                op_start = max(order_clock, mon_available[chosen_idx])
-                if setup_applied:
-                    op_start += setup_minutes
-                    total_setup_time += setup_minutes
-                op_end = op_start + dur
-                mon_available[chosen_idx] = op_end
-                mon_last_step[chosen_idx] = step
-                machine = f"MON-{chosen_idx+1}"
-                order_clock = op_end
-                order_completion = max(order_completion, op_end)
-
-            # Timeline wird IMMER intern erstellt (für Metriken-Berechnung)
-            timeline.append({
-                "orderId": order.order_id,
-                "stationId": station,
-                "machine": machine,
-                "machineType": machine_type,
-                "step": step,
-                "bgType": step,  # Baugruppentyp für Gantt-Chart (= step name)
-                "startTime": op_start,
-                "endTime": op_end,
-                "expectedDuration": dur,
-            })
+                        if setup_minutes > 0 and last_step[chosen_idx] != 0 and last_step[chosen_idx] != sid:
+                            setup_applied = True
+
+            # 3. Fallback: Nutze eine beliebige freie Maschine
+            if chosen_idx is None:
+                earliest_time = float('inf')
+                for i in range(n_total):
+                    if available[i] < earliest_time:
+                        earliest_time = available[i]
+                        chosen_idx = i
+                if chosen_idx is not None and chosen_idx < n_fixed:
+                    machine_type = "fixed-fallback"
+
+            if chosen_idx is None:
+                continue
+
+            op_start = max(order_clock, available[chosen_idx])
+            if setup_applied:
+                op_start += setup_minutes
+                total_setup_time += setup_minutes
+            op_end = op_start + dur
+            available[chosen_idx] = op_end
+            last_step[chosen_idx] = sid
+            order_clock = op_end
+            order_completion = max(order_completion, op_end)
+
+            busy = op_end - op_start
+            if busy > 0:
+                pool_used[kind][chosen_idx] = True
+                if op_start < pool_min_start[kind][chosen_idx]:
+                    pool_min_start[kind][chosen_idx] = op_start
+                if op_end > pool_max_end[kind][chosen_idx]:
+                    pool_max_end[kind][chosen_idx] = op_end
+                pool_busy[kind][chosen_idx] += busy
+
+            if with_timeline:
+                step = tables.step_names[sid]
+                timeline.append({
+                    "orderId": order.order_id,
+                    "stationId": tables.stations[k],
+                    "machine": f"{pool_prefix[kind]}-{chosen_idx+1}",
+                    "machineType": machine_type,
+                    "step": step,
+                    "bgType": step,  # Baugruppentyp für Gantt-Chart (= step name)
+                    "startTime": op_start,
+                    "endTime": op_end,
+                    "expectedDuration": dur,
+                })
 
             global_completion = max(global_completion, op_end)
 
         # Tardiness für diesen Auftrag
         tardiness = max(0.0, order_completion - order.due_date)
         tardiness_vals.append(tardiness)
+        completion_vals.append(order_completion)
+
+        done = pos + 1
+        if interval and done % interval == 0 and done < len(order_sequence):
+            node = checkpoints.save(  # type: ignore[union-attr]
+                node,
+                tuple(tokens[done - interval:done]),
+                (
+                    (
+                        tuple(pool_available[0]), tuple(pool_available[1]),
+                        tuple(pool_last_step[0]), tuple(pool_last_step[1]),
+                    ),
+                    total_setup_time, global_completion,
+                    (
+                        tuple(pool_min_start[0]), tuple(pool_min_start[1]),
+                        tuple(pool_max_end[0]), tuple(pool_max_end[1]),
+                        tuple(pool_busy[0]), tuple(pool_busy[1]),
+                        tuple(pool_used[0]), tuple(pool_used[1]),
+                    ),
+                    tuple(tardiness_vals[done - interval:done]),
+                    tuple(completion_vals[done - interval:done]),
+                    tuple(timeline[timeline_mark:]),
+                ),
+            )
+            timeline_mark = len(timeline)
 
     # ============================================================================
     # Auslastungsberechnung pro Slot (Y/X Verhältnis)
@@ -590,21 +589,16 @@ def simulate_with_capacity(
     # ============================================================================
     time_span = global_completion - start_time  # Globale Makespan
 
-    # Sammle pro Maschine: min_start, max_end, sum_durations
+    # Pro Maschine: min_start, max_end, sum_durations (in der Simulation mitgeführt)
     machine_stats: Dict[str, Dict[str, float]] = {}
-    if timeline:
-        for entry in timeline:
-            machine = entry.get("machine", "")
-            op_start = entry.get("startTime", 0.0)
-            op_end = entry.get("endTime", 0.0)
-            dur = op_end - op_start
-            if machine and dur > 0:
-                if machine not in machine_stats:
-                    machine_stats[machine] = {"min_start": op_start, "max_end": op_end, "sum_durations": 0.0}
-                else:
-                    machine_stats[machine]["min_start"] = min(machine_stats[machine]["min_start"], op_start)
-                    machine_stats[machine]["max_end"] = max(machine_stats[machine]["max_end"], op_end)
-                machine_stats[machine]["sum_durations"] += dur
+    for kind in (KIND_DEM, KIND_MON):
+        for i, used in enumerate(pool_used[kind]):
+            if used:
+                machine_stats[f"{pool_prefix[kind]}-{i+1}"] = {
+                    "min_start": pool_min_start[kind][i],
+                    "max_end": pool_max_end[kind][i],
+                    "sum_durations": pool_busy[kind][i],
+                }
 
     # Auslastung pro Slot berechnen mit Slot-spezifischem Span
     slot_utilizations: Dict[str, float] = {}
@@ -649,30 +643,30 @@ def simulate_with_capacity(
     lateness_vals: List[float] = []
     order_completions: Dict[str, float] = {}
 
-    # Finde Fertigstellungszeit pro Auftrag aus Timeline
-    if timeline:
-        for entry in timeline:
-            order_id = entry.get("orderId")
-            op_end = entry.get("endTime", start_time)
-            if order_id:
-                order_completions[order_id] = max(order_completions.get(order_id, start_time), op_end)
+    # Fertigstellungszeit pro Auftrag (in der Simulation mitgeführt)
+    for order_idx, completion in zip(order_sequence, completion_vals):
+        order_id = orders[order_idx].order_id
+        order_completions[order_id] = max(order_completions.get(order_id, start_time), completion)
 
-    # Debug-Prints pro Auftrag
-    print(f"[PIPO-DEBUG] === Lateness pro Auftrag ===", file=sys.stderr)
+    # Debug-Prints pro Auftrag (nur für Pläne mit Timeline, nicht für jede Suchbewertung)
+    if with_timeline:
+        print(f"[PIPO-DEBUG] === Lateness pro Auftrag ===", file=sys.stderr)
     for order_idx in order_sequence:
         order = orders[order_idx]
         completion = order_completions.get(order.order_id, start_time)
         lateness = completion - order.due_date  # positiv = zu spät
         lateness_vals.append(lateness)
-        print(f"[PIPO-DEBUG] Order {order.order_id[-8:]}: dueDate={order.due_date:.0f}, completion={completion:.0f}, lateness={lateness:+.1f}", file=sys.stderr)
+        if with_timeline:
+            print(f"[PIPO-DEBUG] Order {order.order_id[-8:]}: dueDate={order.due_date:.0f}, completion={completion:.0f}, lateness={lateness:+.1f}", file=sys.stderr)
 
     # Debug-Prints pro Slot
-    print(f"[PIPO-DEBUG] === Auslastung pro Slot ===", file=sys.stderr)
-    for machine in sorted(machine_stats.keys()):
-        stats = machine_stats[machine]
-        slot_span = stats["max_end"] - stats["min_start"]
-        util = slot_utilizations.get(machine, 0.0)
-        print(f"[PIPO-DEBUG] {machine}: min_start={stats['min_start']:.0f}, max_end={stats['max_end']:.0f}, span={slot_span:.0f}, sum_dur={stats['sum_durations']:.0f}, util={util:.1f}%", file=sys.stderr)
+    if with_timeline:
+        print(f"[PIPO-DEBUG] === Auslastung pro Slot ===", file=sys.stderr)
+        for machine in sorted(machine_stats.keys()):
+            stats = machine_stats[machine]
+            slot_span = stats["max_end"] - stats["min_start"]
+            util = slot_utilizations.get(machine, 0.0)
+            print(f"[PIPO-DEBUG] {machine}: min_start={stats['min_start']:.0f}, max_end={stats['max_end']:.0f}, span={slot_span:.0f}, sum_dur={stats['sum_durations']:.0f}, util={util:.1f}%", file=sys.stderr)
 
     avg_lateness = sum(lateness_vals) / len(lateness_vals) if lateness_vals else 0.0
 
@@ -691,6 +685,69 @@ def simulate_with_capacity(
     return metrics, (timeline if with_timeline else None)
 
 
+@dataclass
+class PlanEvalContext:
+    """
+    Alles, was simulate_with_capacity für einen Plan braucht.
+    Wird bei paralleler Bewertung einmal pro Worker-Prozess übertragen, nicht pro Plan.
+    """
+    orders: Sequence[OrderData]
+    tables: OpTables
+    op_ranges: Sequence[Sequence[OpRange]]
+    start_time: float
+    dem_machines: int
+    mon_machines: int
+    dem_flex_share: float
+    mon_flex_share: float
+    setup_minutes: float
+    # Prefix-Checkpoints für Delta-Re-Simulation (je Prozess eigener Trie)
+    checkpoints: Optional[PrefixCheckpoints] = None
+
+    def evaluate(
+        self, seq: Sequence[int], variants: Sequence[int], with_timeline: bool = True
+    ) -> Tuple[Dict[str, Any], Optional[List[Dict[str, Any]]]]:
+        return simulate_with_capacity(
+            seq, variants, self.orders, self.tables, self.op_ranges, self.start_time,
+            self.dem_machines, self.mon_machines,
+            self.dem_flex_share, self.mon_flex_share,
+            self.setup_minutes, with_timeline=with_timeline,
+            checkpoints=self.checkpoints,
+        )
+
+    def metrics(self, genome: Tuple[List[int], List[int]]) -> Dict[str, Any]:
+        """Nur Metriken – Bewertungsfunktion für ParallelEvaluator (keine Timeline über die Prozessgrenze)."""
+        seq, variants = genome
+        return self.evaluate(seq, variants, with_timeline=False)[0]
+
+
+def _timeline_to_operations(timeline: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    # Konvertiere Timeline zu Operations-Format für Kompatibilität
+    ops_out = []
+    for entry in (timeline or []):
+        ops_out.append({
+            "id": entry.get("step", "op"),
+            "stationId": entry.get("machine", entry.get("stationId", "unknown")),
+            "orderId": entry["orderId"],
+            "expectedDuration": entry["expectedDuration"],
+            "startTime": entry["startTime"],
+            "endTime": entry["endTime"],
+            "resources": [],
+            "machine": entry.get("machine"),
+            "machineType": entry.get("machineType"),
+        })
+    return ops_out
+
+
+def _plan_from_simulation(
+    plan_id: str,
+    seq: Sequence[int],
+    variants: Sequence[int],
+    metrics: Dict[str, Any],
+    timeline: Optional[List[Dict[str, Any]]],
+) -> Plan:
+    return Plan(plan_id, list(seq), _timeline_to_operations(timeline), metrics, variant_choices=list(variants))
+
+
 def _clone_operation(raw: Dict[str, Any], default_station: str) -> Operation:
     op_id = str(raw.get("id") or f"{default_station}-{random.randint(1, 9999)}")
     station = str(raw.get("stationId") or default_station)
@@ -706,7 +763,17 @@ def _clone_operation(raw: Dict[str, Any], default_station: str) -> Operation:
     return Operation(op_id, station, duration, resources, family)
 
 
-def _build_orders(payload: Dict[str, Any]) -> Tuple[List[OrderData], float, Dict[str, Any]]:
+def _build_orders(
+    payload: Dict[str, Any],
+    op_tables: Optional[OpTables] = None,
+    match_stats: Optional[Dict[str, int]] = None,
+) -> Tuple[List[OrderData], float, Dict[str, Any]]:
+    """
+    Aufträge aus dem Payload lesen. Mit `op_tables` werden die Sequenzvarianten jedes
+    Auftrags einmal zu Ops aufgelöst und in die Tabellen kompiliert (OrderData.variant_ranges);
+    die Simulation indiziert danach nur noch variant_ranges[v].
+    match_stats zählt die Step-Matching-Regeln über alle Aufträge (siehe step_resolver).
+    """
     raw_orders = payload.get("orders") or []
     if not isinstance(raw_orders, list):
         raise ValueError("orders must be a list")
@@ -757,6 +824,21 @@ def _build_orders(payload: Dict[str, Any]) -> Tuple[List[OrderData], float, Dict
 
         print(f"[PIPO] Order {order_id[-4:]}: {len(sequence_variants)} sequence variants found, {len(dem_ops)} dem_ops, {len(mon_ops)} mon_ops", file=sys.stderr)
 
+        variant_ranges: List[OpRange] = []
+        if op_tables is not None:
+            # Einzige Step-Auflösung: Resolver einmal pro Auftrag (über Kopien der Ops),
+            # Varianten mit identischen Steps teilen sich denselben Bereich
+            dem_resolver = StepResolver(clone_operations(dem_ops))
+            mon_resolver = StepResolver(clone_operations(mon_ops))
+            resolved: Dict[Tuple[str, ...], OpRange] = {}
+            for _, steps in sequence_variants:
+                key = tuple(steps)
+                op_range = resolved.get(key)
+                if op_range is None:
+                    op_range = op_tables.add(build_ops_from_sequence(steps, dem_resolver, mon_resolver, match_stats=match_stats))
+                    resolved[key] = op_range
+                variant_ranges.append(op_range)
+
         orders.append(OrderData(
             order_id=order_id,
             due_date=due_date,
@@ -764,6 +846,7 @@ def _build_orders(payload: Dict[str, Any]) -> Tuple[List[OrderData], float, Dict
             dem_ops=dem_ops,
             mon_ops=mon_ops,
             sequence_variants=sequence_variants,
+            variant_ranges=variant_ranges,
         ))
     return orders, start_time, config
 
@@ -838,46 +921,13 @@ def _simulate_sequence(
     return operations_out, metrics
 
 
-def _dominates(a: Dict[str, float], b: Dict[str, float]) -> bool:
-    keys = ("makespan", "tardiness", "idleTime")
-    better_or_equal = all(a[k] <= b[k] for k in keys)
-    strictly_better = any(a[k] < b[k] for k in keys)
-    return better_or_equal and strictly_better
-
-
 def _fast_non_dominated_sort(plans: List[Plan]) -> List[List[Plan]]:
-    fronts: List[List[Plan]] = []
-    S: Dict[int, List[int]] = {}
-    n_dom: Dict[int, int] = {}
-    for i, p in enumerate(plans):
-        S[i] = []
-        n_dom[i] = 0
-        for j, q in enumerate(plans):
-            if i == j:
-                continue
-            if _dominates(p.metrics, q.metrics):
-                S[i].append(j)
-            elif _dominates(q.metrics, p.metrics):
-                n_dom[i] += 1
-        if n_dom[i] == 0:
-            p.rank = 1
-    front_idxs = [i for i in range(len(plans)) if n_dom[i] == 0]
-    if front_idxs:
-        fronts.append([plans[i] for i in front_idxs])
-    current = front_idxs
-    while current:
-        next_front: List[int] = []
-        for i in current:
-            for j in S[i]:
-                n_dom[j] -= 1
-                if n_dom[j] == 0:
-                    plans[j].rank = len(fronts) + 1
-                    next_front.append(j)
-        if not next_front:
-            break
-        fronts.append([plans[i] for i in next_front])
-        current = next_front
-    return fronts
+    """Fronten über die Metrik-Matrix (pareto.non_dominated_fronts), setzt plan.rank."""
+    fronts = non_dominated_fronts([objective_vector(p.metrics) for p in plans])
+    for rank, front in enumerate(fronts, start=1):
+        for i in front:
+            plans[i].rank = rank
+    return [[plans[i] for i in front] for front in fronts]
 
 
 def _compute_crowding(front: List[Plan]) -> None:
@@ -918,24 +968,6 @@ def _select_harmony_memory(all_plans: List[Plan], hms: int) -> List[Plan]:
     return selected
 
 
-def _estimate_similarity(hm: List[Plan]) -> float:
-    if not hm or len(hm) == 1:
-        return 0.0
-    n = len(hm[0].sequence)
-    matches = 0
-    total = (len(hm) * (len(hm) - 1) // 2) * n
-    if total <= 0:
-        return 0.0
-    for i in range(len(hm)):
-        seq_i = hm[i].sequence
-        for j in range(i + 1, len(hm)):
-            seq_j = hm[j].sequence
-            for pos in range(n):
-                if seq_i[pos] == seq_j[pos]:
-                    matches += 1
-    return matches / float(total)
-
-
 def _adaptive_hmcr_par(
     similarity: float,
     hmcr_min: float,
@@ -962,55 +994,43 @@ def _adaptive_hmcr_par(
     return hmcr, par
 
 
-def _generate_new_sequence(hm: List[Plan], rng: random.Random, hmcr: float, par: float) -> List[int]:
+def _improviser_for(hm: List[Plan]) -> HarmonyImproviser:
+    """Improvisations-Engine für die aktuelle Harmony Memory (einmal pro Iteration bauen)."""
+    return HarmonyImproviser([plan.sequence for plan in hm], [plan.variant_choices for plan in hm])
+
+
+def _generate_new_sequence(
+    hm: List[Plan],
+    rng: random.Random,
+    hmcr: float,
+    par: float,
+    improviser: Optional[HarmonyImproviser] = None,
+) -> List[int]:
     """
     Generiert eine neue Auftragssequenz basierend auf Harmony Memory.
 
     Diversitäts-Verbesserungen:
-    - Gewichtete Memory-Wahl (bessere Pläne bevorzugt)
+    - Gewichtete Memory-Wahl (bessere Pläne bevorzugt, Alias-Tabelle im Improviser)
     - Multi-Swap PAR (bis zu 3 Swaps statt nur 1)
     - Segment-Inversion für größere Strukturänderungen
     """
     if not hm:
         return []
+    if improviser is None:
+        improviser = _improviser_for(hm)
     n = len(hm[0].sequence)
-    jobs = list(range(n))
-    new_seq: List[Optional[int]] = [None] * n
-    used = set()
+    new_seq: List[int] = [0] * n
+    unused = UnusedPool(n)
 
     for pos in range(n):
-        choose_memory = rng.random() < hmcr
         val = None
-        if choose_memory:
+        if rng.random() < hmcr:
             # Gewichtete Auswahl: Bessere Pläne (niedrigerer Index in HM) bevorzugen
-            weights = [1.0 / (idx + 1) for idx in range(len(hm))]
-            total_weight = sum(weights)
-            weights = [w / total_weight for w in weights]
-
-            # Gewichtete Planauswahl
-            plan_indices = list(range(len(hm)))
-            rng.shuffle(plan_indices)  # Shuffle für Tie-Breaking
-            for plan_idx in plan_indices:
-                if rng.random() < weights[plan_idx] * len(hm):
-                    cand = hm[plan_idx].sequence[pos]
-                    if cand not in used:
-                        val = cand
-                        break
-
-            # Fallback: Einfache Memory-Wahl
-            if val is None:
-                candidates = [plan.sequence[pos] for plan in hm]
-                rng.shuffle(candidates)
-                for cand in candidates:
-                    if cand not in used:
-                        val = cand
-                        break
-
+            val = improviser.memory_job(pos, unused, rng)
         if val is None:
-            remaining = [job for job in jobs if job not in used]
-            val = rng.choice(remaining)
+            val = unused.pick(rng)
         new_seq[pos] = val
-        used.add(val)
+        unused.take(val)
 
     # Erweiterte Pitch Adjustment: Multi-Swap und Segment-Inversion
     if n > 1 and rng.random() < par:
@@ -1028,7 +1048,7 @@ def _generate_new_sequence(hm: List[Plan], rng: random.Random, hmcr: float, par:
             segment = new_seq[start:start + seg_len]
             new_seq[start:start + seg_len] = segment[::-1]
 
-    return [int(x) for x in new_seq if x is not None]
+    return new_seq
 
 
 def _generate_variant_choices(
@@ -1037,6 +1057,7 @@ def _generate_variant_choices(
     hm: Optional[List[Plan]] = None,
     hmcr: float = 0.8,
     par: float = 0.3,
+    improviser: Optional[HarmonyImproviser] = None,
 ) -> List[int]:
     """
     Generiert Sequenzvarianten-Wahl für alle Aufträge.
@@ -1049,6 +1070,8 @@ def _generate_variant_choices(
     """
     n = len(orders)
     choices: List[int] = []
+    if hm and improviser is None:
+        improviser = _improviser_for(hm)
 
     for i in range(n):
         order = orders[i]
@@ -1058,40 +1081,11 @@ def _generate_variant_choices(
             choices.append(0)
             continue
 
+        choice = None
         if hm and rng.random() < hmcr:
             # Memory-basierte Wahl mit Diversitäts-Bonus für seltene Varianten
-            candidates = []
-            for plan in hm:
-                if i < len(plan.variant_choices):
-                    candidates.append(plan.variant_choices[i])
-
-            if candidates:
-                # Zähle Häufigkeit jeder Variante in HM
-                variant_counts = {}
-                for c in candidates:
-                    variant_counts[c] = variant_counts.get(c, 0) + 1
-
-                # Invertierte Gewichtung: Seltene Varianten bevorzugen
-                weights = []
-                for c in candidates:
-                    # Weniger häufig = höheres Gewicht
-                    weights.append(1.0 / (variant_counts[c] + 0.5))
-
-                total_weight = sum(weights)
-                weights = [w / total_weight for w in weights]
-
-                # Gewichtete Auswahl
-                r = rng.random()
-                cumsum = 0.0
-                choice = candidates[0]
-                for idx, w in enumerate(weights):
-                    cumsum += w
-                    if r <= cumsum:
-                        choice = candidates[idx]
-                        break
-            else:
-                choice = rng.randint(0, num_variants - 1)
-        else:
+            choice = improviser.memory_variant(i, rng)
+        if choice is None:
             # Zufällige Wahl
             choice = rng.randint(0, num_variants - 1)
 
@@ -1099,9 +1093,8 @@ def _generate_variant_choices(
         if rng.random() < par:
             if num_variants > 2 and rng.random() < 0.3:
                 # Mit 30% Wahrscheinlichkeit: Sprung zu beliebiger anderer Variante
-                other_variants = [v for v in range(num_variants) if v != choice]
-                if other_variants:
-                    choice = rng.choice(other_variants)
+                other = rng.randrange(num_variants - 1)
+                choice = other + 1 if other >= choice else other
             else:
                 # Standard: Nachbar-Variante
                 if rng.random() < 0.5 and choice > 0:
@@ -1139,6 +1132,7 @@ def create_iteration_chart(iteration_history: List[Dict[str, float]]) -> Optiona
     - Durchlaufzeit (Makespan) über Iterationen
     - Lieferterminabweichung (Lateness mit Vorzeichen) über Iterationen
     - Auslastung (direkt berechnet) über Iterationen
+    - Hypervolumen der Harmony Memory über Iterationen (falls erfasst)
     """
     if not iteration_history:
         return None
@@ -1150,8 +1144,12 @@ def create_iteration_chart(iteration_history: List[Dict[str, float]]) -> Optiona
         lateness_vals = [h.get("avgLateness", h.get("tardiness", 0.0)) for h in iteration_history]
         # Auslastung direkt aus Metriken (Summe Bearbeitungszeiten / (Makespan × Maschinen))
         utilization_vals = [h.get("avgUtilization", 0.0) for h in iteration_history]
+        has_hv = all("hypervolume" in h for h in iteration_history)
 
-        fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(8, 6))
+        if has_hv:
+            fig, (ax1, ax2, ax3, ax4) = plt.subplots(4, 1, figsize=(8, 8))
+        else:
+            fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(8, 6))
 
         # Durchlaufzeit (Makespan)
         ax1.plot(iterations, makespan_vals, marker='o', linewidth=2, color='#9333ea', markersize=3)
@@ -1168,11 +1166,18 @@ def create_iteration_chart(iteration_history: List[Dict[str, float]]) -> Optiona
 
         # Auslastung (direkt berechnet)
         ax3.plot(iterations, utilization_vals, marker='o', linewidth=2, color='#22c55e', markersize=3)
-        ax3.set_xlabel("Iteration", fontsize=9)
         ax3.set_ylabel("Auslastung (%)", fontsize=9)
         ax3.set_title("MOAHS-Konvergenz: Kapazitätsauslastung", fontsize=10)
         ax3.grid(True, linestyle="--", alpha=0.4)
 
+        # Hypervolumen (fester Referenzpunkt, steigt bei besserer Front)
+        if has_hv:
+            ax4.plot(iterations, [h["hypervolume"] for h in iteration_history], marker='o', linewidth=2, color='#2563eb', markersize=3)
+            ax4.set_ylabel("Hypervolumen", fontsize=9)
+            ax4.set_title("MOAHS-Konvergenz: Hypervolumen der Harmony Memory", fontsize=10)
+            ax4.grid(True, linestyle="--", alpha=0.4)
+        (ax4 if has_hv else ax3).set_xlabel("Iteration", fontsize=9)
+
         plt.tight_layout()
 
         buf = io.BytesIO()
@@ -1434,8 +1439,14 @@ def _schedule(payload: Dict[str, Any]) -> Dict[str, Any]:
             "processSequences": o.get("processSequences"),
         })
 
-    orders, start_time, config = _build_orders(payload)
+    # Ops je (Auftrag, Variante) werden beim Einlesen einmal aufgelöst und kompiliert,
+    # statt build_ops_from_sequence bei jeder Plan-Bewertung neu aufzurufen
+    op_tables = OpTables(step_of=_op_step)
+    step_match_stats: Dict[str, int] = {}
+    orders, start_time, config = _build_orders(payload, op_tables, step_match_stats)
+    op_ranges = [order.variant_ranges for order in orders]
     progress.append({"stage": "PIPO_V2_STAGE", "step": "orders_built", "orders": len(orders)})
+    progress.append({"stage": "PIPO_STEP_MATCHING", "rules": step_match_stats})
     if not orders:
         return {
             "paretoSet": [],
@@ -1463,30 +1474,91 @@ def _schedule(payload: Dict[str, Any]) -> Dict[str, Any]:
         print(f"[PIPO] Order {order.order_id[-4:]}: {len(order.sequence_variants)} variants, {len(order.dem_ops)} dem, {len(order.mon_ops)} mon", file=sys.stderr)
 
     progress.append({"stage": "PIPO_V2_STAGE", "step": "config_ready"})
+    reporter = ProgressReporter.from_config(config, "PIPO_MOAHS")
+    evaluations = 0
+    # Delta-Re-Simulation: Zustands-Checkpoints alle N Auftragspositionen (0 = aus)
+    checkpoint_interval = max(0, _safe_int(config.get("checkpointInterval"), 8))
+    checkpoint_store = PrefixCheckpoints(checkpoint_interval) if checkpoint_interval > 0 else None
+
+    eval_context = PlanEvalContext(
+        orders, op_tables, op_ranges, start_time,
+        dem_machines, mon_machines,
+        dem_flex_share, mon_flex_share,
+        setup_minutes,
+        checkpoints=checkpoint_store,
+    )
+    # Optional: Kandidaten einer Iteration parallel bewerten (config.workers, Default 1)
+    workers = max(1, min(_safe_int(config.get("workers"), 1), os.cpu_count() or 1))
+    parallel_eval: Optional[ParallelEvaluator[Tuple[List[int], List[int]], Dict[str, Any]]] = None
+    # Duplikate: Genom-Key -> Metriken des bereits bewerteten Genoms (ohne Timeline).
+    # Die Suche bewertet nur Metriken; Timelines entstehen erst für Pareto-Front/Auswahl.
+    plan_cache: FitnessCache[Dict[str, Any]] = FitnessCache(max(1, _safe_int(config.get("cacheSize"), 20000)))
+    materialized_count = 0
+    # Externes Archiv aller je gefundenen nicht-dominierten Pläne (unabhängig von der HM-Kürzung)
+    pareto_archive: ParetoArchive[Plan] = ParetoArchive()
+    candidates_total = 0
+    duplicate_count = 0
+    reused_count = 0
 
     # Hilfsfunktion: Simuliere und erstelle Plan
     def create_plan(seq: List[int], variants: List[int], plan_id: str) -> Plan:
-        metrics, timeline = simulate_with_capacity(
-            seq, variants, orders, start_time,
-            dem_machines, mon_machines,
-            dem_flex_share, mon_flex_share,
-            setup_minutes, with_timeline=True
-        )
-        # Konvertiere Timeline zu Operations-Format für Kompatibilität
-        ops_out = []
-        for entry in (timeline or []):
-            ops_out.append({
-                "id": entry.get("step", "op"),
-                "stationId": entry.get("machine", entry.get("stationId", "unknown")),
-                "orderId": entry["orderId"],
-                "expectedDuration": entry["expectedDuration"],
-                "startTime": entry["startTime"],
-                "endTime": entry["endTime"],
-                "resources": [],
-                "machine": entry.get("machine"),
-                "machineType": entry.get("machineType"),
-            })
-        return Plan(plan_id, list(seq), ops_out, metrics, variant_choices=list(variants))
+        nonlocal evaluations
+        evaluations += 1
+        metrics, timeline = eval_context.evaluate(seq, variants)
+        return _plan_from_simulation(plan_id, seq, variants, metrics, timeline)
+
+    def create_plans(genomes: List[Tuple[List[int], List[int]]]) -> List[Plan]:
+        """
+        Batch bewerten (parallel, falls Worker aktiv); Plan-IDs in Eingabereihenfolge.
+        Bereits bewertete Genome (auch doppelt im selben Batch) werden nicht erneut simuliert.
+        """
+        nonlocal evaluations, plan_counter, candidates_total, duplicate_count, reused_count
+        keys = [genome_key(seq, variants) for seq, variants in genomes]
+        cached: List[Optional[Dict[str, Any]]] = [None] * len(genomes)
+        first_in_batch: Dict[bytes, int] = {}
+        todo: List[int] = []
+        for i, key in enumerate(keys):
+            cached[i] = plan_cache.get(key)
+            if cached[i] is not None or key in first_in_batch:
+                duplicate_count += 1
+            else:
+                first_in_batch[key] = i
+                todo.append(i)
+        candidates_total += len(genomes)
+
+        # Suchphase: nur Metriken simulieren (keine Op-Dicts, keine Timeline)
+        batch = [genomes[i] for i in todo]
+        if parallel_eval is not None and len(batch) > 1:
+            results = parallel_eval(batch)
+        else:
+            results = [eval_context.metrics(genome) for genome in batch]
+        evaluations += len(batch)
+        simulated = dict(zip(todo, results))
+
+        plans: List[Plan] = []
+        for i, (seq, variants) in enumerate(genomes):
+            plan_id = f"plan-{plan_counter}"
+            plan_counter += 1
+            metrics = simulated.get(i)
+            if metrics is not None:
+                plan_cache.put(keys[i], metrics)
+            else:
+                # Metriken sind nach der Bewertung unveränderlich und dürfen geteilt werden
+                metrics = cached[i] or plans[first_in_batch[keys[i]]].metrics
+                reused_count += 1
+            plan = Plan(plan_id, list(seq), None, metrics, variant_choices=list(variants))
+            pareto_archive.add(objective_vector(metrics), plan)
+            plans.append(plan)
+        return plans
+
+    def materialize(plan: Plan) -> Plan:
+        """Timeline für einen überlebenden Plan nachsimulieren (deterministisch, gleiche Metriken)."""
+        nonlocal materialized_count
+        if plan.operations is None:
+            _, timeline = eval_context.evaluate(plan.sequence, plan.variant_choices, with_timeline=True)
+            plan.operations = _timeline_to_operations(timeline)
+            materialized_count += 1
+        return plan
 
     if len(orders) == 1:
         seq = [0]
@@ -1517,10 +1589,15 @@ def _schedule(payload: Dict[str, Any]) -> Dict[str, Any]:
     hmcr_max = _safe_float(config.get("HMCRmax"), 0.92)
     par_min = _safe_float(config.get("PARmin"), 0.15)
     par_max = _safe_float(config.get("PARmax"), 0.65)
+    # Konvergenz-Abbruch: N Iterationen ohne Hypervolumen-Zuwachs (0 = aus, immer `iterations`)
+    hv_stall_iterations = _safe_int(config.get("hvStallIterations"), 0) or None
+    hv_reference_raw = config.get("hvReference")
+    iterations_run = 0
+    stop_reason = "completed"
 
     # MOAHS Initialization Logging
     print(f"[MOAHS-PIPO] Starting with {len(orders)} orders", file=sys.stderr)
-    print(f"[MOAHS-PIPO] Config: HMS={HMS}, iterations={iterations}, candidates_per_iter={candidates_per_iter}", file=sys.stderr)
+    print(f"[MOAHS-PIPO] Config: HMS={HMS}, iterations={iterations}, candidates_per_iter={candidates_per_iter}, workers={workers}", file=sys.stderr)
     print(f"[MOAHS-PIPO] Weights: makespan={weights.get('makespan', 0.34):.2f}, tardiness={weights.get('tardiness', 0.33):.2f}, idleTime={weights.get('idleTime', 0.33):.2f}", file=sys.stderr)
 
     # Log Sequenzvarianten-Suchraum
@@ -1561,84 +1638,189 @@ def _schedule(payload: Dict[str, Any]) -> Dict[str, Any]:
             seen.add(seq)
             seq_candidates.append(list(seq))
 
-    # Initialisiere Harmony Memory mit verschiedenen Sequenzen UND Varianten
-    harmony_memory: List[Plan] = []
-    for seq in seq_candidates[:HMS]:
+    if workers > 1:
+        try:
+            parallel_eval = ParallelEvaluator(eval_context.metrics, workers, label="[MOAHS-PIPO]")
+            print(f"[MOAHS-PIPO] Candidate evaluation on {workers} worker processes", file=sys.stderr)
+        except Exception as exc:  # z.B. keine Prozesse erlaubt -> sequentiell
+            print(f"[MOAHS-PIPO] WARNING: process pool unavailable ({exc}) - evaluating sequentially", file=sys.stderr)
+
+    try:
+        # Initialisiere Harmony Memory mit verschiedenen Sequenzen UND Varianten
         # Generiere verschiedene Varianten-Kombinationen für jede Sequenz
-        variants = _generate_variant_choices(orders, rng)
-        plan = create_plan(seq, variants, f"plan-{plan_counter}")
-        plan_counter += 1
-        harmony_memory.append(plan)
-
-    progress.append({"stage": "PIPO_V2_STAGE", "step": "hm_initialized", "plans": len(harmony_memory)})
-
-    # Log initial Harmony Memory
-    if harmony_memory:
-        best_init = min(harmony_memory, key=lambda p: _score_plan(p, weights))
-        print(f"[MOAHS-PIPO] Initial HM size: {len(harmony_memory)}", file=sys.stderr)
-        print(f"[MOAHS-PIPO] Initial best: makespan={best_init.metrics['makespan']:.1f}, tardiness={best_init.metrics['tardiness']:.1f}, idle={best_init.metrics['idleTime']:.1f}", file=sys.stderr)
-        print(f"[MOAHS-PIPO] Initial sequence: {best_init.sequence}", file=sys.stderr)
-        print(f"[MOAHS-PIPO] Initial variants: {best_init.variant_choices}", file=sys.stderr)
-
-    iteration_history: List[Dict[str, float]] = []
-    for it in range(iterations):
-        similarity = _estimate_similarity(harmony_memory)
-        hmcr, par = _adaptive_hmcr_par(similarity, hmcr_min, hmcr_max, par_min, par_max)
-        new_plans: List[Plan] = []
-        for _ in range(candidates_per_iter):
-            # Generiere neue Auftragssequenz
-            new_seq = _generate_new_sequence(harmony_memory, rng, hmcr, par)
-            # Generiere neue Varianten-Wahl (nutzt HM für Memory-basierte Wahl)
-            new_variants = _generate_variant_choices(orders, rng, harmony_memory, hmcr, par)
-            plan = create_plan(new_seq, new_variants, f"plan-{plan_counter}")
-            plan_counter += 1
-            new_plans.append(plan)
-        harmony_memory = _select_harmony_memory(harmony_memory + new_plans, HMS)
+        harmony_memory: List[Plan] = create_plans(
+            [(seq, _generate_variant_choices(orders, rng)) for seq in seq_candidates[:HMS]]
+        )
 
-        # Track best metrics in current harmony memory
+        progress.append({"stage": "PIPO_V2_STAGE", "step": "hm_initialized", "plans": len(harmony_memory)})
+
+        # Log initial Harmony Memory
         if harmony_memory:
-            best_makespan = min(p.metrics["makespan"] for p in harmony_memory)
-            best_tardiness = min(p.metrics["tardiness"] for p in harmony_memory)
-            best_idle = min(p.metrics["idleTime"] for p in harmony_memory)
-            # Für Lateness: Durchschnitt der avgLateness (mit Vorzeichen)
-            best_lateness = min(p.metrics.get("avgLateness", 0.0) for p in harmony_memory)
-            # Für Auslastung: Maximum (höhere = besser)
-            best_utilization = max(p.metrics.get("avgUtilization", 0.0) for p in harmony_memory)
-            iteration_history.append({
-                "makespan": best_makespan,
-                "tardiness": best_tardiness,
-                "idleTime": best_idle,
-                "avgLateness": best_lateness,
-                "avgUtilization": best_utilization,
-            })
+            best_init = min(harmony_memory, key=lambda p: _score_plan(p, weights))
+            print(f"[MOAHS-PIPO] Initial HM size: {len(harmony_memory)}", file=sys.stderr)
+            print(f"[MOAHS-PIPO] Initial best: makespan={best_init.metrics['makespan']:.1f}, tardiness={best_init.metrics['tardiness']:.1f}, idle={best_init.metrics['idleTime']:.1f}", file=sys.stderr)
+            print(f"[MOAHS-PIPO] Initial sequence: {best_init.sequence}", file=sys.stderr)
+            print(f"[MOAHS-PIPO] Initial variants: {best_init.variant_choices}", file=sys.stderr)
+
+        iteration_history: List[Dict[str, float]] = []
+        # Similarity inkrementell: nur ausgetauschte Pläne werden nachgezählt
+        hm_histogram = PositionHistogram(n, (plan.sequence for plan in harmony_memory))
+
+        # Hypervolumen (makespan, tardiness, idleTime) gegen festen Referenzpunkt:
+        # config.hvReference oder schlechteste Werte der initialen Harmony Memory + Abstand
+        hm_points = [objective_vector(plan.metrics) for plan in harmony_memory]
+        if isinstance(hv_reference_raw, (list, tuple)) and len(hv_reference_raw) == len(hm_points[0] if hm_points else ()):
+            hv_reference = tuple(_safe_float(v, 0.0) for v in hv_reference_raw)
+        else:
+            hv_reference = reference_point(hm_points) if hm_points else (1.0, 1.0, 1.0)
+        hv_tracker = HypervolumeTracker(hv_reference)
+        best_hv = hv_tracker.update(hm_points)
+        initial_hv = best_hv
+        hv_stall = 0
+        for it in range(iterations):
+            similarity = hm_histogram.similarity()
+            hmcr, par = _adaptive_hmcr_par(similarity, hmcr_min, hmcr_max, par_min, par_max)
+            genomes: List[Tuple[List[int], List[int]]] = []
+            # Gewichte/Alias-Tabellen einmal pro Iteration, nicht pro Kandidat
+            improviser = _improviser_for(harmony_memory)
+            for _ in range(candidates_per_iter):
+                # Generiere neue Auftragssequenz
+                new_seq = _generate_new_sequence(harmony_memory, rng, hmcr, par, improviser)
+                # Generiere neue Varianten-Wahl (nutzt HM für Memory-basierte Wahl)
+                new_variants = _generate_variant_choices(orders, rng, harmony_memory, hmcr, par, improviser)
+                genomes.append((new_seq, new_variants))
+            # Kandidaten sind unabhängig voneinander -> gemeinsam (ggf. parallel) bewerten
+            new_plans = create_plans(genomes)
+            previous_memory = harmony_memory
+            harmony_memory = _select_harmony_memory(harmony_memory + new_plans, HMS)
+            kept = {id(plan) for plan in harmony_memory}
+            for plan in previous_memory:
+                if id(plan) not in kept:
+                    hm_histogram.remove(plan.sequence)
+            for plan in new_plans:
+                if id(plan) in kept:
+                    hm_histogram.add(plan.sequence)
+
+            iterations_run = it + 1
+            hypervolume = hv_tracker.update([objective_vector(plan.metrics) for plan in harmony_memory])
+            if hypervolume > best_hv * (1.0 + 1e-9):
+                best_hv = hypervolume
+                hv_stall = 0
+            else:
+                hv_stall += 1
+
+            # Track best metrics in current harmony memory
+            if harmony_memory:
+                best_makespan = min(p.metrics["makespan"] for p in harmony_memory)
+                best_tardiness = min(p.metrics["tardiness"] for p in harmony_memory)
+                best_idle = min(p.metrics["idleTime"] for p in harmony_memory)
+                # Für Lateness: Durchschnitt der avgLateness (mit Vorzeichen)
+                best_lateness = min(p.metrics.get("avgLateness", 0.0) for p in harmony_memory)
+                # Für Auslastung: Maximum (höhere = besser)
+                best_utilization = max(p.metrics.get("avgUtilization", 0.0) for p in harmony_memory)
+                iteration_history.append({
+                    "makespan": best_makespan,
+                    "tardiness": best_tardiness,
+                    "idleTime": best_idle,
+                    "avgLateness": best_lateness,
+                    "avgUtilization": best_utilization,
+                    "hypervolume": hypervolume,
+                })
+                if reporter.enabled:
+                    best_plan = min(harmony_memory, key=lambda p: _score_plan(p, weights))
+                    reporter.emit(
+                        it,
+                        evaluations,
+                        iteration_history[-1],
+                        [orders[idx].order_id for idx in best_plan.sequence],
+                        variantChoices=best_plan.variant_choices,
+                        similarity=similarity,
+                    )
+
+                # Iteration Progress Logging
+                if it == 0:
+                    print(f"[MOAHS-PIPO] Iter 0: makespan={best_makespan:.1f}, tardiness={best_tardiness:.1f}, idle={best_idle:.1f}", file=sys.stderr)
+                    best_plan = min(harmony_memory, key=lambda p: _score_plan(p, weights))
+                    print(f"[MOAHS-PIPO] Iter 0: sequence={best_plan.sequence}, variants={best_plan.variant_choices}", file=sys.stderr)
+                elif (it + 1) % 20 == 0 or it == iterations - 1:
+                    improvement = ""
+                    if len(iteration_history) > 1:
+                        prev = iteration_history[-2]
+                        if best_makespan < prev["makespan"] or best_tardiness < prev["tardiness"] or best_idle < prev["idleTime"]:
+                            improvement = "↓"
+                        else:
+                            improvement = "→"
+                    print(f"[MOAHS-PIPO] Iter {it + 1}: makespan={best_makespan:.1f}, tardiness={best_tardiness:.1f}, idle={best_idle:.1f} {improvement}", file=sys.stderr)
+                    print(f"[MOAHS-PIPO] Iter {it + 1}: similarity={similarity:.3f}, HMCR={hmcr:.3f}, PAR={par:.3f}, HV={hypervolume:.4g}", file=sys.stderr)
+
+            if hv_stall_iterations is not None and hv_stall >= hv_stall_iterations:
+                stop_reason = "hvStall"
+                print(f"[MOAHS-PIPO] Hypervolume stalled for {hv_stall} iterations - stopping after iteration {it + 1}/{iterations}", file=sys.stderr)
+                break
+    finally:
+        if parallel_eval is not None:
+            parallel_eval.close()
+
+    progress.append({
+        "stage": "PIPO_V2_STAGE",
+        "step": "iterations_done",
+        "iterations": iterations_run,
+        "iterationsPlanned": iterations,
+        "stopReason": stop_reason,
+    })
+    progress.append({
+        "stage": "PIPO_HYPERVOLUME",
+        "initial": initial_hv,
+        "final": iteration_history[-1]["hypervolume"] if iteration_history else initial_hv,
+        "best": best_hv,
+        "iterationsRun": iterations_run,
+        "iterationsPlanned": iterations,
+        "stopReason": stop_reason,
+        "hvStallIterations": hv_stall_iterations,
+        **hv_tracker.stats(),
+    })
 
-            # Iteration Progress Logging
-            if it == 0:
-                print(f"[MOAHS-PIPO] Iter 0: makespan={best_makespan:.1f}, tardiness={best_tardiness:.1f}, idle={best_idle:.1f}", file=sys.stderr)
-                best_plan = min(harmony_memory, key=lambda p: _score_plan(p, weights))
-                print(f"[MOAHS-PIPO] Iter 0: sequence={best_plan.sequence}, variants={best_plan.variant_choices}", file=sys.stderr)
-            elif (it + 1) % 20 == 0 or it == iterations - 1:
-                improvement = ""
-                if len(iteration_history) > 1:
-                    prev = iteration_history[-2]
-                    if best_makespan < prev["makespan"] or best_tardiness < prev["tardiness"] or best_idle < prev["idleTime"]:
-                        improvement = "↓"
-                    else:
-                        improvement = "→"
-                print(f"[MOAHS-PIPO] Iter {it + 1}: makespan={best_makespan:.1f}, tardiness={best_tardiness:.1f}, idle={best_idle:.1f} {improvement}", file=sys.stderr)
-                print(f"[MOAHS-PIPO] Iter {it + 1}: similarity={similarity:.3f}, HMCR={hmcr:.3f}, PAR={par:.3f}", file=sys.stderr)
-    progress.append({"stage": "PIPO_V2_STAGE", "step": "iterations_done", "iterations": iterations})
-
-    fronts = _fast_non_dominated_sort(harmony_memory)
-    pareto_front = fronts[0] if fronts else []
-    pareto_front = pareto_front[:max_pareto]
+    # Pareto-Front aus dem Archiv statt aus der (gekürzten) Harmony Memory
+    hm_fronts = _fast_non_dominated_sort(harmony_memory)
+    pareto_front = pareto_archive.items()
+    if len(pareto_front) > max_pareto:
+        # Verteilung erhalten: die maxPareto Pläne mit größter Crowding-Distance, Archiv-Reihenfolge bleibt
+        _compute_crowding(pareto_front)
+        keep = {id(p) for p in sorted(pareto_front, key=lambda p: p.crowding, reverse=True)[:max_pareto]}
+        pareto_front = [p for p in pareto_archive.items() if id(p) in keep]
     selected = pareto_front[0] if pareto_front else (harmony_memory[0] if harmony_memory else None)
     if selected and weights:
         selected = min(pareto_front, key=lambda p: _score_plan(p, weights))
+    # Erst jetzt Timelines erzeugen – nur für die Pläne, die ausgegeben werden
+    for plan in pareto_front:
+        materialize(plan)
+    if selected:
+        materialize(selected)
     progress.append({"stage": "PIPO_V2_STAGE", "step": "selection_done", "pareto": len(pareto_front)})
 
     # Pareto Front and Selection Logging
-    print(f"[MOAHS-PIPO] Pareto front size: {len(pareto_front)}", file=sys.stderr)
+    print(f"[MOAHS-PIPO] Pareto front size: {len(pareto_front)} (archive {len(pareto_archive)}, HM front {len(hm_fronts[0]) if hm_fronts else 0})", file=sys.stderr)
+    progress.append({
+        "stage": "PIPO_PARETO_ARCHIVE",
+        "hmFrontSize": len(hm_fronts[0]) if hm_fronts else 0,
+        "returned": len(pareto_front),
+        "maxPareto": max_pareto,
+        **pareto_archive.stats(),
+    })
+    if checkpoint_store is not None:
+        print(f"[MOAHS-PIPO] Prefix checkpoints: {checkpoint_store.stats()}", file=sys.stderr)
+    duplicate_rate = duplicate_count / candidates_total if candidates_total else 0.0
+    print(f"[MOAHS-PIPO] Duplicate genomes: {duplicate_count}/{candidates_total} ({duplicate_rate:.1%}), {reused_count} reused without simulation", file=sys.stderr)
+    progress.append({
+        "stage": "PIPO_DUPLICATES",
+        "candidates": candidates_total,
+        "duplicates": duplicate_count,
+        "duplicateRate": duplicate_rate,
+        "reused": reused_count,
+        "simulated": evaluations,
+        "materialized": materialized_count,
+        "cache": plan_cache.stats(),
+    })
     if selected:
         print(f"[MOAHS-PIPO] Selected plan: {selected.plan_id}", file=sys.stderr)
         print(f"[MOAHS-PIPO] Selected metrics: makespan={selected.metrics['makespan']:.1f}, tardiness={selected.metrics['tardiness']:.1f}, idle={selected.metrics['idleTime']:.1f}", file=sys.stderr)
@@ -1677,7 +1859,7 @@ def _schedule(payload: Dict[str, Any]) -> Dict[str, Any]:
             print(f"[MOAHS-PIPO] ⚠️  WARNING: Fitness constant across all iterations - no improvement detected!", file=sys.stderr)
             print(f"[MOAHS-PIPO] This may indicate: (1) single/identical orders, (2) excessive capacity, (3) zero weights", file=sys.stderr)
 
-    debug = progress + _build_debug(orders, config, harmony_memory, pareto_front, selected, released_ops, iterations, iteration_history, start_time, ops_debug, fitness_constant)
+    debug = progress + _build_debug(orders, config, harmony_memory, pareto_front, selected, released_ops, iterations_run, iteration_history, start_time, ops_debug, fitness_constant)
 
     # Create etaList from selected plan for JavaScript integration
     eta_list: List[Dict[str, Any]] = []
@@ -1786,20 +1968,24 @@ def _schedule(payload: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def error_result(exc: BaseException) -> Dict[str, Any]:
+    """Fehlerantwort (leerer Plan + PIPO_ERROR) – auch für terminierung.serve."""
+    return {
+        "paretoSet": [],
+        "selectedPlanId": None,
+        "releasedOps": [],
+        "holdDecisions": [],
+        "debug": [{"stage": "PIPO_ERROR", "message": str(exc)}],
+    }
+
+
 def main() -> None:
     try:
         payload = _load_payload()
         result = _schedule(payload)
         print(json.dumps(result))
     except Exception as exc:  # pragma: no cover - fail-safe for scheduling daemon
-        error_result = {
-            "paretoSet": [],
-            "selectedPlanId": None,
-            "releasedOps": [],
-            "holdDecisions": [],
-            "debug": [{"stage": "PIPO_ERROR", "message": str(exc)}],
-        }
-        print(json.dumps(error_result))
+        print(json.dumps(error_result(exc)))
 
 
 if __name__ == "__main__":
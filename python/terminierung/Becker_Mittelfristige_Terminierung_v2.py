@@ -21,13 +21,24 @@ import base64
 import io
 import json
 import math
+import os
 import random
 import statistics
 import sys
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field, replace
 from itertools import combinations
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
+from genome_cache import FitnessCache, genome_key
+from montecarlo import TardinessSampler
+from op_tables import KIND_DEM, KIND_MON, OpRange, OpTables, compile_op_lists
+from parallel_eval import ParallelEvaluator
+from progress_stream import ProgressReporter
+from sim_checkpoints import PrefixCheckpoints
+from similarity import StepInterner, jaccard_matrix_bits
+from step_resolver import StepResolver, count_rule
+
 try:  # optional – Diagramme für den Queue Monitor
     import matplotlib.pyplot as plt  # type: ignore
 
@@ -252,12 +263,17 @@ def parse_all_sequence_variants(process_sequences: Any) -> List[Tuple[str, List[
 
 def build_ops_from_sequence(
     steps: List[str],
-    dem_ops: List[Dict[str, Any]],
-    mon_ops: List[Dict[str, Any]],
+    dem_resolver: StepResolver,
+    mon_resolver: StepResolver,
+    match_stats: Optional[Dict[str, int]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Map sequence steps to operations with durations.
 
+    dem_resolver/mon_resolver: einmal pro Auftrag gebaute StepResolver über die
+    Demontage-/Montage-Ops. match_stats zählt, welche Matching-Regel pro Step gegriffen hat –
+    ersetzt die früheren DEBUG-Ausgaben pro Aufruf.
+
     Sequenz-Format: [I, BG1, BG2, ..., ×, BG3, BG4, ..., Q]
     - I = Inspektion (ignoriert)
     - Steps VOR × = Demontage-Reihenfolge
@@ -279,7 +295,7 @@ def build_ops_from_sequence(
     if separator_idx == -1:
         # Fallback: Alte Logik wenn kein × gefunden
         print(f"WARN: build_ops_from_sequence - no × separator found, using legacy matching", file=sys.stderr)
-        return _build_ops_legacy(steps, dem_ops, mon_ops)
+        return _build_ops_legacy(steps, dem_resolver.ops, mon_resolver.ops)
 
     # Extrahiere Demontage-Steps (zwischen I und ×)
     dem_steps = []
@@ -301,59 +317,16 @@ def build_ops_from_sequence(
         if step:
             mon_steps.append(step)
 
-    # Erstelle Mapping: Step-Name -> Op
+    # Step -> Op über den indizierten Resolver (einmal pro Auftrag gebaut, siehe step_resolver)
     # Priority: meta.step (baugruppentyp), label, setupFamily, bg
     # Die Sequenz-Steps sind "BGT-PS-Fahrwerk" etc., die meta.step sollte auch "BGT-PS-Fahrwerk" sein
-    dem_ops_by_name: Dict[str, Dict[str, Any]] = {}
-    for op in dem_ops:
-        meta = op.get("meta", {})
-        # Primär: meta.step (enthält baugruppentyp wie "BGT-PS-Fahrwerk")
-        primary_name = meta.get("step")
-        # Fallbacks: label, setupFamily, bg
-        fallback_name = op.get("label") or op.get("setupFamily") or op.get("bg") or op.get("id", "")
-
-        if primary_name:
-            dem_ops_by_name[primary_name] = op
-        if fallback_name and fallback_name != primary_name:
-            dem_ops_by_name[fallback_name] = op
-
-    mon_ops_by_name: Dict[str, Dict[str, Any]] = {}
-    for op in mon_ops:
-        meta = op.get("meta", {})
-        primary_name = meta.get("step")
-        fallback_name = op.get("label") or op.get("setupFamily") or op.get("bg") or op.get("id", "")
-
-        if primary_name:
-            mon_ops_by_name[primary_name] = op
-        if fallback_name and fallback_name != primary_name:
-            mon_ops_by_name[fallback_name] = op
-
-    # Debug: Log verfügbare Mappings
-    print(f"DEBUG: build_ops_from_sequence called with {len(dem_ops)} dem_ops, {len(mon_ops)} mon_ops", file=sys.stderr)
-    print(f"DEBUG: build_ops_from_sequence - raw dem_ops (first 2): {dem_ops[:2]}", file=sys.stderr)
-    print(f"DEBUG: build_ops_from_sequence - raw mon_ops (first 2): {mon_ops[:2]}", file=sys.stderr)
-    print(f"DEBUG: build_ops_from_sequence - dem_ops_by_name keys: {list(dem_ops_by_name.keys())}", file=sys.stderr)
-    print(f"DEBUG: build_ops_from_sequence - mon_ops_by_name keys: {list(mon_ops_by_name.keys())}", file=sys.stderr)
-    print(f"DEBUG: build_ops_from_sequence - dem_steps to match: {dem_steps}", file=sys.stderr)
-    print(f"DEBUG: build_ops_from_sequence - mon_steps to match: {mon_steps}", file=sys.stderr)
 
     # Verarbeite Demontage-Steps in Sequenz-Reihenfolge
     matched_dem = 0
     for step_name in dem_steps:
-        op = dem_ops_by_name.get(step_name)
-        if not op:
-            # Fallback: Versuche Prefix-Matching (BGT-PS-Fahrwerk -> BG-PS-Fahrwerk oder umgekehrt)
-            for key, candidate_op in dem_ops_by_name.items():
-                # Versuche verschiedene Matchings
-                if step_name in key or key in step_name:
-                    op = candidate_op
-                    break
-                # BGT-PS-X <-> BG-PS-X (entferne T)
-                step_normalized = step_name.replace("BGT-", "BG-")
-                key_normalized = key.replace("BGT-", "BG-")
-                if step_normalized == key_normalized:
-                    op = candidate_op
-                    break
+        # exact, sonst substring bzw. BGT-PS-Fahrwerk <-> BG-PS-Fahrwerk (normalized)
+        op, rule = dem_resolver.resolve(step_name)
+        count_rule(match_stats, rule)
 
         if op:
             dur = float(op.get("expectedDuration", 0.0))
@@ -370,18 +343,8 @@ def build_ops_from_sequence(
     # Verarbeite Remontage-Steps in Sequenz-Reihenfolge
     matched_mon = 0
     for step_name in mon_steps:
-        op = mon_ops_by_name.get(step_name)
-        if not op:
-            # Fallback: Versuche Prefix-Matching
-            for key, candidate_op in mon_ops_by_name.items():
-                if step_name in key or key in step_name:
-                    op = candidate_op
-                    break
-                step_normalized = step_name.replace("BGT-", "BG-")
-                key_normalized = key.replace("BGT-", "BG-")
-                if step_normalized == key_normalized:
-                    op = candidate_op
-                    break
+        op, rule = mon_resolver.resolve(step_name)
+        count_rule(match_stats, rule)
 
         if op:
             dur = float(op.get("expectedDuration", 0.0))
@@ -396,8 +359,7 @@ def build_ops_from_sequence(
                 matched_mon += 1
 
     if len(result) == 0 and (dem_steps or mon_steps):
-        print(f"ERROR: build_ops_from_sequence produced 0 ops! dem_keys={list(dem_ops_by_name.keys())}, mon_keys={list(mon_ops_by_name.keys())}, dem_steps={dem_steps}, mon_steps={mon_steps}", file=sys.stderr)
-    print(f"INFO: build_ops_from_sequence - matched {matched_dem}/{len(dem_steps)} dem + {matched_mon}/{len(mon_steps)} mon -> {len(result)} ops", file=sys.stderr)
+        print(f"ERROR: build_ops_from_sequence produced 0 ops! dem_keys={dem_resolver.keys()}, mon_keys={mon_resolver.keys()}, dem_steps={dem_steps}, mon_steps={mon_steps}", file=sys.stderr)
     return result
 
 
@@ -453,24 +415,147 @@ def _build_ops_legacy(
     return result
 
 
+def _fixed_assignment(tables: OpTables, op_ranges: Sequence[OpRange], fixed: Tuple[int, int]) -> Tuple[Any, Any, Any]:
+    """Vorab-Zuweisung der fixen Stationen: (step_avg, fixed_steps, fixed_machine) je Op-Art."""
+    # Durchschnittliche Dauer pro Baugruppentyp (step-ID) für Demontage und Montage
+    kinds = tables.kinds
+    steps = tables.steps
+    durations = tables.durations
+    step_durations: Tuple[Dict[int, List[float]], Dict[int, List[float]]] = ({}, {})
+    for begin, end in op_ranges:
+        for k in range(begin, end):
+            sid = steps[k]
+            dur = durations[k]
+            if tables.step_valid[sid] and dur > 0:
+                step_durations[kinds[k]].setdefault(sid, []).append(dur)
+
+    step_avg = tuple(
+        sorted(((sid, sum(durs) / len(durs)) for sid, durs in bucket.items()), key=lambda x: -x[1])
+        for bucket in step_durations
+    )
+    fixed_steps = tuple(
+        [sid for sid, _ in avg[:n_fixed]] + [0] * max(0, n_fixed - len(avg))
+        for avg, n_fixed in zip(step_avg, fixed)
+    )
+    fixed_machine = tuple({sid: i for i, sid in enumerate(assigned) if sid} for assigned in fixed_steps)
+    return step_avg, fixed_steps, fixed_machine
+
+
+@dataclass
+class CapacityModel:
+    """
+    Kapazitätsmodell, einmal pro Payload aufgebaut und von allen Bewertungen geteilt.
+
+    Hält Maschinenzahlen, flex/fix-Aufteilung, Setup-Parameter und die Vorab-Zuweisung
+    der fixen Stationen (Fixe Station 1 = Baugruppentyp mit längster Durchschnittsdauer,
+    Fixe Station 2 = 2. längste, usw.). Nichts davon hängt von der Auftragsreihenfolge ab,
+    die Vorab-Zuweisung aber von den Ops der gewählten Varianten – with_ranges() leitet
+    dafür ein Modell mit gleichen Maschinen und neu berechneter Zuweisung ab.
+    Indizes 0/1 der Tupel entsprechen KIND_DEM / KIND_MON.
+    """
+    totals: Tuple[int, int]
+    fixed: Tuple[int, int]
+    flex: Tuple[int, int]
+    setup_minutes: float
+    base_time: float
+    step_names: List[Any]
+    # Step-ID der fixen Station i (0 = keine Zuweisung)
+    fixed_steps: Tuple[List[int], List[int]]
+    # Step-ID -> Index der zugewiesenen fixen Station
+    fixed_machine: Tuple[Dict[int, int], Dict[int, int]]
+    # (Step-ID, Durchschnittsdauer) absteigend sortiert
+    step_avg: Tuple[List[Tuple[int, float]], List[Tuple[int, float]]]
+    # Identität der Vorab-Zuweisung (Kontext der Prefix-Checkpoints)
+    assignment_key: Tuple[Tuple[int, ...], Tuple[int, ...]] = ((), ())
+
+    @classmethod
+    def build(
+        cls,
+        orders: Sequence[GAOrder],
+        tables: OpTables,
+        op_ranges: Sequence[OpRange],
+        dem_machines: int,
+        mon_machines: int,
+        dem_flex_share: float = 0.0,
+        mon_flex_share: float = 0.0,
+        setup_minutes: float = 0.0,
+    ) -> "CapacityModel":
+        dem_total = max(1, dem_machines)
+        mon_total = max(1, mon_machines)
+        dem_flex_count = max(0, min(dem_total, int(round(dem_total * dem_flex_share)))) if dem_flex_share > 0 else 0
+        mon_flex_count = max(0, min(mon_total, int(round(mon_total * mon_flex_share)))) if mon_flex_share > 0 else 0
+        fixed = (dem_total - dem_flex_count, mon_total - mon_flex_count)
+        step_avg, fixed_steps, fixed_machine = _fixed_assignment(tables, op_ranges[:len(orders)], fixed)
+
+        model = cls(
+            totals=(dem_total, mon_total),
+            fixed=fixed,
+            flex=(dem_flex_count, mon_flex_count),
+            setup_minutes=setup_minutes,
+            base_time=min((o.ready_at for o in orders), default=0.0),
+            step_names=tables.step_names,
+            fixed_steps=fixed_steps,  # type: ignore[arg-type]
+            fixed_machine=fixed_machine,  # type: ignore[arg-type]
+            step_avg=step_avg,  # type: ignore[arg-type]
+            assignment_key=tuple(tuple(assigned) for assigned in fixed_steps),  # type: ignore[arg-type]
+        )
+        print(f"[SIM] Machine allocation: DEM total={dem_total} (fixed={fixed[0]}, flex={dem_flex_count}), MON total={mon_total} (fixed={fixed[1]}, flex={mon_flex_count})", file=sys.stderr)
+        print(f"[SIM] Fixed station pre-assignment based on avg duration:", file=sys.stderr)
+        print(f"  DEM fixed assignments ({fixed[0]} stations): {model.assignment_names(KIND_DEM)}", file=sys.stderr)
+        print(f"  MON fixed assignments ({fixed[1]} stations): {model.assignment_names(KIND_MON)}", file=sys.stderr)
+        return model
+
+    def with_ranges(self, tables: OpTables, op_ranges: Sequence[OpRange]) -> "CapacityModel":
+        """Gleiche Maschinen, Vorab-Zuweisung aus den Ops von `op_ranges` (z.B. gewählte Varianten)."""
+        step_avg, fixed_steps, fixed_machine = _fixed_assignment(tables, op_ranges, self.fixed)
+        return replace(
+            self,
+            fixed_steps=fixed_steps,
+            fixed_machine=fixed_machine,
+            step_avg=step_avg,
+            assignment_key=tuple(tuple(assigned) for assigned in fixed_steps),
+        )
+
+    def assignment_names(self, kind: int) -> List[Any]:
+        return [self.step_names[sid] if sid else None for sid in self.fixed_steps[kind]]
+
+    def to_debug(self) -> Dict[str, Any]:
+        """Gewählte Zuweisung für die Debug-Ausgabe (ohne erneute Simulation)."""
+        out: Dict[str, Any] = {"setupMinutes": self.setup_minutes}
+        for kind, key, prefix in ((KIND_DEM, "dem", "DEM"), (KIND_MON, "mon", "MON")):
+            out[key] = {
+                "machines": self.totals[kind],
+                "fixed": self.fixed[kind],
+                "flex": self.flex[kind],
+                "fixedAssignments": {
+                    f"{prefix}-{i + 1}": name for i, name in enumerate(self.assignment_names(kind))
+                },
+                "stepAvgDurations": [
+                    {"step": self.step_names[sid], "avgDuration": round(avg, 2)} for sid, avg in self.step_avg[kind]
+                ],
+            }
+        return out
+
+
 def simulate_with_capacity(
     sequence: Sequence[int],
     orders: Sequence[GAOrder],
-    ops_by_order: Dict[str, List[Dict[str, Any]]],
-    dem_machines: int,
-    mon_machines: int,
+    tables: OpTables,
+    op_ranges: Sequence[OpRange],
+    model: CapacityModel,
     with_timeline: bool = False,
-    dem_flex_share: float = 0.0,
-    mon_flex_share: float = 0.0,
-    setup_minutes: float = 0.0,
+    checkpoints: Optional[PrefixCheckpoints] = None,
 ) -> Tuple[float, float, float, Optional[List[Dict[str, Any]]]]:
     """
     Parallelmaschinen-Simulation mit Ressourcenpools Demontage/Montage.
+    - Ops kommen aus den kompilierten Tabellen (op_tables): op_ranges[i] ist der Bereich von orders[i].
     - Ops werden AUFTRAGSSEQUENTIELL abgearbeitet: nächste Op erst nach Abschluss der vorherigen.
-    - Fixed machines werden VORAB nach durchschnittlicher Bearbeitungszeit zugewiesen:
-      Fixe Station 1 = längste Baugruppe, Fixe Station 2 = 2. längste, usw.
+    - Maschinen, flex/fix-Aufteilung und Vorab-Zuweisung der fixen Stationen kommen aus dem
+      CapacityModel (Zuweisung passend zu den Ops in op_ranges, s. CapacityModel.with_ranges).
     - Flexible machines können alle Typen bearbeiten. Bei BG-Typ-Wechsel wird Setup-Zeit addiert.
     - Pro Op wird die beste verfügbare Maschine gewählt (Priorität: Reuse fixed > Flex > New fixed).
+    - Mit `checkpoints` (nur ohne Timeline) wird der Zustand alle N Positionen abgelegt und
+      ein gemeinsamer Präfix mit früheren Kandidaten nicht erneut simuliert.
     - Gibt (mean tardiness, variance tardiness, total setup time, timeline?) zurück.
     """
     tardiness_vals: List[float] = []
@@ -479,63 +564,26 @@ def simulate_with_capacity(
     # Gemeinsame Maschinenverfügbarkeit über alle Aufträge
     if not orders:
         return 0.0, 0.0, 0.0, (timeline if with_timeline else None)
-    base_time = min(o.ready_at for o in orders)
-    dem_total = max(1, dem_machines)
-    mon_total = max(1, mon_machines)
-    dem_flex_count = max(0, min(dem_total, int(round(dem_total * dem_flex_share)))) if dem_flex_share > 0 else 0
-    mon_flex_count = max(0, min(mon_total, int(round(mon_total * mon_flex_share)))) if mon_flex_share > 0 else 0
-    dem_fixed = dem_total - dem_flex_count
-    mon_fixed = mon_total - mon_flex_count
-    dem_available = [base_time] * dem_total
-    mon_available = [base_time] * mon_total
-
-    # NEU: Vorab-Zuweisung der fixen Stationen nach längster durchschnittlicher Bearbeitungszeit
-    # Sammle durchschnittliche Dauer pro Baugruppentyp (step) für Demontage und Montage
-    dem_step_durations: Dict[str, List[float]] = {}
-    mon_step_durations: Dict[str, List[float]] = {}
 
-    for order in orders:
-        ops = ops_by_order.get(order.order_id, [])
-        for op in ops:
-            station = (op.get("stationId") or "").lower()
-            step = op.get("meta", {}).get("step") if isinstance(op.get("meta"), dict) else None
-            dur = float(op.get("expectedDuration") or 0.0)
-            if step and dur > 0:
-                if "dem" in station:
-                    if step not in dem_step_durations:
-                        dem_step_durations[step] = []
-                    dem_step_durations[step].append(dur)
-                else:
-                    if step not in mon_step_durations:
-                        mon_step_durations[step] = []
-                    mon_step_durations[step].append(dur)
-
-    # Berechne durchschnittliche Dauer und sortiere absteigend
-    dem_step_avg = [(step, sum(durs) / len(durs)) for step, durs in dem_step_durations.items()]
-    mon_step_avg = [(step, sum(durs) / len(durs)) for step, durs in mon_step_durations.items()]
-    dem_step_avg.sort(key=lambda x: -x[1])  # Absteigend nach Dauer
-    mon_step_avg.sort(key=lambda x: -x[1])
-
-    # Weise fixen Stationen vorab die Baugruppentypen zu
-    # Station 0 = längste Baugruppe, Station 1 = 2. längste, usw.
-    dem_last_step: List[Optional[str]] = [None] * dem_total
-    mon_last_step: List[Optional[str]] = [None] * mon_total
-
-    for i, (step, avg_dur) in enumerate(dem_step_avg):
-        if i < dem_fixed:
-            dem_last_step[i] = step
-
-    for i, (step, avg_dur) in enumerate(mon_step_avg):
-        if i < mon_fixed:
-            mon_last_step[i] = step
-
-    # Debug-Ausgabe für die Vorab-Zuweisung (nur bei Timeline-Output, da sonst zu viel Output)
-    if with_timeline:
-        print(f"[SIM] Fixed station pre-assignment based on avg duration:", file=sys.stderr)
-        print(f"  DEM fixed assignments ({dem_fixed} stations): {dem_last_step[:dem_fixed]}", file=sys.stderr)
-        print(f"  DEM step avg durations: {dem_step_avg}", file=sys.stderr)
-        print(f"  MON fixed assignments ({mon_fixed} stations): {mon_last_step[:mon_fixed]}", file=sys.stderr)
-        print(f"  MON step avg durations: {mon_step_avg}", file=sys.stderr)
+    kinds = tables.kinds
+    steps = tables.steps
+    durations = tables.durations
+    step_names = tables.step_names
+    setup_minutes = model.setup_minutes
+
+    # Pools je Op-Art (Index = KIND_DEM / KIND_MON), Demontage und Montage laufen identisch.
+    # Fixe Stationen bearbeiten nur ihren vorab zugewiesenen Typ, daher reicht die Zuordnung
+    # Step-ID -> Station; last_step wird nur für den Setup-Check der Flex-Maschinen gebraucht.
+    pool_total = model.totals
+    pool_fixed = model.fixed
+    pool_flex = model.flex
+    pool_fixed_machine = model.fixed_machine
+    pool_available = ([model.base_time] * pool_total[0], [model.base_time] * pool_total[1])
+    pool_last_step = ([0] * pool_total[0], [0] * pool_total[1])
+    pool_prefix = ("DEM", "MON")
+    pool_key = ("dem", "mon")
+    usage_fixed_key = ("dem_fixed", "mon_fixed")
+    usage_flex_key = ("dem_flex", "mon_flex")
 
     # Statistik für abgelehnte Ops
     rejection_stats = {"demDurationZero": 0, "monDurationZero": 0, "demNoMachine": 0, "monNoMachine": 0}
@@ -543,127 +591,87 @@ def simulate_with_capacity(
     # Machine allocation stats
     machine_usage_stats = {"dem_fixed": 0, "dem_flex": 0, "mon_fixed": 0, "mon_flex": 0}
 
-    # Log machine allocation
-    print(f"[SIM] Machine allocation: DEM total={dem_total} (fixed={dem_fixed}, flex={dem_flex_count}), MON total={mon_total} (fixed={mon_fixed}, flex={mon_flex_count})", file=sys.stderr)
-
-    for idx in sequence:
+    # Delta-Re-Simulation: beim tiefsten passenden Prefix-Checkpoint aufsetzen
+    # Token pro Position = (Auftrag, Beginn des Op-Bereichs) – identifiziert auch die Variante
+    start_pos = 0
+    interval = 0
+    if checkpoints is not None and not with_timeline:
+        interval = checkpoints.interval
+        tokens = [(idx, op_ranges[idx][0]) for idx in sequence]
+        start_pos, path, node = checkpoints.resume(tokens, model.assignment_key)
+        if start_pos:
+            dem_av, mon_av, dem_ls, mon_ls, total_setup_time, usage, rejections, _ = path[-1]
+            pool_available = (list(dem_av), list(mon_av))
+            pool_last_step = (list(dem_ls), list(mon_ls))
+            machine_usage_stats = dict(zip(machine_usage_stats, usage))
+            rejection_stats = dict(zip(rejection_stats, rejections))
+            tardiness_vals = [t for state in path for t in state[7]]
+
+    for pos in range(start_pos, len(sequence)):
+        idx = sequence[pos]
         order = orders[idx]
-        ops = ops_by_order.get(order.order_id, [])
-        op_end_times: List[float] = []
+        begin, end_k = op_ranges[idx]
+        completion = order.ready_at
         # WICHTIG: Auftragsuhr zwingt sequentielle Abarbeitung innerhalb des Auftrags
         order_clock = order.ready_at
-        for op in ops:
-            station = (op.get("stationId") or "").lower()
-            step = op.get("meta", {}).get("step") if isinstance(op.get("meta"), dict) else None
-            dur = float(op.get("expectedDuration") or 0.0)
+        for k in range(begin, end_k):
+            kind = kinds[k]
+            sid = steps[k]
+            dur = durations[k]
             if dur <= 0:
                 print(f"ERROR: Op for order {order.order_id} has duration <= 0: {dur} - SKIPPING OP (no fallback!)", file=sys.stderr)
-                rejection_stats["demDurationZero" if "dem" in station else "monDurationZero"] += 1
+                rejection_stats[("demDurationZero", "monDurationZero")[kind]] += 1
+                continue
+            available = pool_available[kind]
+            last_step = pool_last_step[kind]
+            # Maschinenwahl-Strategie (Fixed machines sind VORAB nach Dauer zugewiesen!):
+            # 1. Nutze die fixe Station, die diesem Baugruppentyp (step) zugewiesen ist
+            # 2. Sonst nutze flexible machine (kann umgerüstet werden mit setupMinutes)
+            # 3. ABLEHNUNG wenn keine passende Maschine verfügbar
+            setup_applied = False
+
+            # 1. Fixed: Nutze die fixe Station, die diesem step zugewiesen ist
+            chosen_idx = pool_fixed_machine[kind].get(sid)
+            if chosen_idx is not None:
+                machine_type = "fixed"
+                machine_usage_stats[usage_fixed_key[kind]] += 1
+
+            # 2. Flex: flexible machine (kann umgerüstet werden)
+            elif pool_flex[kind] > 0:
+                flex_earliest_time = float('inf')
+                for i in range(pool_fixed[kind], pool_total[kind]):
+                    if available[i] < flex_earliest_time:
+                        flex_earliest_time = available[i]
+                        chosen_idx = i
+                machine_type = "flex"
+                machine_usage_stats[usage_flex_key[kind]] += 1
+                # Setup nur auf flex machines bei Typ-Wechsel
+                if setup_minutes > 0 and last_step[chosen_idx] != 0 and last_step[chosen_idx] != sid:  # type: ignore[index]
+                    setup_applied = True
+
+            # 3. Fallback: FEHLER - keine passende Maschine verfügbar
+            if chosen_idx is None:
+                print(f"WARNING: Op {order.order_id} step {step_names[sid]} ABGELEHNT - keine fixe Station für diesen BGT zugewiesen und keine flex verfügbar!", file=sys.stderr)
+                rejection_stats[("demNoMachine", "monNoMachine")[kind]] += 1
+                # Skip diese Op
                 continue
-            if "dem" in station:
-                # Maschinenwahl-Strategie (Fixed machines sind VORAB nach Dauer zugewiesen!):
-                # 1. Nutze die fixe Station, die diesem Baugruppentyp (step) zugewiesen ist
-                # 2. Sonst nutze flexible machine (kann umgerüstet werden mit setupMinutes)
-                # 3. ABLEHNUNG wenn keine passende Maschine verfügbar
-                chosen_idx = None
-                setup_applied = False
-                machine_type = "unknown"
-
-                # 1. Fixed: Nutze die fixe Station, die diesem step zugewiesen ist
-                if dem_fixed > 0 and step:
-                    for i in range(dem_fixed):
-                        if dem_last_step[i] == step:
-                            chosen_idx = i
-                            machine_type = "fixed"
-                            machine_usage_stats["dem_fixed"] += 1
-                            break
-
-                # 2. Flex: flexible machine (kann umgerüstet werden)
-                if chosen_idx is None and dem_flex_count > 0:
-                    flex_earliest_time = float('inf')
-                    flex_earliest_idx = None
-                    for i in range(dem_fixed, dem_total):
-                        if dem_available[i] < flex_earliest_time:
-                            flex_earliest_time = dem_available[i]
-                            flex_earliest_idx = i
-                    if flex_earliest_idx is not None:
-                        chosen_idx = flex_earliest_idx
-                        machine_type = "flex"
-                        machine_usage_stats["dem_flex"] += 1
-                        # Setup nur auf flex machines bei Typ-Wechsel
-                        if setup_minutes > 0 and dem_last_step[chosen_idx] is not None and dem_last_step[chosen_idx] != step:
-                            setup_applied = True
-
-                # 3. Fallback: FEHLER - keine passende Maschine verfügbar
-                if chosen_idx is None:
-                    print(f"WARNING: Op {order.order_id} step {step} ABGELEHNT - keine fixe Station für diesen BGT zugewiesen und keine flex verfügbar!", file=sys.stderr)
-                    rejection_stats["demNoMachine"] += 1
-                    # Skip diese Op
-                    continue
-
-                # Startzeit: max(Auftrag bereit, Maschine verfügbar) + ggf. Setup
-                start = max(order_clock, dem_available[chosen_idx])
-                if setup_applied:
-                    start += setup_minutes
-                    total_setup_time += setup_minutes  # Count setup time for fitness
-                end = start + dur
-                dem_available[chosen_idx] = end
-                dem_last_step[chosen_idx] = step
-                machine = f"DEM-{chosen_idx+1}"
-                order_clock = end  # Sequenziell weiter
-            else:
-                # Montage: gleiche Logik wie Demontage (Fixed machines sind VORAB nach Dauer zugewiesen!)
-                chosen_idx = None
-                setup_applied = False
-                machine_type = "unknown"
-
-                # 1. Fixed: Nutze die fixe Station, die diesem step zugewiesen ist
-                if mon_fixed > 0 and step:
-                    for i in range(mon_fixed):
-                        if mon_last_step[i] == step:
-                            chosen_idx = i
-                            machine_type = "fixed"
-                            machine_usage_stats["mon_fixed"] += 1
-                            break
-
-                # 2. Flex: flexible machine (kann umgerüstet werden)
-                if chosen_idx is None and mon_flex_count > 0:
-                    flex_earliest_time = float('inf')
-                    flex_earliest_idx = None
-                    for i in range(mon_fixed, mon_total):
-                        if mon_available[i] < flex_earliest_time:
-                            flex_earliest_time = mon_available[i]
-                            flex_earliest_idx = i
-                    if flex_earliest_idx is not None:
-                        chosen_idx = flex_earliest_idx
-                        machine_type = "flex"
-                        machine_usage_stats["mon_flex"] += 1
-                        # Setup nur auf flex machines bei Typ-Wechsel
-                        if setup_minutes > 0 and mon_last_step[chosen_idx] is not None and mon_last_step[chosen_idx] != step:
-                            setup_applied = True
-
-                # 3. Fallback: FEHLER - keine passende Maschine verfügbar
-                if chosen_idx is None:
-                    print(f"WARNING: Op {order.order_id} step {step} ABGELEHNT - keine fixe Station für diesen BGT zugewiesen und keine flex verfügbar!", file=sys.stderr)
-                    rejection_stats["monNoMachine"] += 1
-                    # Skip diese Op
-                    continue
 
-                start = max(order_clock, mon_available[chosen_idx])
-                if setup_applied:
-                    start += setup_minutes
-                    total_setup_time += setup_minutes  # Count setup time for fitness
-                end = start + dur
-                mon_available[chosen_idx] = end
-                mon_last_step[chosen_idx] = step
-                machine = f"MON-{chosen_idx+1}"
-                order_clock = end
-            op_end_times.append(end)
+            # Startzeit: max(Auftrag bereit, Maschine verfügbar) + ggf. Setup
+            start = max(order_clock, available[chosen_idx])
+            if setup_applied:
+                start += setup_minutes
+                total_setup_time += setup_minutes  # Count setup time for fitness
+            end = start + dur
+            available[chosen_idx] = end
+            last_step[chosen_idx] = sid
+            order_clock = end  # Sequenziell weiter
+            completion = end
             if with_timeline:
+                step = step_names[sid]
                 timeline.append({
                     "orderId": order.order_id,
-                    "station": machine,
-                    "stationType": "dem" if "dem" in station else "mon",
+                    "station": f"{pool_prefix[kind]}-{chosen_idx+1}",
+                    "stationType": pool_key[kind],
                     "machineType": machine_type,  # fixed, flex
                     "bgType": step if step else "unknown",  # Baugruppentyp
                     "step": step,
@@ -672,10 +680,23 @@ def simulate_with_capacity(
                     "duration": dur,
                     "setupApplied": setup_applied,
                 })
-        completion = max(op_end_times) if op_end_times else order.ready_at
         tardiness = max(0.0, completion - order.due_date)
         tardiness_vals.append(tardiness)
 
+        done = pos + 1
+        if interval and done % interval == 0 and done < len(sequence):
+            node = checkpoints.save(  # type: ignore[union-attr]
+                node,
+                tuple(tokens[done - interval:done]),
+                (
+                    tuple(pool_available[0]), tuple(pool_available[1]),
+                    tuple(pool_last_step[0]), tuple(pool_last_step[1]),
+                    total_setup_time,
+                    tuple(machine_usage_stats.values()), tuple(rejection_stats.values()),
+                    tuple(tardiness_vals[done - interval:done]),
+                ),
+            )
+
     # Log machine usage statistics
     total_ops = sum(machine_usage_stats.values())
     if total_ops > 0:
@@ -764,26 +785,27 @@ def simulate_multistation(
 # ---------------------------------------------------------------------------
 
 
+def build_tardiness_sampler(orders: Sequence[GAOrder], replications: int, seed: int) -> TardinessSampler:
+    """Stichprobe Replikationen × Aufträge einmal ziehen (Common Random Numbers für alle Kandidaten)."""
+    return TardinessSampler(
+        [order.tfn for order in orders],
+        [order.ready_at for order in orders],
+        [order.due_date for order in orders],
+        replications,
+        seed,
+    )
+
+
 def simulate_sequence(
     sequence: Sequence[int],
     orders: Sequence[GAOrder],
     replications: int,
     seed: int,
+    sampler: Optional[TardinessSampler] = None,
 ) -> Tuple[float, float]:
-    totals: List[float] = []
-    for r in range(replications):
-        rng = random.Random(seed + r * 7919)
-        t = 0.0
-        total_tardiness = 0.0
-        for idx in sequence:
-            order = orders[idx]
-            t = max(t, order.ready_at)
-            t += random_triangular(rng, order.tfn)
-            total_tardiness += max(0.0, t - order.due_date)
-        totals.append(total_tardiness)
-    mean_val = statistics.fmean(totals)
-    var_val = statistics.pvariance(totals) if len(totals) > 1 else 0.0
-    return mean_val, var_val
+    if sampler is None:
+        sampler = build_tardiness_sampler(orders, replications, seed)
+    return sampler.evaluate(sequence)
 
 
 # ---------------------------------------------------------------------------
@@ -797,6 +819,61 @@ def simulate_sequence(
 IndividualWithVariants = List[Tuple[int, int]]  # [(order_idx, variant_idx), ...]
 
 
+@dataclass
+class GAStopCriteria:
+    """
+    Anytime-Abbruch für die GAs (config.ga.timeBudgetMs / config.ga.stallGenerations).
+
+    Die Uhr startet beim Anlegen. Nach Ablauf des Budgets bzw. nach
+    `stall_generations` Generationen ohne Verbesserung bricht der GA sauber ab
+    und liefert den bisher besten Kandidaten (Incumbent).
+    """
+    time_budget_ms: Optional[float] = None
+    stall_generations: Optional[int] = None
+    started: float = field(default_factory=time.monotonic)
+    ended: Optional[float] = None
+    generations_run: int = 0
+    stop_reason: str = "completed"
+    _best: float = float("inf")
+    _stall: int = 0
+
+    def elapsed_ms(self) -> float:
+        end = self.ended if self.ended is not None else time.monotonic()
+        return (end - self.started) * 1000.0
+
+    def finish(self) -> None:
+        self.ended = time.monotonic()
+
+    def deadline_reached(self) -> bool:
+        return self.time_budget_ms is not None and self.elapsed_ms() >= self.time_budget_ms
+
+    def after_generation(self, best_val: float) -> bool:
+        """Nach jeder Generation aufrufen; True = GA soll abbrechen."""
+        self.generations_run += 1
+        if best_val < self._best - 1e-9:
+            self._best = best_val
+            self._stall = 0
+        else:
+            self._stall += 1
+        if self.deadline_reached():
+            self.stop_reason = "timeBudget"
+            return True
+        if self.stall_generations is not None and self._stall >= self.stall_generations:
+            self.stop_reason = "stall"
+            return True
+        return False
+
+    def summary(self, generations_planned: int) -> Dict[str, Any]:
+        return {
+            "generationsRun": self.generations_run,
+            "generationsPlanned": generations_planned,
+            "stopReason": self.stop_reason,
+            "elapsedMs": round(self.elapsed_ms(), 1),
+            "timeBudgetMs": self.time_budget_ms,
+            "stallGenerations": self.stall_generations,
+        }
+
+
 def crossover_with_variants(
     parent_a: IndividualWithVariants,
     parent_b: IndividualWithVariants,
@@ -860,6 +937,69 @@ def mutate_with_variants(
                 individual[idx] = (order_idx, new_variant)
 
 
+@dataclass
+class VariantEvalContext:
+    """
+    Kompiliertes Auftragsmodell für die Bewertung eines Individuums (Kapazitätspfad).
+    Wird bei paralleler Bewertung einmal pro Worker-Prozess übertragen, nicht pro Task.
+
+    Die Vorab-Zuweisung der fixen Stationen hängt von den Ops der gewählten Varianten ab;
+    model_for() leitet sie pro Varianten-Wahl aus `model` ab und cached sie (LRU).
+    """
+    ga_orders: Sequence[GAOrder]
+    tables: OpTables
+    base_ranges: Sequence[OpRange]
+    variant_ranges: Sequence[Sequence[OpRange]]
+    model: CapacityModel
+    # Prefix-Checkpoints für Delta-Re-Simulation (je Prozess eigener Trie)
+    checkpoints: Optional[PrefixCheckpoints] = None
+    # Varianten-Wahl -> CapacityModel mit passender Vorab-Zuweisung
+    models: FitnessCache[CapacityModel] = field(default_factory=lambda: FitnessCache(2048))
+
+    def choice_for(self, individual: IndividualWithVariants) -> List[int]:
+        """Varianten-Wahl pro Auftrag (Index = Auftrag, begrenzt auf die vorhandenen Varianten)."""
+        choice = [0] * len(self.base_ranges)
+        for order_idx, variant_idx in individual:
+            choice[order_idx] = min(variant_idx, len(self.variant_ranges[order_idx]) - 1)
+        return choice
+
+    def ranges_for(self, individual: IndividualWithVariants) -> List[OpRange]:
+        chosen = list(self.base_ranges)
+        for order_idx, variant_idx in individual:
+            ranges = self.variant_ranges[order_idx]
+            # Sichere Varianten-Wahl
+            chosen[order_idx] = ranges[min(variant_idx, len(ranges) - 1)]
+        return chosen
+
+    def model_for(self, individual: IndividualWithVariants, ranges: Sequence[OpRange]) -> CapacityModel:
+        key = genome_key((), self.choice_for(individual))
+        model = self.models.get(key)
+        if model is None:
+            model = self.model.with_ranges(self.tables, ranges)
+            self.models.put(key, model)
+        return model
+
+    def evaluate(
+        self, individual: IndividualWithVariants, with_timeline: bool = False
+    ) -> Tuple[float, float, float, Optional[List[Dict[str, Any]]]]:
+        seq = [gene[0] for gene in individual]
+        ranges = self.ranges_for(individual)
+        return simulate_with_capacity(
+            seq,
+            self.ga_orders,
+            self.tables,
+            ranges,
+            self.model_for(individual, ranges),
+            with_timeline=with_timeline,
+            checkpoints=self.checkpoints,
+        )
+
+    def fitness(self, individual: IndividualWithVariants) -> Tuple[float, float, float]:
+        """(mu, var, setup) ohne Timeline – Bewertungsfunktion für ParallelEvaluator."""
+        mu, var, setup, _ = self.evaluate(individual)
+        return mu, var, setup
+
+
 def optimize_with_variants_ga(
     orders: Sequence[OrderData],
     ga_orders: Sequence[GAOrder],
@@ -874,9 +1014,20 @@ def optimize_with_variants_ga(
     seed: int,
     eval_fn_with_variants: Any,
     setup_weight: float = 0.0,
+    stop: Optional[GAStopCriteria] = None,
+    progress: Optional[ProgressReporter] = None,
+    batch_eval_fn: Optional[Any] = None,
+    cache_size: int = 20000,
 ) -> Tuple[IndividualWithVariants, List[float], Tuple[float, float, float], Optional[List[Dict[str, Any]]], Dict[str, int]]:
     """
     GA der sowohl Auftragsreihenfolge ALS AUCH Sequenz-Variante pro Auftrag optimiert.
+    Mit `stop` (Zeitbudget/Stagnation) endet der Lauf ggf. vor `generations`,
+    `progress` meldet pro Generation den aktuellen Incumbent als NDJSON.
+    `batch_eval_fn` (z.B. ParallelEvaluator über VariantEvalContext.fitness) bewertet alle neuen Individuen einer
+    Generation auf einmal und liefert (mu, var, setup) in Eingabereihenfolge.
+    Der Fitness-Cache hält höchstens `cache_size` Skalar-Tripel (LRU); die Timeline
+    des besten Individuums wird am Ende einmal über
+    `eval_fn_with_variants(best, with_timeline=True)` erzeugt.
 
     Returns:
         best_individual: [(order_idx, variant_idx), ...]
@@ -887,6 +1038,7 @@ def optimize_with_variants_ga(
     """
     rng = random.Random(seed)
     n = len(orders)
+    stop = stop or GAStopCriteria()
 
     # Initiale Population
     pop: List[IndividualWithVariants] = []
@@ -915,8 +1067,10 @@ def optimize_with_variants_ga(
     best_timeline: Optional[List[Dict[str, Any]]] = None
     history: List[float] = []
 
-    # Cache mit Tupel-Key (order_seq, variant_seq)
-    cache: Dict[Tuple[Tuple[int, ...], Tuple[int, ...]], Tuple[float, float, float, Optional[List[Dict[str, Any]]]]] = {}
+    # LRU-Cache Genom-Hash -> (mu, var, setup); mind. 2 Generationen groß, damit die
+    # Batch-Ergebnisse einer Generation nicht vor dem Auslesen verdrängt werden
+    cache = FitnessCache(max(cache_size, 2 * population))
+    evaluations = 0
 
     total_variants = sum(variant_counts)
     avg_variants = total_variants / n if n > 0 else 0
@@ -926,37 +1080,48 @@ def optimize_with_variants_ga(
         fitness_vals: List[float] = []
         mu_var_setup_tuples: List[Tuple[float, float, float]] = []
 
+        # Batch-Bewertung: alle noch nicht gecachten Individuen der Generation auf einmal
+        if batch_eval_fn is not None and not (g > 0 and stop.deadline_reached()):
+            fresh: Dict[bytes, IndividualWithVariants] = {}
+            for individual in pop:
+                key = genome_key([gene[0] for gene in individual], [gene[1] for gene in individual])
+                if key not in cache and key not in fresh:
+                    fresh[key] = individual
+            if fresh:
+                for key, (mu, var, setup) in zip(fresh, batch_eval_fn(list(fresh.values()))):
+                    cache.put(key, (mu, var, setup))
+                evaluations += len(fresh)
+
         for individual in pop:
-            # Cache-Key: (Auftragsreihenfolge, Varianten-Wahl)
-            order_seq = tuple(gene[0] for gene in individual)
-            variant_seq = tuple(gene[1] for gene in individual)
-            key = (order_seq, variant_seq)
+            # Cache-Key: Hash über (Auftragsreihenfolge, Varianten-Wahl)
+            key = genome_key([gene[0] for gene in individual], [gene[1] for gene in individual])
+            cached = cache.get(key)
+
+            # Budget aufgebraucht: Generation abbrechen, Incumbent aus Vorgenerationen bleibt gültig
+            if g > 0 and cached is None and stop.deadline_reached():
+                break
 
-            if key in cache:
-                mu, var, setup, timeline = cache[key]
+            if cached is not None:
+                mu, var, setup = cached
             else:
-                eval_result = eval_fn_with_variants(individual)
-                if len(eval_result) == 4:
-                    mu, var, setup, timeline = eval_result
-                else:
-                    mu, var, setup = eval_result
-                    timeline = None
-                cache[key] = (mu, var, setup, timeline)
+                mu, var, setup = eval_fn_with_variants(individual)[:3]
+                evaluations += 1
+                cache.put(key, (mu, var, setup))
 
             obj = mu + lam * var + setup_weight * setup
             fitness_vals.append(obj)
             mu_var_setup_tuples.append((mu, var, setup))
 
-        gen_best_idx = min(range(len(pop)), key=lambda i: fitness_vals[i])
+        if not fitness_vals:
+            stop.stop_reason = "timeBudget"
+            break
+        gen_best_idx = min(range(len(fitness_vals)), key=lambda i: fitness_vals[i])
         gen_best_val = fitness_vals[gen_best_idx]
 
         if gen_best_val < best_val:
             best_val = gen_best_val
             best_individual = [gene for gene in pop[gen_best_idx]]
             best_components = mu_var_setup_tuples[gen_best_idx]
-            order_seq = tuple(gene[0] for gene in best_individual)
-            variant_seq = tuple(gene[1] for gene in best_individual)
-            best_timeline = cache.get((order_seq, variant_seq), (0, 0, 0, None))[3]
 
         history.append(best_val)
 
@@ -968,6 +1133,19 @@ def optimize_with_variants_ga(
             improvement = "↓" if gen_best_val < (history[g-1] if g > 0 else float('inf')) else "→"
             print(f"[GA-V] Gen {g}: best={gen_best_val:.2f} {improvement}", file=sys.stderr)
 
+        if progress is not None:
+            progress.emit(
+                g,
+                evaluations,
+                {"objective": best_val, "meanTardiness": best_components[0], "varTardiness": best_components[1], "setup": best_components[2]},
+                [orders[gene[0]].order_id for gene in best_individual],
+                variantChoices=[gene[1] for gene in best_individual],
+            )
+
+        if stop.after_generation(best_val):
+            print(f"[GA-V] Stop after gen {g} ({stop.stop_reason}, {stop.elapsed_ms():.0f}ms): best={best_val:.2f}", file=sys.stderr)
+            break
+
         # Selektion: Elite
         elite_idx = sorted(range(len(pop)), key=lambda i: fitness_vals[i])[:max(1, elite)]
         next_pop = [[gene for gene in pop[i]] for i in elite_idx]
@@ -981,6 +1159,14 @@ def optimize_with_variants_ga(
 
         pop = next_pop
 
+    stop.finish()
+    print(f"[GA-V] Fitness cache: {cache.stats()}", file=sys.stderr)
+
+    # Timeline nur einmal für das beste Individuum erzeugen
+    if history:
+        final_eval = eval_fn_with_variants(best_individual, with_timeline=True)
+        best_timeline = final_eval[3] if len(final_eval) == 4 else None
+
     # Erstelle chosen_variants Dict
     chosen_variants: Dict[str, int] = {}
     for order_idx, variant_idx in best_individual:
@@ -1027,9 +1213,13 @@ def optimize_sequence_ga(
     seed: int,
     eval_fn: Optional[Any] = None,
     setup_weight: float = 0.0,
+    stop: Optional[GAStopCriteria] = None,
+    progress: Optional[ProgressReporter] = None,
+    cache_size: int = 20000,
 ) -> Tuple[List[int], List[float], Tuple[float, float, float], Optional[List[Dict[str, Any]]]]:
     rng = random.Random(seed)
     n = len(orders)
+    stop = stop or GAStopCriteria()
     idxs = list(range(n))
     pop: List[List[int]] = []
     pop.append(idxs[:])
@@ -1045,40 +1235,54 @@ def optimize_sequence_ga(
     best_components = (0.0, 0.0, 0.0)
     best_timeline: Optional[List[Dict[str, Any]]] = None
     history: List[float] = []
-    cache: Dict[Tuple[int, ...], Tuple[float, float, float, Optional[List[Dict[str, Any]]]]] = {}
+    # LRU-Cache Genom-Hash -> (mu, var, setup), Timeline des Besten wird am Ende neu erzeugt
+    cache = FitnessCache(max(cache_size, 2 * population))
+    evaluations = 0
+    # Ohne eval_fn: Monte-Carlo mit fester Stichprobe für den ganzen Lauf (faire Vergleiche)
+    sampler = build_tardiness_sampler(orders, replications, seed * 13) if not eval_fn else None
 
     for g in range(generations):
         fitness_vals: List[float] = []
         mu_var_setup_tuples: List[Tuple[float, float, float]] = []
+        if sampler is not None and not (g > 0 and stop.deadline_reached()):
+            # Alle neuen Individuen der Generation gebündelt auswerten
+            fresh: Dict[bytes, List[int]] = {}
+            for seq in pop:
+                key = genome_key(seq)
+                if key not in cache and key not in fresh:
+                    fresh[key] = seq
+            for key, (mu, var) in zip(fresh, sampler.evaluate_many(list(fresh.values()))):
+                cache.put(key, (mu, var, 0.0))
+            evaluations += len(fresh)
         for seq in pop:
-            key = tuple(seq)
-            if key in cache:
-                mu, var, setup, timeline = cache[key]
+            if g > 0 and stop.deadline_reached():
+                break
+            key = genome_key(seq)
+            cached = cache.get(key)
+            if cached is not None:
+                mu, var, setup = cached
             else:
                 if eval_fn:
-                    eval_result = eval_fn(seq)
-                    if len(eval_result) == 4:
-                        mu, var, setup, timeline = eval_result
-                    else:
-                        mu, var, setup = eval_result  # type: ignore
-                        timeline = None
+                    mu, var, setup = eval_fn(seq)[:3]
                 else:
-                    mu, var = simulate_sequence(seq, orders, replications, seed * 13 + g * 17)
+                    mu, var = simulate_sequence(seq, orders, replications, seed * 13, sampler=sampler)
                     setup = 0.0  # simulate_sequence doesn't return setup
-                    timeline = None
-                cache[key] = (mu, var, setup, timeline)
+                evaluations += 1
+                cache.put(key, (mu, var, setup))
             # Fitness = mean tardiness + λ1 * variance + λ2 * setup_time
             obj = mu + lam * var + setup_weight * setup
             fitness_vals.append(obj)
             mu_var_setup_tuples.append((mu, var, setup))
 
-        gen_best_idx = min(range(len(pop)), key=lambda i: fitness_vals[i])
+        if not fitness_vals:
+            stop.stop_reason = "timeBudget"
+            break
+        gen_best_idx = min(range(len(fitness_vals)), key=lambda i: fitness_vals[i])
         gen_best_val = fitness_vals[gen_best_idx]
         if gen_best_val < best_val:
             best_val = gen_best_val
             best_seq = pop[gen_best_idx][:]
             best_components = mu_var_setup_tuples[gen_best_idx]
-            best_timeline = cache[tuple(best_seq)][3]
         history.append(best_val)
 
         # GA Progress Logging
@@ -1090,6 +1294,18 @@ def optimize_sequence_ga(
             improvement = "↓" if gen_best_val < history[g-1] else "→"
             print(f"[GA] Gen {g}: best={gen_best_val:.2f} {improvement} (mu={mu_var_setup_tuples[gen_best_idx][0]:.2f}, var={mu_var_setup_tuples[gen_best_idx][1]:.2f}, setup={mu_var_setup_tuples[gen_best_idx][2]:.2f})", file=sys.stderr)
 
+        if progress is not None:
+            progress.emit(
+                g,
+                evaluations,
+                {"objective": best_val, "meanTardiness": best_components[0], "varTardiness": best_components[1], "setup": best_components[2]},
+                [orders[idx].order_id for idx in best_seq],
+            )
+
+        if stop.after_generation(best_val):
+            print(f"[GA] Stop after gen {g} ({stop.stop_reason}, {stop.elapsed_ms():.0f}ms): best={best_val:.2f}", file=sys.stderr)
+            break
+
         elite_idx = sorted(range(len(pop)), key=lambda i: fitness_vals[i])[: max(1, elite)]
         next_pop = [pop[i][:] for i in elite_idx]
 
@@ -1100,6 +1316,13 @@ def optimize_sequence_ga(
             next_pop.append(child)
         pop = next_pop
 
+    stop.finish()
+    print(f"[GA] Fitness cache: {cache.stats()}", file=sys.stderr)
+
+    # Timeline nur einmal für die beste Sequenz erzeugen
+    if eval_fn and history:
+        final_eval = eval_fn(best_seq)
+        best_timeline = final_eval[3] if len(final_eval) == 4 else None
     return best_seq, history, best_components, best_timeline
 
 
@@ -1242,6 +1465,8 @@ def build_batches(
     q_max = max(q_min, q_max)
 
     op_signatures: Dict[str, set[str]] = {}
+    op_bits: Dict[str, int] = {}
+    interner = StepInterner()
     for order in orders:
         sig = []
         for op in order.combined_ops:
@@ -1250,6 +1475,7 @@ def build_batches(
             typ = str(op.get("type") or op.get("operationType") or "op")
             sig.append(f"{station}|{tool}|{typ}")
         op_signatures[order.order_id] = set(sig) if sig else {order.order_id}
+        op_bits[order.order_id] = interner.mask(op_signatures[order.order_id])
 
     batches: List[Dict[str, Any]] = []
     current_batch: List[int] = []
@@ -1263,9 +1489,9 @@ def build_batches(
         prior_vals = [priorities_map.get(oid, 0.0) for oid in order_ids]
         mean_priority = sum(prior_vals) / len(prior_vals) if prior_vals else 0.0
 
-        sets = [op_signatures[oid] for oid in order_ids]
-        matrix = [[1.0 if i == j else jaccard(sets[i], sets[j]) for j in range(len(sets))] for i in range(len(sets))]
-        pairwise = [matrix[i][j] for i in range(len(sets)) for j in range(i + 1, len(sets))]
+        n = len(order_ids)
+        matrix = jaccard_matrix_bits([op_bits[oid] for oid in order_ids], empty=1.0)
+        pairwise = [matrix[i][j] for i in range(n) for j in range(i + 1, n)]
         mean_similarity = sum(pairwise) / len(pairwise) if pairwise else 1.0
 
         batches.append(
@@ -1295,15 +1521,6 @@ def build_batches(
     return batches
 
 
-def jaccard(a: set[str], b: set[str]) -> float:
-    if not a and not b:
-        return 1.0
-    union = a | b
-    if not union:
-        return 1.0
-    return len(a & b) / len(union)
-
-
 def validate_plan_with_pn(orders: Sequence[OrderData]) -> bool:
     """Erzeugt einfaches Petri-Netz (Stationen als Plätze, 1 Token pro Station)."""
     places: Dict[str, Place] = {}
@@ -1334,6 +1551,7 @@ def build_orders_from_payload(
     now: float,
     horizon_minutes: float,
     variation: float = 0.3,
+    match_stats: Optional[Dict[str, int]] = None,
 ) -> List[OrderData]:
     orders: List[OrderData] = []
     default_due = now + max(horizon_minutes, 60.0)
@@ -1399,9 +1617,12 @@ def build_orders_from_payload(
         process_sequences = raw.get("processSequences")
         if process_sequences:
             all_variants = parse_all_sequence_variants(process_sequences)
+            # Step-Resolver einmal pro Auftrag, nicht pro Variante
+            dem_resolver = StepResolver(clone_operations(dem_ops))
+            mon_resolver = StepResolver(clone_operations(mon_ops))
             for seq_id, steps in all_variants:
                 # Für jede Variante: Ops basierend auf dieser Sequenz erstellen
-                variant_ops = build_ops_from_sequence(steps, clone_operations(dem_ops), clone_operations(mon_ops))
+                variant_ops = build_ops_from_sequence(steps, dem_resolver, mon_resolver, match_stats=match_stats)
                 if variant_ops:
                     variant_duration = sum(float(op.get("expectedDuration") or 0.0) for op in variant_ops)
                     variant_tfn = guess_tfn(variant_duration, variation)
@@ -1820,6 +2041,7 @@ def prepare_debug_entries(
     optimized_plan: Sequence[Dict[str, float]],
     ops_timeline: Optional[Sequence[Dict[str, Any]]],
     baseline_timeline: Optional[Sequence[Dict[str, Any]]] = None,
+    ga_run: Optional[Dict[str, Any]] = None,
 ) -> List[Dict[str, Any]]:
     history_preview = [round(val, 4) for val in history[:80]]
     improvement = baseline_obj - best_obj
@@ -1853,6 +2075,10 @@ def prepare_debug_entries(
             "improvement": improvement,
             "improvementPercent": improvement_pct,
             "historyPoints": len(history),
+            # Anytime-GA: erreichte Generation + Abbruchgrund (completed | timeBudget | stall)
+            "generationsRun": (ga_run or {}).get("generationsRun", len(history)),
+            "stopReason": (ga_run or {}).get("stopReason", "completed"),
+            "gaElapsedMs": (ga_run or {}).get("elapsedMs"),
         },
         {
             "stage": "PIP_PLAN_SUMMARY",
@@ -1953,8 +2179,12 @@ def schedule_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
         return simple_fifo_result([], now, config)
 
     horizon = float(config.get("horizonMinutes", 240.0) or 240.0)
-    orders = build_orders_from_payload(raw_orders, now, horizon)
+    step_match_stats: Dict[str, int] = {}
+    orders = build_orders_from_payload(raw_orders, now, horizon, match_stats=step_match_stats)
     progress.append({"stage": "PIP_V2_STAGE", "step": "orders_built", "orders": len(orders)})
+    progress.append({"stage": "PIP_STEP_MATCHING", "rules": step_match_stats})
+    if step_match_stats:
+        print(f"INFO: build_ops_from_sequence step matching - {step_match_stats}", file=sys.stderr)
 
     if len(orders) <= 1:
         return simple_fifo_result(raw_orders, now, config)
@@ -1966,6 +2196,15 @@ def schedule_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
     elite = max(1, int(ga_config.get("elite", 3) or 3))
     reps = max(5, int(ga_config.get("replications", 30) or 30))
     seed = int(ga_config.get("seed", 42) or 42)
+    # Anytime-GA: Zeitbudget (ms) und Stagnations-Abbruch, beides optional
+    time_budget_ms = float(ga_config.get("timeBudgetMs") or 0.0) or None
+    stall_generations = int(ga_config.get("stallGenerations") or 0) or None
+    # Parallele Bewertung der Population (1 = sequentiell)
+    ga_workers = max(1, min(int(ga_config.get("workers") or 1), os.cpu_count() or 1))
+    # Obergrenze des Fitness-Caches (Anzahl Genome, nur Skalare)
+    ga_cache_size = max(1, int(ga_config.get("cacheSize") or 20000))
+    # Prefix-Checkpoints der Kapazitätssimulation alle N Positionen (0 = volle Re-Simulation)
+    checkpoint_interval = max(0, int(ga_config.get("checkpointInterval", 8) or 0))
     lam = float(config.get("varianceWeight", 0.1) or 0.1)
     setup_weight = float(config.get("setupWeight", 0.01) or 0.01)  # Small default to prefer fewer setups
     fc = config.get("factoryCapacity", {}) if isinstance(config.get("factoryCapacity", {}), dict) else {}
@@ -2091,6 +2330,11 @@ def schedule_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
         variant_counts.append(len(variants_ops))
         total_variants_available += len(variants_ops)
 
+    # Op-Listen einmal in flache Tabellen kompilieren; die Kapazitätssimulation
+    # liest danach nur noch Arrays (op_ranges[i] = aktive Op-Liste von orders[i])
+    op_tables, variant_ranges = compile_op_lists([ops_by_order_variants[o.order_id] for o in orders])
+    op_ranges: List[OpRange] = [op_tables.add(ops_by_order.get(o.order_id, [])) for o in orders]
+
     # Log Varianten-Info
     orders_with_multiple_variants = sum(1 for vc in variant_counts if vc > 1)
     print(f"INFO: Sequence variants loaded - {orders_with_multiple_variants}/{len(orders)} orders have multiple variants (total={total_variants_available})", file=sys.stderr)
@@ -2202,6 +2446,24 @@ def schedule_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
             )
         )
 
+    # Delta-Re-Simulation: Zustands-Checkpoints alle N Auftragspositionen (0 = aus)
+    checkpoint_store = PrefixCheckpoints(checkpoint_interval) if checkpoint_interval > 0 else None
+
+    # Kapazitätsmodell einmal pro Payload (Maschinen, flex/fix, Vorab-Zuweisung, Setup)
+    # (auch im Stationspfad, sofern Demontage/Montage-Kapazität angegeben ist – Baseline-Timeline)
+    capacity_model: Optional[CapacityModel] = None
+    if dem_machines and mon_machines:
+        capacity_model = CapacityModel.build(
+            ga_orders,
+            op_tables,
+            op_ranges,
+            int(dem_machines),
+            int(mon_machines),
+            dem_flex_share=dem_flex_share,
+            mon_flex_share=mon_flex_share,
+            setup_minutes=setup_minutes,
+        )
+
     # FIFO-Reihenfolge = Input-Reihenfolge (wie die Aufträge im JSON ankamen)
     input_order = list(range(len(orders)))  # [0, 1, 2, ...] = FIFO
 
@@ -2229,35 +2491,34 @@ def schedule_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
         mu, var, setup, _ = simulate_with_capacity(
             seq,
             ga_orders,
-            ops_by_order,
-            dem_machines,
-            mon_machines,
+            op_tables,
+            op_ranges,
+            capacity_model,  # type: ignore[arg-type]
             with_timeline=False,
-            dem_flex_share=dem_flex_share,
-            mon_flex_share=mon_flex_share,
-            setup_minutes=setup_minutes,
+            checkpoints=checkpoint_store,
         )
         return mu, var, setup, None
 
     # NEU: Evaluierungsfunktion für GA mit Varianten
-    def eval_sequence_with_variants(individual: List[Tuple[int, int]]) -> Tuple[float, float, float, Optional[List[Dict[str, Any]]]]:
+    def eval_sequence_with_variants(
+        individual: List[Tuple[int, int]], with_timeline: bool = False
+    ) -> Tuple[float, float, float, Optional[List[Dict[str, Any]]]]:
         """
         Evaluiert ein Individuum mit (order_idx, variant_idx) Tupeln.
-        Baut temporäres ops_by_order basierend auf gewählten Varianten.
+        Wählt pro Auftrag den Op-Bereich der gewählten Variante.
         """
-        # Baue ops_by_order basierend auf gewählten Varianten
-        temp_ops_by_order: Dict[str, List[Dict[str, Any]]] = {}
-        for order_idx, variant_idx in individual:
-            order = orders[order_idx]
-            variants = ops_by_order_variants.get(order.order_id, [])
-            # Sichere Varianten-Wahl
-            actual_variant_idx = min(variant_idx, len(variants) - 1) if variants else 0
-            temp_ops_by_order[order.order_id] = variants[actual_variant_idx] if variants else []
-
         # Extrahiere nur die Auftragsreihenfolge für die Simulation
         seq = [gene[0] for gene in individual]
 
         if stations_cfg:
+            # Baue ops_by_order basierend auf gewählten Varianten
+            temp_ops_by_order: Dict[str, List[Dict[str, Any]]] = {}
+            for order_idx, variant_idx in individual:
+                order = orders[order_idx]
+                variants = ops_by_order_variants.get(order.order_id, [])
+                # Sichere Varianten-Wahl
+                actual_variant_idx = min(variant_idx, len(variants) - 1) if variants else 0
+                temp_ops_by_order[order.order_id] = variants[actual_variant_idx] if variants else []
             ms, tard, setup, timeline = simulate_multistation(
                 seq,
                 ga_orders,
@@ -2266,42 +2527,60 @@ def schedule_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
                 setup_minutes,
             )
             return tard, 0.0, setup, timeline
-        mu, var, setup, timeline = simulate_with_capacity(
-            seq,
-            ga_orders,
-            temp_ops_by_order,
-            dem_machines,
-            mon_machines,
-            with_timeline=True,  # Timeline für beste Lösung
-            dem_flex_share=dem_flex_share,
-            mon_flex_share=mon_flex_share,
-            setup_minutes=setup_minutes,
-        )
-        return mu, var, setup, timeline
+        return variant_context.evaluate(individual, with_timeline=with_timeline)
+
+    variant_context = VariantEvalContext(
+        ga_orders=ga_orders,
+        tables=op_tables,
+        base_ranges=list(op_ranges),
+        variant_ranges=variant_ranges,
+        model=capacity_model,  # type: ignore[arg-type]
+        checkpoints=checkpoint_store,
+    )
 
     # Entscheide welchen GA nutzen
     use_variant_ga = orders_with_multiple_variants > 0
     chosen_variants: Dict[str, int] = {}
+    ga_stop = GAStopCriteria(time_budget_ms=time_budget_ms, stall_generations=stall_generations)
+    ga_progress = ProgressReporter.from_config(config, "PIP_GA")
 
     if use_variant_ga:
         print(f"INFO: Using GA with sequence variant optimization ({orders_with_multiple_variants} orders have multiple variants)", file=sys.stderr)
         variant_rate = float(ga_config.get("variantMutationRate", 0.15) or 0.15)
 
-        best_individual, history, best_components, best_timeline, chosen_variants = optimize_with_variants_ga(
-            orders=orders,
-            ga_orders=ga_orders,
-            variant_counts=variant_counts,
-            ops_by_order_variants=ops_by_order_variants,
-            lam=lam,
-            population=pop_size,
-            generations=generations,
-            swap_rate=mutation_rate,
-            variant_rate=variant_rate,
-            elite=elite,
-            seed=seed,
-            eval_fn_with_variants=eval_sequence_with_variants,
-            setup_weight=setup_weight,
-        )
+        # Optional: neue Individuen jeder Generation über einen Prozess-Pool bewerten
+        # (nur Kapazitätspfad; Ergebnisse bitgleich zur sequentiellen Bewertung)
+        parallel_eval: Optional[ParallelEvaluator[IndividualWithVariants, Tuple[float, float, float]]] = None
+        if ga_workers > 1 and not stations_cfg and capacity_model is not None:
+            try:
+                parallel_eval = ParallelEvaluator(variant_context.fitness, ga_workers)
+                print(f"INFO: GA evaluation on {ga_workers} worker processes", file=sys.stderr)
+            except Exception as exc:  # z.B. keine Prozesse erlaubt -> sequentiell
+                print(f"WARNING: process pool unavailable ({exc}) - evaluating sequentially", file=sys.stderr)
+
+        try:
+            best_individual, history, best_components, best_timeline, chosen_variants = optimize_with_variants_ga(
+                orders=orders,
+                ga_orders=ga_orders,
+                variant_counts=variant_counts,
+                ops_by_order_variants=ops_by_order_variants,
+                lam=lam,
+                population=pop_size,
+                generations=generations,
+                swap_rate=mutation_rate,
+                variant_rate=variant_rate,
+                elite=elite,
+                seed=seed,
+                eval_fn_with_variants=eval_sequence_with_variants,
+                setup_weight=setup_weight,
+                stop=ga_stop,
+                progress=ga_progress,
+                batch_eval_fn=parallel_eval,
+                cache_size=ga_cache_size,
+            )
+        finally:
+            if parallel_eval is not None:
+                parallel_eval.close()
         # Konvertiere best_individual zu best_seq (nur Auftragsreihenfolge)
         best_seq = [gene[0] for gene in best_individual]
 
@@ -2311,11 +2590,16 @@ def schedule_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
             variants = ops_by_order_variants.get(order.order_id, [])
             actual_variant_idx = min(variant_idx, len(variants) - 1) if variants else 0
             ops_by_order[order.order_id] = variants[actual_variant_idx] if variants else []
+            op_ranges[order_idx] = variant_ranges[order_idx][min(variant_idx, len(variant_ranges[order_idx]) - 1)]
+        # Ab hier (Baseline-Bewertung, Timelines, Debug) gilt die Zuweisung der gewählten Varianten
+        if capacity_model is not None:
+            capacity_model = variant_context.model_for(best_individual, op_ranges)
 
         progress.append({
             "stage": "PIP_V2_STAGE",
             "step": "ga_with_variants_complete",
             "iterations": len(history),
+            "gaRun": ga_stop.summary(generations),
             "variantsChosen": chosen_variants,
             "nonDefaultVariants": sum(1 for v in chosen_variants.values() if v > 0),
         })
@@ -2332,8 +2616,15 @@ def schedule_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
             seed=seed,
             eval_fn=eval_sequence,
             setup_weight=setup_weight,
+            stop=ga_stop,
+            progress=ga_progress,
+            cache_size=ga_cache_size,
         )
-        progress.append({"stage": "PIP_V2_STAGE", "step": "ga_complete", "iterations": len(history)})
+        progress.append({"stage": "PIP_V2_STAGE", "step": "ga_complete", "iterations": len(history), "gaRun": ga_stop.summary(generations)})
+
+    if checkpoint_store is not None:
+        # Bei paralleler Bewertung zählen nur die Checkpoints des Hauptprozesses
+        print(f"[SIM] Prefix checkpoints: {checkpoint_store.stats()}", file=sys.stderr)
 
     if not best_seq:
         best_seq = baseline_seq
@@ -2352,13 +2643,10 @@ def schedule_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
         _, _, _, ops_timeline = simulate_with_capacity(
             best_seq,
             ga_orders,
-            ops_by_order,
-            dem_machines,
-            mon_machines,
+            op_tables,
+            op_ranges,
+            capacity_model,
             with_timeline=True,
-            dem_flex_share=dem_flex_share,
-            mon_flex_share=mon_flex_share,
-            setup_minutes=setup_minutes,
         )
     if not ops_timeline:
         # Detaillierte Diagnose wenn Timeline leer ist
@@ -2387,13 +2675,10 @@ def schedule_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
     _, _, _, baseline_timeline = simulate_with_capacity(
         baseline_seq,
         ga_orders,
-        ops_by_order,
-        dem_machines,
-        mon_machines,
+        op_tables,
+        op_ranges,
+        capacity_model,
         with_timeline=True,
-        dem_flex_share=dem_flex_share,
-        mon_flex_share=mon_flex_share,
-        setup_minutes=setup_minutes,
     )
 
     priorities, priority_map = compute_priorities(optimized_plan)
@@ -2417,7 +2702,13 @@ def schedule_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
             "elite": elite,
             "replications": reps,
             "seed": seed,
+            "timeBudgetMs": time_budget_ms,
+            "stallGenerations": stall_generations,
+            "workers": ga_workers,
+            "cacheSize": ga_cache_size,
+            "checkpointInterval": checkpoint_interval,
         },
+        ga_run=ga_stop.summary(generations),
         history=history,
         baseline_seq=baseline_seq,
         best_seq=best_seq,
@@ -2432,6 +2723,9 @@ def schedule_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
     )
     debug = progress + debug
 
+    if capacity_model is not None:
+        debug.append({"stage": "PIP_CAPACITY_MODEL", **capacity_model.to_debug()})
+
     if pn_valid is not None:
         debug.append({
             "stage": "PIP_PETRI_VALIDATION",
@@ -2649,20 +2943,25 @@ def schedule_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def error_result(exc: BaseException) -> Dict[str, Any]:
+    """Fehlerantwort (leerer Plan + PIP_V2_ERROR) – auch für terminierung.serve."""
+    return {
+        "priorities": [],
+        "routes": [],
+        "batches": [],
+        "releaseList": [],
+        "etaList": [],
+        "holdDecisions": [],
+        "debug": [{"stage": "PIP_V2_ERROR", "message": str(exc)}],
+    }
+
+
 def main() -> None:
     try:
         payload = load_payload()
         result = schedule_payload(payload)
     except Exception as exc:  # pragma: no cover
-        result = {
-            "priorities": [],
-            "routes": [],
-            "batches": [],
-            "releaseList": [],
-            "etaList": [],
-            "holdDecisions": [],
-            "debug": [{"stage": "PIP_V2_ERROR", "message": str(exc)}],
-        }
+        result = error_result(exc)
     print(json.dumps(result))
 
 
@@ -29,7 +29,7 @@ Ausgabe (stdout, JSON):
 {
   "batches": [...],                  # Lose inkl. Fenster
   "etaList": [...],                  # einfache ETA je Auftrag
-  "utilizationForecast": [...],      # Bucket-Auslastung
+  "utilizationForecast": {...},      # Bucket-Auslastung als Spalten (bucketStart, workloadMin, capacityMin, utilization)
   "ctpPreview": [...],               # CTP für newOrders
   "deferredOrders": [...],           # Aufträge, die diesmal bewusst zurückgestellt wurden
   "debug": [...]                     # kurze Vorschau & Eckwerte
@@ -41,6 +41,8 @@ import sys
 from typing import Dict, List, Any, Tuple
 from collections import defaultdict
 
+from bucket_ledger import BucketLedger, CapacityIndex, utilization_columns
+
 MIN_PER_DAY = 24 * 60
 
 
@@ -101,7 +103,7 @@ def apply_config_defaults(cfg: Dict[str, Any]) -> Dict[str, Any]:
 
     cfg.setdefault("targetUtil", 0.5)           # Zielauslastung 50 %
     cfg.setdefault("demandForecastPerDay", 3)   # informativ/erklärend
-    cfg.setdefault("ctpMaxSlots", 30)           # Suche für CTP
+    cfg.setdefault("ctpMaxSlots", 0)            # Obergrenze der CTP-Slotsuche (0 = bis zur Deadline)
     return cfg
 
 
@@ -152,41 +154,31 @@ def enrich_orders(orders: List[Dict[str, Any]], cfg: Dict[str, Any], now: float)
 
 
 # -----------------------------
-# Einfache Vorschau der Auslastung im nächsten Bucket
+# Workload je Bucket (Ledger)
 # (gleichmäßige Verteilung des Los-Workloads über sein Fenster)
 # -----------------------------
-def next_bucket_util(batches: List[Dict[str, Any]],
-                     orders_map: Dict[str, Dict[str, Any]],
-                     cfg: Dict[str, Any],
-                     now: float) -> float:
-    bucket = int(cfg["intervalMinutes"])
-    machines = max(1, int(cfg["machines"]))
-    shift = int(cfg.get("shiftMinutesPerDay", 480))
-    cap_bucket = machines * min(bucket, shift)
-    if cap_bucket <= 0:
-        return 0.0
-
-    nb_start = (int(now // bucket) + 1) * bucket
-    nb_end = nb_start + bucket
-
-    wl_next = 0.0
-    for b in batches:
-        s = float(b["windowStart"]["earliest"])
-        e = float(b["windowEnd"]["latest"])
-        if e <= s:
+def batch_work(b: Dict[str, Any], orders_map: Dict[str, Dict[str, Any]]) -> float:
+    work = 0.0
+    for oid in b["orderIds"]:
+        order = orders_map.get(oid)
+        if order is None:
             continue
-        overlap = max(0.0, min(e, nb_end) - max(s, nb_start))
-        if overlap > 0:
-            work = 0.0
-            for oid in b["orderIds"]:
-                order = orders_map.get(oid)
-                if order is None:
-                    continue
-                work += float(order.get("processTimeTotal", order_proc_time(order)))
-            if work <= 0.0:
-                continue
-            wl_next += work * (overlap / (e - s))
-    return min(1.0, wl_next / cap_bucket)
+        work += float(order.get("processTimeTotal", order_proc_time(order)))
+    return work
+
+
+def batch_span(b: Dict[str, Any], orders_map: Dict[str, Dict[str, Any]]) -> Tuple[float, float, float]:
+    """(start, end, work) eines Loses für den BucketLedger."""
+    return float(b["windowStart"]["earliest"]), float(b["windowEnd"]["latest"]), batch_work(b, orders_map)
+
+
+def build_ledger(batches: List[Dict[str, Any]],
+                 orders_map: Dict[str, Dict[str, Any]],
+                 cfg: Dict[str, Any]) -> BucketLedger:
+    ledger = BucketLedger.for_config(cfg)
+    for b in batches:
+        ledger.add(*batch_span(b, orders_map))
+    return ledger
 
 
 # -----------------------------
@@ -214,6 +206,8 @@ def build_batches(enriched: List[Dict[str, Any]], cfg: Dict[str, Any], now: floa
 
     # Für Fenster-/Util-Berechnung brauchen wir eine Map
     orders_map = {o["orderId"]: o for o in enriched}
+    ledger = BucketLedger.for_config(cfg)  # Workload pro Bucket der bereits freigegebenen Lose
+    next_bucket = ledger.next_bucket(now)
 
     # Slot-Schleife: wir gehen so lange vorwärts, bis der Pool leer ist
     slot_time = (int(now // T) + 1) * T
@@ -255,6 +249,7 @@ def build_batches(enriched: List[Dict[str, Any]], cfg: Dict[str, Any], now: floa
                     "windowStart": {"earliest": start_e, "latest": start_l},
                     "windowEnd": {"earliest": end_e, "latest": end_l}
                 })
+                ledger.add(*batch_span(batches[-1], orders_map))
                 batch_idx += 1
 
         if pool:
@@ -285,7 +280,7 @@ def build_batches(enriched: List[Dict[str, Any]], cfg: Dict[str, Any], now: floa
                         "windowStart": {"earliest": start_e, "latest": start_l},
                         "windowEnd": {"earliest": end_e, "latest": end_l}
                     }
-                    util_with = next_bucket_util(batches + [probe], orders_map, cfg, now)
+                    util_with = ledger.util_at(next_bucket, batch_span(probe, orders_map))
 
                     if util_with <= target_util:
                         # Gate offen -> freigeben
@@ -301,6 +296,7 @@ def build_batches(enriched: List[Dict[str, Any]], cfg: Dict[str, Any], now: floa
                             "windowStart": {"earliest": start_e, "latest": start_l},
                             "windowEnd": {"earliest": end_e, "latest": end_l}
                         })
+                        ledger.add(*batch_span(batches[-1], orders_map))
                         batch_idx += 1
                     else:
                         # Gate zu -> wir stellen diese Kandidaten zurück (behalten sie im Pool)
@@ -347,39 +343,10 @@ def build_eta_list(batches: List[Dict[str, Any]],
 # -----------------------------
 def utilization_forecast(batches: List[Dict[str, Any]],
                          orders_map: Dict[str, Dict[str, Any]],
-                         cfg: Dict[str, Any]) -> List[Dict[str, Any]]:
-    bucket = int(cfg["intervalMinutes"])
-    machines = max(1, int(cfg["machines"]))
-    shift = int(cfg.get("shiftMinutesPerDay", 480))
-    cap_bucket = machines * min(bucket, shift)
-
-    util = defaultdict(float)
-    for b in batches:
-        s = float(b["windowStart"]["earliest"])
-        e = float(b["windowEnd"]["latest"])
-        if e <= s:
-            continue
-        work = 0.0
-        for oid in b["orderIds"]:
-            order = orders_map.get(oid)
-            if order is None:
-                continue
-            work += float(order.get("processTimeTotal", order_proc_time(order)))
-        if work <= 0.0:
-            continue
-        per_min = work / (e - s)
-        t = int(s)
-        while t < e:
-            k = to_bucket(t, bucket)
-            util[k] += per_min * min(bucket, e - t)
-            t += bucket
-
-    out = []
-    for k in sorted(util.keys()):
-        wl = util[k]
-        util_ratio = 0.0 if cap_bucket <= 0 else min(1.0, wl / cap_bucket)
-        out.append({"bucketStart": k, "workloadMin": wl, "capacityMin": cap_bucket, "utilization": util_ratio})
-    return out
+                         cfg: Dict[str, Any]) -> Dict[str, Any]:
+    """Spalten bucketStart/workloadMin/capacityMin/utilization über den ganzen Horizont."""
+    shape = BucketLedger.for_config(cfg)
+    return utilization_columns(shape.bucket, shape.capacity, [batch_span(b, orders_map) for b in batches])
 
 
 # -----------------------------
@@ -400,57 +367,56 @@ def ctp_promise_orders(new_orders: List[Dict[str, Any]],
     alpha = float(cfg["windows"]["alpha"])
     beta = float(cfg["windows"]["beta"])
     target_util = float(cfg.get("targetUtil", 0.5))
-    max_slots = int(cfg.get("ctpMaxSlots", 30))
-
-    preview_batches = list(batches)
-    preview_orders_map = dict(orders_map)
-    promises = []
-
-    for idx, n in enumerate(new_orders):
-        p = max(1.0, order_proc_time(n))
+    max_slots = int(cfg.get("ctpMaxSlots") or 0)
+
+    first_slot = (int(now // T) + 1) * T
+    procs = [max(1.0, order_proc_time(n)) for n in new_orders]
+    d_max = max(procs) / m
+    # Suche bis zur harten Deadline: alle Slots, deren Promise (Slot + Dauer + 10 % Puffer)
+    # noch vor der Deadline liegen kann (optional begrenzt durch ctpMaxSlots)
+    deadlines: List[float] = []
+    slot_counts: List[int] = []
+    for n, p in zip(new_orders, procs):
         due = n.get("dueDate")
         if not isinstance(due, (int, float)):
             due = now + days_to_min(30)
         hard_deadline = min(float(due), now + days_to_min(S))
+        n_slots = max(0, int((hard_deadline - first_slot - p / m - 0.1 * p) // T) + 2)
+        deadlines.append(hard_deadline)
+        slot_counts.append(min(max_slots, n_slots) if max_slots > 0 else n_slots)
+    # Kapazitätsprofil über den ganzen Suchhorizont; Zusagen werden direkt eingebucht
+    index = CapacityIndex.from_ledger(build_ledger(batches, orders_map, cfg),
+                                      first_slot - alpha * d_max,
+                                      first_slot + max(slot_counts) * T + (beta + 1.0) * d_max)
+    taken_ids = set(orders_map)
+    promises = []
 
-        slot_time = (int(now // T) + 1) * T
-        found = False
+    for idx, n in enumerate(new_orders):
+        p = procs[idx]
+        hard_deadline = deadlines[idx]
 
         base_id = str(n.get("orderId") or f"NEW-{idx}")
-        probe_id = base_id if base_id not in preview_orders_map else f"NEW-{base_id}-{idx}"
-
-        for attempt in range(max_slots):
-            duration_est = p / m
-            s_nom = float(slot_time)
-            start_e = s_nom - alpha * duration_est
-            start_l = s_nom + beta * duration_est
-            end_e = start_e + duration_est
-            end_l = start_l + duration_est
-
-            probe_batch = {
-                "id": f"ctp-probe-{probe_id}-{attempt}",
-                "orderIds": [probe_id],
-                "releaseAt": float(slot_time),
-                "windowStart": {"earliest": start_e, "latest": start_l},
-                "windowEnd": {"earliest": end_e, "latest": end_l}
-            }
-            probe_map = dict(preview_orders_map)
-            probe_map[probe_id] = {"processTimeTotal": p}
-            util_with = next_bucket_util(preview_batches + [probe_batch], probe_map, cfg, now)
+        probe_id = base_id if base_id not in taken_ids else f"NEW-{base_id}-{idx}"
 
+        # frühester Slot mit Auslastung <= Ziel in allen berührten Buckets;
+        # Promise wächst mit dem Slot, Slots hinter der Deadline werden gar nicht erst geprüft
+        duration_est = p / m
+        a = index.earliest_slot(first_slot, slot_counts[idx], alpha * duration_est, (beta + 1.0) * duration_est,
+                                p, target_util)
+        found = False
+        if a is not None:
+            slot_time = first_slot + a * T
             promise = slot_time + duration_est + 0.1 * p
-            if util_with <= target_util and promise <= hard_deadline:
+            if promise <= hard_deadline:
                 promises.append({
                     "orderId": n.get("orderId", probe_id),
                     "promisedDate": float(promise),
                     "method": "insert-light",
                     "confidence": 0.7
                 })
-                preview_batches.append(probe_batch)
-                preview_orders_map[probe_id] = {"processTimeTotal": p}
+                index.add(slot_time - alpha * duration_est, slot_time + beta * duration_est + duration_est, p)
+                taken_ids.add(probe_id)
                 found = True
-                break
-            slot_time += T
 
         if not found:
             promises.append({
@@ -503,7 +469,7 @@ def main():
         "stage": "SUMMARY",
         "batches": len(batches),
         "eta": len(eta_list),
-        "utilBuckets": len(util_fc),
+        "utilBuckets": len(util_fc["bucketStart"]),
         "ctp": len(ctp_preview),
         "deferred": len(deferred_list)
     })
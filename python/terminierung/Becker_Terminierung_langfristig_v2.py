@@ -22,11 +22,15 @@ import json
 import sys
 import re
 import math
-from typing import Dict, List, Any, Tuple, Set
+from typing import Callable, Dict, List, Any, Tuple, Set
 from collections import defaultdict
-from itertools import combinations
+
+from bucket_ledger import BucketLedger, CapacityIndex, utilization_columns
+from similarity import MinHashLSH, StepInterner, jaccard_bits, jaccard_matrix_bits, mean_pairwise_jaccard_bits
 
 MIN_PER_DAY = 24 * 60
+# Ab dieser Auftragszahl sucht cluster_by_jaccard Kandidaten per MinHash/LSH statt über alle Paare
+LSH_MIN_ORDERS = 200
 
 DEFAULT_FORECAST = {
     "variants": [
@@ -122,10 +126,6 @@ def seq_set_from_order_or_global(order: Dict[str, Any],
 
     return steps_union
 
-def jaccard(a: Set[str], b: Set[str]) -> float:
-    u = a | b
-    return 0.0 if not u else len(a & b) / len(u)
-
 # -----------------------------
 # Config Defaults
 # -----------------------------
@@ -163,8 +163,10 @@ def apply_config_defaults(cfg: Dict[str, Any]) -> Dict[str, Any]:
 
     cfg.setdefault("targetUtil", 0.5)
     cfg.setdefault("demandForecastPerDay", 3)
-    cfg.setdefault("ctpMaxSlots", 30)
+    cfg.setdefault("ctpMaxSlots", 0)  # Obergrenze der CTP-Slotsuche (0 = bis zur harten Deadline)
     cfg.setdefault("jaccardThreshold", 0.3)  # Reduziert für größere Batches (0.3 = 30% Ähnlichkeit)
+    cfg.setdefault("jaccardExact", False)    # True = immer alle Paare exakt vergleichen (kein LSH)
+    cfg.setdefault("minhashPerms", 128)      # Signaturlänge für MinHash/LSH
     return cfg
 
 # -----------------------------
@@ -173,11 +175,14 @@ def apply_config_defaults(cfg: Dict[str, Any]) -> Dict[str, Any]:
 def enrich_orders(orders: List[Dict[str, Any]],
                   cfg: Dict[str, Any],
                   now: float,
-                  global_sequences: Dict[str, Any]) -> List[Dict[str, Any]]:
+                  global_sequences: Dict[str, Any],
+                  interner: StepInterner) -> List[Dict[str, Any]]:
     defer = cfg["defer"]
     interval = int(cfg["intervalMinutes"])
 
     enriched: List[Dict[str, Any]] = []
+    # Steps -> Bitpositionen (interner wird mit den Prognose-Prototypen geteilt):
+    # Jaccard zwischen Aufträgen läuft über popcount statt Mengen
     for o in orders:
         dem = float(o.get("processTimeDem", 60.0))
         mon = float(o.get("processTimeMon", 90.0))
@@ -206,62 +211,56 @@ def enrich_orders(orders: List[Dict[str, Any]],
             "dueDate": float(due),
             "latestRelease": float(latest_release),
             "seqSet": seqset,
+            "seqBits": interner.mask(seqset),
             "deferredCount": int(o.get("deferredCount", 0))
         })
     return enriched
 
 # -----------------------------
-# Auslastung im nächsten Bucket
+# Workload je Bucket (Ledger)
 # -----------------------------
-def next_bucket_util(batches: List[Dict[str, Any]],
-                     orders_map: Dict[str, Dict[str, Any]],
-                     cfg: Dict[str, Any],
-                     now: float) -> float:
-    bucket = int(cfg["intervalMinutes"])
-    machines = max(1, int(cfg["machines"]))
-    shift = int(cfg.get("shiftMinutesPerDay", 480))
-    cap_bucket = machines * min(bucket, shift)
-    if cap_bucket <= 0:
-        return 0.0
+def batch_work(b: Dict[str, Any], orders_map: Dict[str, Dict[str, Any]]) -> float:
+    work = 0.0
+    for oid in b["orderIds"]:
+        order = orders_map.get(oid)
+        if order is None:
+            continue
+        work += float(order.get("processTimeTotal", order_proc_time(order)))
+    return work
 
-    nb_start = (int(now // bucket) + 1) * bucket
-    nb_end = nb_start + bucket
+def batch_span(b: Dict[str, Any], orders_map: Dict[str, Dict[str, Any]]) -> Tuple[float, float, float]:
+    """(start, end, work) eines Loses für den BucketLedger."""
+    return float(b["windowStart"]["earliest"]), float(b["windowEnd"]["latest"]), batch_work(b, orders_map)
 
-    wl_next = 0.0
+def build_ledger(batches: List[Dict[str, Any]],
+                 orders_map: Dict[str, Dict[str, Any]],
+                 cfg: Dict[str, Any]) -> BucketLedger:
+    ledger = BucketLedger.for_config(cfg)
     for b in batches:
-        s = float(b["windowStart"]["earliest"])
-        e = float(b["windowEnd"]["latest"])
-        if e <= s:
-            continue
-        overlap = max(0.0, min(e, nb_end) - max(s, nb_start))
-        if overlap > 0:
-            work = 0.0
-            for oid in b["orderIds"]:
-                order = orders_map.get(oid)
-                if order is None:
-                    continue
-                work += float(order.get("processTimeTotal", order_proc_time(order)))
-            if work <= 0.0:
-                continue
-            wl_next += work * (overlap / (e - s))
-    return min(1.0, wl_next / cap_bucket)
+        ledger.add(*batch_span(b, orders_map))
+    return ledger
 
 # -----------------------------
 # Prognose-Hooks
 # -----------------------------
-def expected_similar_next(seed_seq: Set[str], forecast: Dict[str, Any], tau: float) -> float:
+def forecast_protos(forecast: Dict[str, Any], interner: StepInterner) -> List[Tuple[float, int]]:
+    """(lambda_v_per_T, Bitmaske der Prototyp-Schritte S_v) je Prognose-Variante, einmal pro Lauf."""
+    if not isinstance(forecast, dict):
+        return []
+    return [
+        (float(v.get("lambda_per_T", 0.0)), interner.mask(_normalize_step(s) for s in v.get("proto_steps", [])))
+        for v in forecast.get("variants", [])
+    ]
+
+def expected_similar_next(seed_bits: int, protos: List[Tuple[float, int]], tau: float) -> float:
     """
     E[N_ähnlich] = Sum_v lambda_v_per_T * Pr{ J(seed, S_v) >= tau }.
-    Praktisch als hartes Kriterium (1/0) über Prototyp-Schritte S_v implementiert.
+    Praktisch als hartes Kriterium (1/0) über Prototyp-Schritte S_v implementiert
+    (Masken aus forecast_protos, gleicher StepInterner wie die Aufträge).
     """
-    if not isinstance(forecast, dict):
-        return 0.0
-    variants = forecast.get("variants", [])
     exp = 0.0
-    for v in variants:
-        lam = float(v.get("lambda_per_T", 0.0))
-        proto = set(_normalize_step(s) for s in v.get("proto_steps", []))
-        prob_fit = 1.0 if jaccard(seed_seq, proto) >= tau else 0.0
+    for lam, proto_bits in protos:
+        prob_fit = 1.0 if jaccard_bits(seed_bits, proto_bits) >= tau else 0.0
         exp += lam * prob_fit
     return max(0.0, exp)
 
@@ -309,7 +308,52 @@ def effective_q_min(cfg: Dict[str, Any], exp_similar_next: float, q_max: int) ->
 # -----------------------------
 # Jaccard-Clustering (greedy)
 # -----------------------------
-def cluster_by_jaccard(enriched: List[Dict[str, Any]], threshold: float, q_max: int) -> List[List[Dict[str, Any]]]:
+def _lsh_matcher(orders_sorted: List[Dict[str, Any]], threshold: float, num_perm: int) -> Callable[[int], List[int]]:
+    """
+    matcher(idx): aufsteigende Indizes (in orders_sorted) aller Aufträge mit Jaccard >= threshold zu
+    orders_sorted[idx]. Gleiche seqSets werden zusammengefasst; LSH liefert Kandidaten-Mengen, die
+    exakt geprüft werden. Berechnung lazy und einmal pro Menge.
+    """
+    set_ids: Dict[int, int] = {}
+    distinct: List[Set[str]] = []
+    members: List[List[int]] = []
+    order_sid: List[int] = []
+    for idx, o in enumerate(orders_sorted):
+        key = o["seqBits"]
+        sid = set_ids.get(key)
+        if sid is None:
+            sid = len(members)
+            set_ids[key] = sid
+            distinct.append(o["seqSet"])
+            members.append([])
+        members[sid].append(idx)
+        order_sid.append(sid)
+    distinct_bits = list(set_ids)
+
+    lsh = MinHashLSH(distinct, threshold, num_perm)
+    print(f"LSH candidate search: {len(distinct)} distinct seqSets, {lsh.bands} bands x {lsh.rows} rows", file=sys.stderr)
+
+    cache: Dict[int, List[int]] = {}
+
+    def matcher(idx: int) -> List[int]:
+        sid = order_sid[idx]
+        hit = cache.get(sid)
+        if hit is None:
+            base = distinct_bits[sid]
+            similar = [c for c in lsh.candidates(sid) if jaccard_bits(base, distinct_bits[c]) >= threshold]
+            hit = sorted(i for c in similar for i in members[c])
+            cache[sid] = hit
+        return hit
+
+    return matcher
+
+def cluster_by_jaccard(enriched: List[Dict[str, Any]], threshold: float, q_max: int,
+                       exact: bool = False, num_perm: int = 128) -> List[List[Dict[str, Any]]]:
+    """
+    Greedy-Clustering nach Liefertermin: jeder noch freie Auftrag wird Saat und sammelt alle freien
+    Aufträge mit Jaccard(Saat, Auftrag) >= threshold. Ab LSH_MIN_ORDERS Aufträgen (und exact=False)
+    kommen die Kandidaten aus MinHash/LSH statt aus einem Vergleich mit allen Aufträgen.
+    """
     assigned = set()
     orders_sorted = sorted(enriched, key=lambda o: (o.get("dueDate", 0.0)))
     clusters: List[List[Dict[str, Any]]] = []
@@ -323,7 +367,7 @@ def cluster_by_jaccard(enriched: List[Dict[str, Any]], threshold: float, q_max:
         print(f"\nSample pairwise Jaccard similarities:", file=sys.stderr)
         for i in range(min(3, len(orders_sorted))):
             for j in range(i+1, min(3, len(orders_sorted))):
-                sim = jaccard(orders_sorted[i]["seqSet"], orders_sorted[j]["seqSet"])
+                sim = jaccard_bits(orders_sorted[i]["seqBits"], orders_sorted[j]["seqBits"])
                 oid_i = orders_sorted[i].get("orderId", f"IDX-{i}")[:12]
                 oid_j = orders_sorted[j].get("orderId", f"IDX-{j}")[:12]
                 seq_i = sorted(list(orders_sorted[i]["seqSet"]))[:5]
@@ -332,25 +376,40 @@ def cluster_by_jaccard(enriched: List[Dict[str, Any]], threshold: float, q_max:
                 print(f"    Seq {oid_i}: {seq_i}", file=sys.stderr)
                 print(f"    Seq {oid_j}: {seq_j}", file=sys.stderr)
 
+    # Schwelle <= 0 trifft auch disjunkte Mengen – das kann LSH nicht finden, also exakt
+    use_lsh = not exact and threshold > 0 and len(orders_sorted) >= LSH_MIN_ORDERS
+    matcher = _lsh_matcher(orders_sorted, threshold, num_perm) if use_lsh else None
+
     for i, o in enumerate(orders_sorted):
         oid = o.get("orderId", f"IDX-{i}")
         if oid in assigned:
             continue
-        base_seq = o["seqSet"]
+        base_bits = o["seqBits"]
         cluster = [o]
         assigned.add(oid)
 
         # Debug: Track how many matches found
         matches_found = 0
-        for j, p in enumerate(orders_sorted):
-            pid = p.get("orderId", f"IDX-{j}")
-            if pid in assigned:
-                continue
-            sim = jaccard(base_seq, p["seqSet"])
-            if sim >= threshold:
+        if matcher is not None:
+            # LSH: nur die (exakt geprüften) Treffer in Liefertermin-Reihenfolge
+            for j in matcher(i):
+                p = orders_sorted[j]
+                pid = p.get("orderId", f"IDX-{j}")
+                if pid in assigned:
+                    continue
                 cluster.append(p)
                 assigned.add(pid)
                 matches_found += 1
+        else:
+            for j, p in enumerate(orders_sorted):
+                pid = p.get("orderId", f"IDX-{j}")
+                if pid in assigned:
+                    continue
+                sim = jaccard_bits(base_bits, p["seqBits"])
+                if sim >= threshold:
+                    cluster.append(p)
+                    assigned.add(pid)
+                    matches_found += 1
 
         print(f"\nCluster starting with {oid[:12]}: found {matches_found} matches, total size {len(cluster)}", file=sys.stderr)
 
@@ -378,29 +437,15 @@ def must_release_batch(batch_orders: List[Dict[str, Any]], now: float, cfg: Dict
     return False
 
 def avg_pairwise_jaccard(batch_orders: List[Dict[str, Any]]) -> float:
-    if len(batch_orders) <= 1:
-        return 1.0
-    sims = []
-    for a, b in combinations(batch_orders, 2):
-        sims.append(jaccard(a["seqSet"], b["seqSet"]))
-    return sum(sims) / len(sims) if sims else 1.0
+    return mean_pairwise_jaccard_bits([o["seqBits"] for o in batch_orders])
 
 def jaccard_matrix(batch_orders: List[Dict[str, Any]]) -> List[List[float]]:
     """
     Berechnet die vollständige Jaccard-Ähnlichkeitsmatrix für alle Aufträge im Batch.
     Rückgabe: n x n Matrix, wobei matrix[i][j] die Ähnlichkeit zwischen Auftrag i und j ist.
+    (Bitmasken aus enrich_orders, popcount-basiert – siehe similarity.)
     """
-    n = len(batch_orders)
-    matrix = [[0.0] * n for _ in range(n)]
-
-    for i in range(n):
-        for j in range(n):
-            if i == j:
-                matrix[i][j] = 1.0
-            else:
-                matrix[i][j] = jaccard(batch_orders[i]["seqSet"], batch_orders[j]["seqSet"])
-
-    return matrix
+    return jaccard_matrix_bits([o["seqBits"] for o in batch_orders])
 
 def expected_delta_j(avgJ: float, size: int, exp_similar_next: float) -> float:
     """
@@ -421,22 +466,22 @@ def urgency_U(batch_orders: List[Dict[str, Any]], now: float, gamma: float) -> f
         vals.append(min(1.0, u))
     return sum(vals) / len(vals) if vals else 0.0
 
-def capacity_pressure_C(batches_if_release: List[Dict[str, Any]],
+def capacity_pressure_C(ledger: BucketLedger,
                         probe_batch: Dict[str, Any],
                         orders_map: Dict[str, Dict[str, Any]],
                         cfg: Dict[str, Any],
                         now: float) -> float:
-    util_with = next_bucket_util(batches_if_release + [probe_batch], orders_map, cfg, now)
+    util_with = ledger.util_at(ledger.next_bucket(now), batch_span(probe_batch, orders_map))
     target = float(cfg.get("targetUtil", 0.5))
     return max(0.0, util_with - target)
 
 def defer_score(batch_orders: List[Dict[str, Any]],
                 probe_batch: Dict[str, Any],
-                batches_so_far: List[Dict[str, Any]],
+                ledger: BucketLedger,
                 orders_map: Dict[str, Dict[str, Any]],
                 cfg: Dict[str, Any],
                 now: float,
-                forecast: Dict[str, Any],
+                protos: List[Tuple[float, int]],
                 tau: float) -> float:
     """
     λ_sim*ΔJ(exp_similar_next) - λ_urg*U - λ_cap*C
@@ -449,20 +494,20 @@ def defer_score(batch_orders: List[Dict[str, Any]],
     gamma   = float(defer_cfg["gamma"])
 
     # Seed = „repräsentativer“ Auftrag des Batches (erster)
-    seed_seq = batch_orders[0]["seqSet"] if batch_orders else set()
-    exp_sim = expected_similar_next(seed_seq, forecast, tau)
+    seed_bits = batch_orders[0]["seqBits"] if batch_orders else 0
+    exp_sim = expected_similar_next(seed_bits, protos, tau)
 
     avgJ = avg_pairwise_jaccard(batch_orders)
     dJ   = expected_delta_j(avgJ, len(batch_orders), exp_sim)
     U    = urgency_U(batch_orders, now, gamma)
-    C    = capacity_pressure_C(batches_so_far, probe_batch, orders_map, cfg, now)
+    C    = capacity_pressure_C(ledger, probe_batch, orders_map, cfg, now)
     return lam_sim * dJ - lam_urg * U - lam_cap * C, exp_sim
 
 # -----------------------------
 # Batches bauen (mit Prognoseeinbindung)
 # -----------------------------
-def build_batches(enriched: List[Dict[str, Any]], cfg: Dict[str, Any], now: float, forecast: Dict[str, Any]
-                  ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+def build_batches(enriched: List[Dict[str, Any]], cfg: Dict[str, Any], now: float, forecast: Dict[str, Any],
+                  interner: StepInterner) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     T = int(cfg["intervalMinutes"])
     m = max(1, int(cfg["machines"]))
     base_target_util = float(cfg.get("targetUtil", 0.5))
@@ -474,11 +519,16 @@ def build_batches(enriched: List[Dict[str, Any]], cfg: Dict[str, Any], now: floa
     # dynamische Parameter aus Prognose
     target_util_eff = dynamic_target_util(cfg, forecast)
     buffer_pct_eff  = adjusted_buffer_pct(cfg, forecast)
+    protos = forecast_protos(forecast, interner)
 
     orders_map = {o["orderId"]: o for o in enriched if "orderId" in o}
-    clusters = cluster_by_jaccard(enriched, threshold=thr, q_max=int(cfg["setup"]["qMax"]))
+    clusters = cluster_by_jaccard(enriched, threshold=thr, q_max=int(cfg["setup"]["qMax"]),
+                                  exact=bool(cfg.get("jaccardExact", False)),
+                                  num_perm=int(cfg.get("minhashPerms", 128)))
 
     batches: List[Dict[str, Any]] = []
+    ledger = BucketLedger.for_config(cfg)  # Workload pro Bucket der bereits freigegebenen Lose
+    next_bucket = ledger.next_bucket(now)
     deferred_list: List[Dict[str, Any]] = []
     slot_time0 = (int(now // T) + 1) * T
     slot_cursor = float(slot_time0)
@@ -490,8 +540,7 @@ def build_batches(enriched: List[Dict[str, Any]], cfg: Dict[str, Any], now: floa
             continue
 
         # temporäres q_min: abhängig von erwarteten ähnlichen Ankünften
-        seed_seq = cluster[0]["seqSet"]
-        exp_sim_next = expected_similar_next(seed_seq, forecast, thr)
+        exp_sim_next = expected_similar_next(cluster[0]["seqBits"], protos, thr)
         q_min_eff = effective_q_min(cfg, exp_sim_next, int(cfg["setup"]["qMax"]))
 
         # Dauer und initiales Fenster mit dynamischem Puffer
@@ -518,7 +567,7 @@ def build_batches(enriched: List[Dict[str, Any]], cfg: Dict[str, Any], now: floa
         weak_batch = len(cluster) < q_min_eff or avgJ < thr
 
         if not must_release_batch(cluster, now, cfg) and weak_batch:
-            dscore, exp_sim = defer_score(cluster, probe, batches, orders_map, cfg, now, forecast, thr)
+            dscore, exp_sim = defer_score(cluster, probe, ledger, orders_map, cfg, now, protos, thr)
             max_def = max(o.get("deferredCount", 0) for o in cluster)
             if dscore > 0 and max_def < k_max_defers:
                 for o in cluster:
@@ -527,7 +576,8 @@ def build_batches(enriched: List[Dict[str, Any]], cfg: Dict[str, Any], now: floa
                 continue  # zurückhalten
 
         # Kapazitäts-Gate (dynamische Zielauslastung)
-        while next_bucket_util(batches + [probe], orders_map, cfg, now) > target_util_eff:
+        probe_work = batch_work(probe, orders_map)
+        while ledger.util_at(next_bucket, (start_e, end_l, probe_work)) > target_util_eff:
             start_e += T; start_l += T; end_e += T; end_l += T
             probe["windowStart"]["earliest"] = start_e
             probe["windowStart"]["latest"]   = start_l
@@ -560,6 +610,7 @@ def build_batches(enriched: List[Dict[str, Any]], cfg: Dict[str, Any], now: floa
             "jaccardMatrix": jmatrix,
             "orderSequences": order_sequences
         })
+        ledger.add(start_e, end_l, probe_work)
         batch_idx += 1
         slot_cursor = max(slot_cursor + T, end_l)
 
@@ -640,39 +691,10 @@ def build_eta_list(
 # -----------------------------
 def utilization_forecast(batches: List[Dict[str, Any]],
                          orders_map: Dict[str, Dict[str, Any]],
-                         cfg: Dict[str, Any]) -> List[Dict[str, Any]]:
-    bucket = int(cfg["intervalMinutes"])
-    machines = max(1, int(cfg["machines"]))
-    shift = int(cfg.get("shiftMinutesPerDay", 480))
-    cap_bucket = machines * min(bucket, shift)
-
-    util = defaultdict(float)
-    for b in batches:
-        s = float(b["windowStart"]["earliest"])
-        e = float(b["windowEnd"]["latest"])
-        if e <= s:
-            continue
-        work = 0.0
-        for oid in b["orderIds"]:
-            order = orders_map.get(oid)
-            if order is None:
-                continue
-            work += float(order.get("processTimeTotal", order_proc_time(order)))
-        if work <= 0.0:
-            continue
-        per_min = work / (e - s)
-        t = int(s)
-        while t < e:
-            k = to_bucket(t, bucket)
-            util[k] += per_min * min(bucket, e - t)
-            t += bucket
-
-    out = []
-    for k in sorted(util.keys()):
-        wl = util[k]
-        util_ratio = 0.0 if cap_bucket <= 0 else min(1.0, wl / cap_bucket)
-        out.append({"bucketStart": k, "workloadMin": wl, "capacityMin": cap_bucket, "utilization": util_ratio})
-    return out
+                         cfg: Dict[str, Any]) -> Dict[str, Any]:
+    """Spalten bucketStart/workloadMin/capacityMin/utilization über den ganzen Horizont."""
+    shape = BucketLedger.for_config(cfg)
+    return utilization_columns(shape.bucket, shape.capacity, [batch_span(b, orders_map) for b in batches])
 
 # -----------------------------
 # CTP (Capable-to-Promise)
@@ -691,57 +713,56 @@ def ctp_promise_orders(new_orders: List[Dict[str, Any]],
     alpha = float(cfg["windows"]["alpha"])
     beta = float(cfg["windows"]["beta"])
     target_util = float(cfg.get("targetUtil", 0.5))
-    max_slots = int(cfg.get("ctpMaxSlots", 30))
-
-    preview_batches = list(batches)
-    preview_orders_map = dict(orders_map)
-    promises = []
-
-    for idx, n in enumerate(new_orders):
-        p = max(1.0, order_proc_time(n))
+    max_slots = int(cfg.get("ctpMaxSlots") or 0)
+
+    first_slot = (int(now // T) + 1) * T
+    procs = [max(1.0, order_proc_time(n)) for n in new_orders]
+    d_max = max(procs) / m
+    # Suche bis zur harten Deadline: alle Slots, deren Promise (Slot + Dauer + 10 % Puffer)
+    # noch vor der Deadline liegen kann (optional begrenzt durch ctpMaxSlots)
+    deadlines: List[float] = []
+    slot_counts: List[int] = []
+    for n, p in zip(new_orders, procs):
         due = n.get("dueDate")
         if not isinstance(due, (int, float)):
             due = now + days_to_min(30)
         hard_deadline = min(float(due), now + days_to_min(S))
+        n_slots = max(0, int((hard_deadline - first_slot - p / m - 0.1 * p) // T) + 2)
+        deadlines.append(hard_deadline)
+        slot_counts.append(min(max_slots, n_slots) if max_slots > 0 else n_slots)
+    # Kapazitätsprofil über den ganzen Suchhorizont; Zusagen werden direkt eingebucht
+    index = CapacityIndex.from_ledger(build_ledger(batches, orders_map, cfg),
+                                      first_slot - alpha * d_max,
+                                      first_slot + max(slot_counts) * T + (beta + 1.0) * d_max)
+    taken_ids = set(orders_map)
+    promises = []
 
-        slot_time = (int(now // T) + 1) * T
-        found = False
+    for idx, n in enumerate(new_orders):
+        p = procs[idx]
+        hard_deadline = deadlines[idx]
 
         base_id = str(n.get("orderId") or f"NEW-{idx}")
-        probe_id = base_id if base_id not in preview_orders_map else f"NEW-{base_id}-{idx}"
-
-        for attempt in range(max_slots):
-            duration_est = p / m
-            s_nom = float(slot_time)
-            start_e = s_nom - alpha * duration_est
-            start_l = s_nom + beta * duration_est
-            end_e = start_e + duration_est
-            end_l = start_l + duration_est
-
-            probe_batch = {
-                "id": f"ctp-probe-{probe_id}-{attempt}",
-                "orderIds": [probe_id],
-                "releaseAt": float(slot_time),
-                "windowStart": {"earliest": start_e, "latest": start_l},
-                "windowEnd": {"earliest": end_e, "latest": end_l}
-            }
-            probe_map = dict(preview_orders_map)
-            probe_map[probe_id] = {"processTimeTotal": p}
-            util_with = next_bucket_util(preview_batches + [probe_batch], probe_map, cfg, now)
+        probe_id = base_id if base_id not in taken_ids else f"NEW-{base_id}-{idx}"
 
+        # frühester Slot mit Auslastung <= Ziel in allen berührten Buckets;
+        # Promise wächst mit dem Slot, Slots hinter der Deadline werden gar nicht erst geprüft
+        duration_est = p / m
+        a = index.earliest_slot(first_slot, slot_counts[idx], alpha * duration_est, (beta + 1.0) * duration_est,
+                                p, target_util)
+        found = False
+        if a is not None:
+            slot_time = first_slot + a * T
             promise = slot_time + duration_est + 0.1 * p
-            if util_with <= target_util and promise <= hard_deadline:
+            if promise <= hard_deadline:
                 promises.append({
                     "orderId": n.get("orderId", probe_id),
                     "promisedDate": float(promise),
                     "method": "insert-light",
                     "confidence": 0.7
                 })
-                preview_batches.append(probe_batch)
-                preview_orders_map[probe_id] = {"processTimeTotal": p}
+                index.add(slot_time - alpha * duration_est, slot_time + beta * duration_est + duration_est, p)
+                taken_ids.add(probe_id)
                 found = True
-                break
-            slot_time += T
 
         if not found:
             promises.append({
@@ -816,7 +837,8 @@ def main():
         progress.append({"stage": "PAP_V2_STAGE", "step": "input_parsed"})
 
         # 1) Enrichment
-        enriched = enrich_orders(orders, cfg, now, global_sequences)
+        interner = StepInterner()
+        enriched = enrich_orders(orders, cfg, now, global_sequences, interner)
         orders_map = {o["orderId"]: o for o in enriched if "orderId" in o}
         seq_present = sum(1 for o in enriched if o.get("seqSet"))
         progress.append({"stage": "PAP_V2_STAGE", "step": "enrichment_done", "orders": len(enriched)})
@@ -838,7 +860,7 @@ def main():
                       "orders_missing_seq": len(enriched) - seq_present})
 
         # 2) Batching (mit Prognose-Hooks)
-        batches, deferred_list = build_batches(enriched, cfg, now, forecast)
+        batches, deferred_list = build_batches(enriched, cfg, now, forecast, interner)
         progress.append({"stage": "PAP_V2_STAGE", "step": "batching_done", "batches": len(batches)})
 
         # 3) ETA je Auftrag
@@ -876,7 +898,7 @@ def main():
             "stage": "SUMMARY",
             "batches": len(batches),
             "eta": len(eta_list),
-            "utilBuckets": len(util_fc),
+            "utilBuckets": len(util_fc["bucketStart"]),
             "ctp": len(ctp_preview),
             "deferred": len(deferred_list),
             "holdDecisions": len(hold_decisions),
@@ -898,7 +920,7 @@ def main():
         result = {
             "batches": [],
             "etaList": [],
-            "utilizationForecast": [],
+            "utilizationForecast": utilization_columns(1, 0.0, []),
             "ctpPreview": [],
             "deferredOrders": [],
             "holdDecisions": [],
@@ -10,6 +10,8 @@ import json
 import sys
 from typing import Dict, List, Any
 
+from bucket_ledger import utilization_columns
+
 def load_payload() -> Dict[str, Any]:
     """Lädt JSON-Payload von stdin. Bei leerem Input: leeres Dict."""
     try:
@@ -94,18 +96,14 @@ def main():
 
     debug_stages.append({"stage": "eta_built", "etaCount": len(eta_list)})
 
-    # 5. Utilization Forecast (trivial)
-    utilization_forecast = []
+    # 5. Utilization Forecast (trivial): das FIFO-Batch verteilt seine Arbeit gleichmäßig
+    # über [now, letzte ETA) – gleiche Spalten wie Becker_Terminierung_langfristig_v2.py
+    bucket = int(config.get("intervalMinutes", 120) or 120)
+    shift = int(config.get("shiftMinutesPerDay", 480) or 480)
+    spans = []
     if order_ids:
-        total_proc_time = sum(process_times.values())
-        makespan = cumulative_time - now if cumulative_time > now else 1.0
-        utilization = (total_proc_time / (makespan * total_machines)) * 100.0 if makespan > 0 else 0.0
-
-        utilization_forecast.append({
-            "bucketStart": now,
-            "bucketEnd": cumulative_time,
-            "utilization": min(100.0, utilization)
-        })
+        spans.append((now, cumulative_time, sum(process_times.values())))
+    utilization_forecast = utilization_columns(bucket, total_machines * min(bucket, shift), spans)
 
     # 6. Output zusammenstellen
     result = {
@@ -0,0 +1 @@
+"""Terminierungs-Algorithmen (PAP/PIP/PIPO). Einstieg als Dienst: python -m terminierung.serve"""
@@ -0,0 +1,310 @@
+"""
+bucket_ledger
+-------------
+
+Workload-Ledger pro Zeit-Bucket (intervalMinutes) für die Grobterminierung.
+
+Ein Los verteilt seinen Workload gleichmäßig über sein Fenster
+[windowStart.earliest, windowEnd.latest); auf einen Bucket entfällt
+work · overlap / (e - s). Bisher wurde diese Verteilung für jede Prüfung
+(Kapazitäts-Gate, DeferScore, CTP-Slot) über alle bisherigen Lose und deren
+Aufträge neu aufsummiert. Der Ledger hält die Summe pro Bucket:
+
+- add():       Los festschreiben, O(berührte Buckets)
+- util_at():   Auslastung eines Buckets, optional "was wäre wenn" mit einem
+               Probe-Fenster – ohne Kopie der Los-Liste oder Order-Map
+
+Die Beiträge werden in derselben Reihenfolge und mit demselben Ausdruck
+addiert wie in der bisherigen Schleife; die Werte sind bitgleich.
+
+CapacityIndex
+    Segmentbaum über einen dichten Bucket-Bereich (Horizont der
+    CTP-Slotsuche; Max- und Min-Baum). earliest_slot() sucht den ersten
+    Slot, in dem jeder vom Probe-Fenster berührte Bucket inkl. Probe-Anteil
+    <= Zielauslastung bleibt. Der Bucket des Slots selbst bekommt immer
+    denselben Anteil – der Min-Baum liefert in O(log B) den nächsten Slot,
+    der überhaupt in Frage kommt. Voll überdeckte Buckets bekommen ebenfalls
+    alle denselben Anteil; der Max-Baum findet den ersten blockierenden, und
+    die Suche springt direkt hinter ihn. Nur die (höchstens zwei)
+    Rand-Buckets werden einzeln geprüft. add() bucht eine Zusage ein,
+    O(berührte Buckets · log B).
+
+utilization_columns
+    Auslastungsprognose über den ganzen Horizont als Spalten (bucketStart,
+    workloadMin, capacityMin, utilization) auf einer dichten Bucket-Achse.
+    Mit NumPy als Differenz-Array: jedes Los addiert seine Rate work/(e - s)
+    am ersten und subtrahiert sie hinter dem letzten voll überdeckten
+    Bucket; ein cumsum × Bucketlänge liefert die vollen Anteile, die zwei
+    Rand-Anteile kommen per bincount dazu – ein Durchlauf für alle Lose,
+    unabhängig von der Fensterlänge. Ohne NumPy über den BucketLedger.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:  # optional – Differenz-Array für utilization_columns
+    import numpy as np  # type: ignore
+
+    HAS_NUMPY = True
+except Exception:  # pragma: no cover
+    HAS_NUMPY = False
+
+
+def window_share(k: int, bucket: int, start: float, end: float, work: float) -> float:
+    """Anteil eines Fensters [start, end) mit Workload `work` am Bucket [k, k + bucket)."""
+    if end <= start or work <= 0.0:
+        return 0.0
+    overlap = max(0.0, min(end, k + bucket) - max(start, k))
+    if overlap <= 0:
+        return 0.0
+    return work * (overlap / (end - start))
+
+
+def window_spread(bucket: int, start: float, end: float, work: float) -> Iterator[Tuple[int, float]]:
+    """(Bucket, Anteil) für alle Buckets, die das Fenster berührt."""
+    if end <= start or work <= 0.0:
+        return
+    k = int(start // bucket) * bucket
+    while k < end:
+        amount = window_share(k, bucket, start, end, work)
+        if amount:
+            yield k, amount
+        k += bucket
+
+
+class BucketLedger:
+    def __init__(self, bucket_minutes: int, capacity: float) -> None:
+        self.bucket = max(1, int(bucket_minutes))
+        self.capacity = capacity  # Kapazität pro Bucket (Maschinen × min(Bucket, Schicht))
+        self.load: Dict[int, float] = {}
+
+    @classmethod
+    def for_config(cls, cfg: Dict[str, Any]) -> "BucketLedger":
+        bucket = int(cfg["intervalMinutes"])
+        machines = max(1, int(cfg["machines"]))
+        shift = int(cfg.get("shiftMinutesPerDay", 480))
+        return cls(bucket, machines * min(bucket, shift))
+
+    def next_bucket(self, now: float) -> int:
+        """Start des ersten Buckets nach `now`."""
+        return (int(now // self.bucket) + 1) * self.bucket
+
+    def add(self, start: float, end: float, work: float) -> None:
+        load = self.load
+        for k, amount in window_spread(self.bucket, start, end, work):
+            load[k] = load.get(k, 0.0) + amount
+
+    def util_at(self, k: int, probe: Optional[Tuple[float, float, float]] = None) -> float:
+        """Auslastung von Bucket k (gedeckelt bei 1.0); `probe` = (start, end, work) wird nur gedanklich ergänzt."""
+        if self.capacity <= 0:
+            return 0.0
+        wl = self.load.get(k, 0.0)
+        if probe is not None:
+            wl += window_share(k, self.bucket, *probe)
+        return min(1.0, wl / self.capacity)
+
+
+class CapacityIndex:
+    def __init__(self, bucket_minutes: int, capacity: float, first_bucket: int, n_buckets: int) -> None:
+        self.bucket = max(1, int(bucket_minutes))
+        self.capacity = capacity
+        self.first = int(first_bucket)
+        self.n = max(1, int(n_buckets))
+        size = 1
+        while size < self.n:
+            size *= 2
+        self.size = size
+        # Blätter: Workload je Bucket; innere Knoten: Maximum bzw. Minimum der Kinder
+        self.high: List[float] = [0.0] * (2 * size)
+        self.low: List[float] = [0.0] * (2 * size)
+
+    @classmethod
+    def from_ledger(cls, ledger: BucketLedger, start: float, end: float) -> "CapacityIndex":
+        """Index über alle Buckets, die [start, end) berührt; Startwerte aus dem Ledger."""
+        b = ledger.bucket
+        first = int(start // b) * b
+        idx = cls(b, ledger.capacity, first, int(end // b) - int(start // b) + 1)
+        for k, wl in ledger.load.items():
+            i = (k - first) // b
+            if 0 <= i < idx.n:
+                idx.high[idx.size + i] = idx.low[idx.size + i] = wl
+        for node in range(idx.size - 1, 0, -1):
+            idx._pull(node)
+        return idx
+
+    def _pull(self, node: int) -> None:
+        l, r = 2 * node, 2 * node + 1
+        self.high[node] = max(self.high[l], self.high[r])
+        self.low[node] = min(self.low[l], self.low[r])
+
+    def load_at(self, k: int) -> float:
+        i = (k - self.first) // self.bucket
+        return self.high[self.size + i] if 0 <= i < self.n else 0.0
+
+    def add(self, start: float, end: float, work: float) -> None:
+        for k, amount in window_spread(self.bucket, start, end, work):
+            i = (k - self.first) // self.bucket
+            if not 0 <= i < self.n:
+                continue
+            node = self.size + i
+            self.high[node] += amount
+            self.low[node] = self.high[node]
+            node //= 2
+            while node:
+                self._pull(node)
+                node //= 2
+
+    def _find(self, k_lo: int, k_hi: int, hit: Callable[[int], bool]) -> Optional[int]:
+        """Erster Bucket-Start in [k_lo, k_hi], dessen Blatt `hit` erfüllt; `hit` muss für Elternknoten zulässig sein."""
+        lo = max(0, -int(-(k_lo - self.first) // self.bucket))
+        hi = min(self.n - 1, (k_hi - self.first) // self.bucket)
+        if lo > hi:
+            return None
+
+        def descend(node: int, nl: int, nr: int) -> Optional[int]:
+            if nr < lo or nl > hi or not hit(node):
+                return None
+            if nl == nr:
+                return nl
+            mid = (nl + nr) // 2
+            found = descend(2 * node, nl, mid)
+            return found if found is not None else descend(2 * node + 1, mid + 1, nr)
+
+        i = descend(1, 0, self.size - 1)
+        return None if i is None else self.first + i * self.bucket
+
+    def first_above(self, k_lo: int, k_hi: int, limit: float) -> Optional[int]:
+        """Erster Bucket-Start in [k_lo, k_hi] mit Workload > limit (oder None)."""
+        high = self.high
+        return self._find(k_lo, k_hi, lambda node: high[node] > limit)
+
+    def first_below(self, k_lo: int, k_hi: int, limit: float) -> Optional[int]:
+        """Erster Bucket-Start in [k_lo, k_hi] mit Workload <= limit (oder None)."""
+        low = self.low
+        return self._find(k_lo, k_hi, lambda node: low[node] <= limit)
+
+    def _first_blocker(self, k_lo: int, k_hi: int, start: float, end: float, work: float,
+                       target: float) -> Optional[int]:
+        """Erster voll überdeckte Bucket in [k_lo, k_hi], der mit dem Probe-Anteil über `target` kommt."""
+        b = self.bucket
+        # Baum mit etwas Toleranz als Filter, Entscheidung mit demselben Ausdruck wie util_at
+        limit = target * self.capacity - work * (b / (end - start)) - 1e-9 * self.capacity
+        while k_lo <= k_hi:
+            j = self.first_above(k_lo, k_hi, limit)
+            if j is None:
+                return None
+            if (self.load_at(j) + window_share(j, b, start, end, work)) / self.capacity > target:
+                return j
+            k_lo = j + b
+        return None
+
+    def earliest_slot(self, first_slot: int, n_slots: int, before: float, after: float,
+                      work: float, target: float) -> Optional[int]:
+        """
+        Kleinstes a < n_slots, sodass das Fenster [s - before, s + after) mit s = first_slot + a·bucket
+        (Slots = Bucket-Starts) in keinem berührten Bucket über `target` Auslastung kommt
+        (wie util_at: min(1, wl/cap)).
+        """
+        if n_slots <= 0:
+            return None
+        if self.capacity <= 0 or target >= 1.0:
+            return 0
+        b = self.bucket
+        last = first_slot + (n_slots - 1) * b
+        # notwendig: der Bucket des Slots selbst trägt immer work·min(after, b)/Fensterlänge
+        own_limit = target * self.capacity - work * (min(after, b) / (before + after)) + 1e-9 * self.capacity
+        k: Optional[int] = first_slot
+        while k is not None and k <= last:
+            k = self.first_below(k, last, own_limit)
+            if k is None:
+                return None
+            st, en = k - before, k + after
+            in_lo = -int(-st // b) * b        # erster voll überdeckter Bucket
+            in_hi = int(en // b) * b - b      # letzter voll überdeckter Bucket
+            blocker = self._first_blocker(in_lo, in_hi, st, en, work, target)
+            if blocker is not None:
+                # blockiert, solange der Bucket voll im Fenster liegt -> erst ab st > blocker weitersuchen
+                k = max(k + b, (int((blocker + before) // b) + 1) * b)
+                continue
+            ok = True
+            for e in (int(st // b) * b, int(en // b) * b):  # Rand-Buckets
+                if in_lo <= e <= in_hi or e >= en:
+                    continue
+                if (self.load_at(e) + window_share(e, b, st, en, work)) / self.capacity > target:
+                    ok = False
+                    break
+            if ok:
+                return (k - first_slot) // b
+            k += b
+        return None
+
+
+def utilization_columns(bucket_minutes: int, capacity: float,
+                        spans: Sequence[Tuple[float, float, float]]) -> Dict[str, Any]:
+    """
+    Auslastung je Bucket für alle Fenster `spans` = (start, end, work), dicht vom ersten bis zum
+    letzten berührten Bucket (leere Buckets mit 0). Werte wie BucketLedger (bis auf Rundung).
+    """
+    b = max(1, int(bucket_minutes))
+    if HAS_NUMPY:
+        starts, workload = _dense_workload_numpy(b, spans)
+    else:
+        starts, workload = _dense_workload_python(b, spans)
+    if capacity <= 0:
+        util = [0.0] * len(workload)
+    elif HAS_NUMPY:
+        util = np.minimum(1.0, np.asarray(workload) / capacity).tolist()
+    else:
+        util = [min(1.0, wl / capacity) for wl in workload]
+    return {
+        "bucketStart": starts,
+        "workloadMin": workload,
+        "capacityMin": [capacity] * len(workload),
+        "utilization": util,
+    }
+
+
+def _dense_workload_python(b: int, spans: Sequence[Tuple[float, float, float]]) -> Tuple[List[int], List[float]]:
+    ledger = BucketLedger(b, 0.0)
+    for start, end, work in spans:
+        ledger.add(start, end, work)
+    if not ledger.load:
+        return [], []
+    lo, hi = min(ledger.load), max(ledger.load)
+    starts = list(range(lo, hi + b, b))
+    return starts, [ledger.load.get(k, 0.0) for k in starts]
+
+
+def _dense_workload_numpy(b: int, spans: Sequence[Tuple[float, float, float]]) -> Tuple[List[int], List[float]]:
+    arr = np.asarray(spans, dtype=np.float64).reshape(-1, 3)
+    s, e, w = arr[:, 0], arr[:, 1], arr[:, 2]
+    keep = (e > s) & (w > 0.0)
+    s, e, w = s[keep], e[keep], w[keep]
+    if not len(s):
+        return [], []
+    rate = w / (e - s)
+    ks = np.floor_divide(s, b).astype(np.int64)               # Bucket des Fensterstarts
+    ke = np.floor_divide(e, b).astype(np.int64)               # Bucket des Fensterendes
+    tail = (ke > ks) & (e > ke * b)                            # Rest im End-Bucket
+    last = np.where(tail | (ke == ks), ke, ke - 1)
+    lo = int(ks.min())
+    n = int(last.max()) - lo + 1
+
+    # voll überdeckte Buckets ks+1 .. ke-1: Rate per Differenz-Array, Zähler gegen Rundungsreste
+    full = ke - ks - 1 > 0
+    diff = np.zeros(n + 1)
+    active = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(diff, ks[full] + 1 - lo, rate[full])
+    np.add.at(diff, ke[full] - lo, -rate[full])
+    np.add.at(active, ks[full] + 1 - lo, 1)
+    np.add.at(active, ke[full] - lo, -1)
+    workload = np.where(np.cumsum(active)[:n] > 0, np.cumsum(diff)[:n] * b, 0.0)
+
+    # Rand-Anteile: Start-Bucket immer, End-Bucket nur bei Rest
+    head = rate * (np.minimum(e, (ks + 1) * b) - s)
+    workload += np.bincount(ks - lo, weights=head, minlength=n)
+    workload += np.bincount(ke[tail] - lo, weights=rate[tail] * (e[tail] - ke[tail] * b), minlength=n)
+
+    starts = ((lo + np.arange(n, dtype=np.int64)) * b).tolist()
+    return starts, workload.tolist()
@@ -0,0 +1,68 @@
+"""
+genome_cache
+------------
+
+Genom-Keys und LRU-begrenzter Fitness-Cache für die Metaheuristiken
+(GA der mittelfristigen Terminierung, MOAHS der Feinterminierung).
+
+Ein Genom ist die Auftragsreihenfolge plus die Varianten-Wahl. Der Key ist
+ein 16-Byte-BLAKE2b darüber – kompakt genug, um zehntausende Einträge zu
+halten, ohne die Listen selbst zu speichern.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from array import array
+from collections import OrderedDict
+from typing import Dict, Generic, Optional, Sequence, TypeVar
+
+V = TypeVar("V")
+
+
+def genome_key(order_seq: Sequence[int], variant_seq: Sequence[int] = ()) -> bytes:
+    """Kompakter Cache-Key: 16-Byte-BLAKE2b über (Auftragsreihenfolge, -1, Varianten-Wahl)."""
+    return hashlib.blake2b(array("q", [*order_seq, -1, *variant_seq]).tobytes(), digest_size=16).digest()
+
+
+class FitnessCache(Generic[V]):
+    """
+    LRU-begrenzter Cache: Key (z.B. genome_key) -> Wert, höchstens `maxsize` Einträge.
+
+    Gedacht für kompakte Werte wie Kennzahlen, nicht für Timelines oder Op-Listen.
+    Wer mehr braucht, simuliert den Eintrag bei Bedarf neu bzw. baut das Ergebnis
+    selbst auf. So bleibt der Speicher konstant statt mit der Zahl der Bewertungen
+    zu wachsen.
+    """
+
+    def __init__(self, maxsize: int = 20000) -> None:
+        self.maxsize = max(1, int(maxsize))
+        self._data: "OrderedDict[bytes, V]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: bytes) -> Optional[V]:
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: bytes, value: V) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._data), "maxSize": self.maxsize, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
@@ -0,0 +1,190 @@
+"""
+harmony
+-------
+
+Hilfsstrukturen für die Harmony-Memory der Feinterminierung (MOAHS).
+
+PositionHistogram
+    Ähnlichkeit der Harmony Memory als Anteil übereinstimmender Positionen
+    über alle Plan-Paare. Statt jedes Paar Position für Position zu
+    vergleichen (O(HMS² · n)), wird gezählt, wie oft Auftrag j an Position p
+    steht: counts[p][j]. Die Zahl der übereinstimmenden Paare an p ist dann
+    Σ_j C(counts[p][j], 2). Der Wert wird beim Hinzufügen/Entfernen eines
+    Plans in O(n) nachgeführt, d.h. ein Austausch in der Memory kostet nur
+    die getauschten Pläne. Die Zählung ist ganzzahlig – das Ergebnis ist
+    identisch zum paarweisen Vergleich.
+
+HarmonyImproviser
+    Memory-Consideration für neue Harmonien, einmal pro Iteration aus der
+    aktuellen Harmony Memory aufgebaut statt pro Kandidat und Position:
+    - Plan-Wahl nach Rang-Gewicht 1/(idx+1) über eine Alias-Tabelle (O(1))
+    - Varianten-Wahl pro Auftrag (seltene Varianten bevorzugt) ebenfalls als
+      Alias-Tabelle über die in der Memory vorkommenden Varianten
+    UnusedPool hält die noch freien Aufträge als Swap-Remove-Array:
+    Prüfen, Entfernen und Zufallswahl in O(1).
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Dict, Iterable, List, Optional, Sequence
+
+try:  # optional – vektorisierte Zählmatrix
+    import numpy as np  # type: ignore
+
+    HAS_NUMPY = True
+except Exception:  # pragma: no cover
+    HAS_NUMPY = False
+
+
+class PositionHistogram:
+    def __init__(self, n: int, sequences: Iterable[Sequence[int]] = ()) -> None:
+        self.n = n
+        self.size = 0
+        self.pairs = 0  # übereinstimmende (Paar, Position)-Kombinationen
+        if HAS_NUMPY:
+            self._counts = np.zeros((n, n), dtype=np.int64)
+            self._positions = np.arange(n)
+        else:
+            self._flat: List[int] = [0] * (n * n)
+        for seq in sequences:
+            self.add(seq)
+
+    def add(self, sequence: Sequence[int]) -> None:
+        if HAS_NUMPY:
+            cells = (self._positions, np.asarray(sequence, dtype=np.intp))
+            self.pairs += int(self._counts[cells].sum())
+            self._counts[cells] += 1
+        else:
+            flat = self._flat
+            n = self.n
+            for pos, job in enumerate(sequence):
+                k = pos * n + job
+                self.pairs += flat[k]
+                flat[k] += 1
+        self.size += 1
+
+    def remove(self, sequence: Sequence[int]) -> None:
+        if HAS_NUMPY:
+            cells = (self._positions, np.asarray(sequence, dtype=np.intp))
+            self._counts[cells] -= 1
+            self.pairs -= int(self._counts[cells].sum())
+        else:
+            flat = self._flat
+            n = self.n
+            for pos, job in enumerate(sequence):
+                k = pos * n + job
+                flat[k] -= 1
+                self.pairs -= flat[k]
+        self.size -= 1
+
+    def similarity(self) -> float:
+        """Anteil gleicher Positionen über alle Plan-Paare (0 bei weniger als zwei Plänen)."""
+        total = (self.size * (self.size - 1) // 2) * self.n
+        if total <= 0:
+            return 0.0
+        return self.pairs / float(total)
+
+
+class AliasTable:
+    """Vose-Alias-Methode: Ziehen aus einer diskreten Verteilung in O(1)."""
+
+    def __init__(self, weights: Sequence[float]) -> None:
+        n = len(weights)
+        total = float(sum(weights))
+        self.n = n
+        self.prob: List[float] = [w * n / total for w in weights]
+        self.alias: List[int] = list(range(n))
+        small = [i for i, p in enumerate(self.prob) if p < 1.0]
+        large = [i for i, p in enumerate(self.prob) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self.alias[s] = l
+            self.prob[l] += self.prob[s] - 1.0
+            (small if self.prob[l] < 1.0 else large).append(l)
+        for i in small + large:  # Rest ist bis auf Rundung genau 1
+            self.prob[i] = 1.0
+
+    def sample(self, rng: random.Random) -> int:
+        # Ein Zufallswert: ganzzahliger Teil = Spalte, Nachkommateil = Münzwurf
+        u = rng.random() * self.n
+        i = min(int(u), self.n - 1)
+        return i if (u - i) < self.prob[i] else self.alias[i]
+
+
+class UnusedPool:
+    """Noch nicht vergebene Aufträge 0..n-1 (Swap-Remove-Array)."""
+
+    def __init__(self, n: int) -> None:
+        self.items: List[int] = list(range(n))
+        self.where: List[int] = list(range(n))
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __contains__(self, job: int) -> bool:
+        return self.where[job] >= 0
+
+    def take(self, job: int) -> None:
+        i = self.where[job]
+        last = self.items.pop()
+        if last != job:
+            self.items[i] = last
+            self.where[last] = i
+        self.where[job] = -1
+
+    def pick(self, rng: random.Random) -> int:
+        return self.items[int(rng.random() * len(self.items))]
+
+
+class HarmonyImproviser:
+    """
+    sequences[k] / variant_choices[k]: Plan k der Harmony Memory (Index 0 = bester).
+    memory_tries: gewichtete Plan-Ziehungen pro Position, bevor auf einen freien
+    Zufallsauftrag ausgewichen wird.
+    """
+
+    def __init__(
+        self,
+        sequences: Sequence[Sequence[int]],
+        variant_choices: Sequence[Sequence[int]] = (),
+        memory_tries: int = 3,
+    ) -> None:
+        self.sequences = [list(seq) for seq in sequences]
+        self.memory_tries = max(1, int(memory_tries))
+        self.plan_table = AliasTable([1.0 / (idx + 1) for idx in range(len(self.sequences))]) if self.sequences else None
+
+        # Varianten: Gewicht je Memory-Eintrag 1/(Häufigkeit + 0.5) -> je Wert count/(count + 0.5)
+        width = max((len(choices) for choices in variant_choices), default=0)
+        self.variant_values: List[List[int]] = []
+        self.variant_tables: List[Optional[AliasTable]] = []
+        for i in range(width):
+            counts: Dict[int, int] = {}
+            for choices in variant_choices:
+                if i < len(choices):
+                    counts[choices[i]] = counts.get(choices[i], 0) + 1
+            values = list(counts)
+            self.variant_values.append(values)
+            self.variant_tables.append(
+                AliasTable([counts[v] / (counts[v] + 0.5) for v in values]) if values else None
+            )
+
+    def memory_job(self, pos: int, unused: UnusedPool, rng: random.Random) -> Optional[int]:
+        """Auftrag an Position `pos` aus einem rang-gewichtet gezogenen Plan, falls noch frei."""
+        if self.plan_table is None:
+            return None
+        for _ in range(self.memory_tries):
+            cand = self.sequences[self.plan_table.sample(rng)][pos]
+            if cand in unused:
+                return cand
+        return None
+
+    def memory_variant(self, order_idx: int, rng: random.Random) -> Optional[int]:
+        """Variante für orders[order_idx] aus der Memory (seltene Varianten bevorzugt)."""
+        if order_idx >= len(self.variant_tables):
+            return None
+        table = self.variant_tables[order_idx]
+        if table is None:
+            return None
+        return self.variant_values[order_idx][table.sample(rng)]
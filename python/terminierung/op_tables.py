@@ -0,0 +1,90 @@
+"""
+op_tables
+---------
+
+Kompilierte, flache Op-Tabellen für die Kapazitätssimulationen
+(simulate_with_capacity in mittelfristiger und Feinterminierung).
+
+Die Simulationen laufen pro Optimierungslauf zehntausendfach. Statt bei
+jeder Auswertung pro Op stationId.lower(), "dem" in station, meta.step
+und float(expectedDuration) aus den Dicts zu lesen, wird jede Op-Liste
+einmal übersetzt in parallele Listen:
+
+  kinds[k]      KIND_DEM / KIND_MON
+  steps[k]      internierte Step-ID (int, 0 = kein Step/None)
+  durations[k]  erwartete Dauer als float
+  stations[k]   stationId in Kleinbuchstaben (nur für die Timeline)
+
+Eine Op-Liste (Auftrag bzw. Auftrag × Variante) ist danach nur noch ein
+Bereich (begin, end) in diesen Listen. Bewusst Python-Listen statt
+array.array: Indexzugriff auf Listen ist in CPython schneller, weil keine
+float-Objekte pro Zugriff neu erzeugt werden.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+KIND_DEM = 0
+KIND_MON = 1
+
+OpRange = Tuple[int, int]
+StepGetter = Callable[[Dict[str, Any]], Any]
+
+
+def meta_step(op: Dict[str, Any]) -> Any:
+    """Step aus meta.step (mittelfristige Terminierung)."""
+    meta = op.get("meta")
+    return meta.get("step") if isinstance(meta, dict) else None
+
+
+class OpTables:
+    def __init__(self, step_of: StepGetter = meta_step) -> None:
+        self.step_of = step_of
+        # Step-ID 0 ist für None reserviert, damit "kein Step" ein fester Wert bleibt
+        self.step_names: List[Any] = [None]
+        self.step_valid: List[bool] = [False]
+        self._step_ids: Dict[Any, int] = {None: 0}
+        self.kinds: List[int] = []
+        self.steps: List[int] = []
+        self.durations: List[float] = []
+        self.stations: List[str] = []
+
+    def intern_step(self, step: Any) -> int:
+        sid = self._step_ids.get(step)
+        if sid is None:
+            sid = len(self.step_names)
+            self._step_ids[step] = sid
+            self.step_names.append(step)
+            self.step_valid.append(bool(step))
+        return sid
+
+    def add(self, ops: Sequence[Dict[str, Any]]) -> OpRange:
+        """Op-Liste anhängen, liefert ihren Bereich (begin, end)."""
+        begin = len(self.kinds)
+        for op in ops:
+            station = (op.get("stationId") or "").lower()
+            self.kinds.append(KIND_DEM if "dem" in station else KIND_MON)
+            self.steps.append(self.intern_step(self.step_of(op)))
+            self.durations.append(float(op.get("expectedDuration") or 0.0))
+            self.stations.append(station)
+        return begin, len(self.kinds)
+
+    def step_name(self, sid: int) -> Any:
+        return self.step_names[sid]
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+
+def compile_op_lists(
+    op_lists: Sequence[Sequence[Sequence[Dict[str, Any]]]],
+    step_of: StepGetter = meta_step,
+) -> Tuple[OpTables, List[List[OpRange]]]:
+    """
+    op_lists[i][v] = Op-Liste von Auftrag i in Variante v.
+    Liefert (tables, ranges) mit ranges[i][v] = Bereich in den flachen Listen.
+    """
+    tables = OpTables(step_of)
+    ranges = [[tables.add(ops) for ops in variants] for variants in op_lists]
+    return tables, ranges
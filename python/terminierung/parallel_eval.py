@@ -0,0 +1,78 @@
+"""
+parallel_eval
+-------------
+
+Prozess-Pool-Bewertung für die Metaheuristiken (Varianten-GA der
+mittelfristigen Terminierung, MOAHS der Feinterminierung).
+
+Die Bewertungsfunktion (z.B. eine Methode des Bewertungskontexts mit
+Aufträgen, Op-Tabellen und Kapazitätsmodell) wird einmal pro Worker-Prozess
+übertragen, nicht pro Kandidat. Die Simulationen sind deterministisch und
+die Ergebnisse kommen in Eingabereihenfolge zurück – der Lauf ist daher
+bitgleich zur sequentiellen Bewertung.
+
+Fällt der Pool aus (BrokenProcessPool, Pickling-Fehler, Fehler im Worker),
+wird er geschlossen und der Rest des Laufs im Hauptprozess bewertet.
+"""
+
+from __future__ import annotations
+
+import math
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Generic, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Bewertungsfunktion im Worker-Prozess (gesetzt vom Pool-Initializer)
+_WORKER_EVALUATE: Optional[Callable[[Any], Any]] = None
+
+
+def _init_worker(evaluate: Callable[[Any], Any]) -> None:
+    global _WORKER_EVALUATE
+    _WORKER_EVALUATE = evaluate
+
+
+def _eval_in_worker(item: Any) -> Any:
+    return _WORKER_EVALUATE(item)  # type: ignore[misc]
+
+
+class ParallelEvaluator(Generic[T, R]):
+    """
+    Bewertet einen Batch von Kandidaten über einen Prozess-Pool mit `workers` Prozessen.
+    `evaluate` muss im Worker aufrufbar sein (bei fork geerbt, sonst gepickelt) und sollte
+    nur kompakte Ergebnisse liefern – Timelines über die Prozessgrenze kosten mehr als die
+    Simulation. `label` steht vor der Warnung beim Ausfall des Pools.
+    """
+
+    def __init__(self, evaluate: Callable[[T], R], workers: int, label: str = "") -> None:
+        self.evaluate = evaluate
+        self.workers = workers
+        self.label = label
+        # fork, wo verfügbar: das Skript muss im Kind nicht neu importiert werden
+        # (auch nicht, wenn es über terminierung.serve geladen wurde)
+        mp_context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+        self.executor: Optional[ProcessPoolExecutor] = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(evaluate,),
+        )
+
+    def __call__(self, items: Sequence[T]) -> List[R]:
+        if self.executor is not None:
+            chunksize = max(1, math.ceil(len(items) / (self.workers * 4)))
+            try:
+                return list(self.executor.map(_eval_in_worker, items, chunksize=chunksize))
+            except Exception as exc:
+                prefix = f"{self.label} " if self.label else ""
+                print(f"{prefix}WARNING: process pool failed ({exc!r}) - evaluating sequentially", file=sys.stderr)
+                self.close()
+        return [self.evaluate(item) for item in items]
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
@@ -0,0 +1,287 @@
+"""
+pareto
+------
+
+Nicht-dominierte Sortierung für die Feinterminierung (MOAHS, Minimierung
+von makespan / tardiness / idleTime).
+
+Die klassische Variante (Deb) vergleicht jedes Plan-Paar über dict-Lookups
+in Python – bei HMS im Bereich mehrerer Hundert Pläne dominiert das die
+Iterationszeit. Mit NumPy wird stattdessen die Metrik-Matrix (N × M) einmal
+per Broadcasting zur Dominanzmatrix D[i, j] = "i dominiert j" verrechnet,
+die Fronten werden spaltenweise abgeschält. Alles Weitere läuft vektorisiert
+in C; Python-Schleifen gibt es nur noch pro Front.
+
+Die Reihenfolge innerhalb der Fronten entspricht exakt der klassischen
+Variante (Front 1 nach Index, Front k+1 in der Reihenfolge, in der ihre
+Mitglieder beim Abarbeiten von Front k frei werden). Das ist wichtig, weil
+Crowding-Distance und Harmony-Memory-Reihenfolge bei identischen Metriken
+von der Eingangsreihenfolge abhängen.
+
+Ohne NumPy läuft die klassische Variante auf Tupeln.
+
+HypervolumeTracker
+    Hypervolumen der ersten Front gegen einen festen Referenzpunkt, als
+    Konvergenzmaß pro Iteration. Ändert sich die Front nur durch neue Punkte
+    (verdrängte Punkte sind von der neuen Front dominiert), wird nur der
+    exklusive Beitrag der neuen Punkte berechnet:
+        Beitrag(p, S) = Box(p, ref) - HV({max(p, s) | s in S})
+    Sonst (z.B. Crowding-Kürzung der Front) wird neu gerechnet. Das Volumen
+    selbst läuft per Slicing über das letzte Ziel mit 2D-Treppe pro Scheibe.
+
+ParetoArchive
+    Externes, unbegrenztes Archiv aller je gefundenen nicht-dominierten
+    Punkte (die Harmony Memory kürzt Fronten per Crowding). Die Punkte liegen
+    lexikographisch sortiert (erstes Ziel zuerst): ein Dominator von p ist
+    komponentenweise <= p und steht daher links von bisect_right(p), von p
+    dominierte Punkte rechts ab bisect_left(p). Geprüft wird nur der jeweils
+    passende Abschnitt statt des ganzen Archivs – bei drei Zielen sind das
+    im schlechtesten Fall O(n) Vergleiche pro add().
+    Bei zwei Zielen ist das Archiv eine Treppe (x steigend, y fallend): der
+    einzige Kandidat für einen Dominator ist der direkte Vorgänger, von p
+    dominierte Punkte bilden einen zusammenhängenden Lauf ab bisect_left(p).
+    add() braucht dort O(log n + k) Vergleiche (k = verdrängte Punkte) und
+    eine einzige Slice-Zuweisung.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, FrozenSet, Generic, List, Sequence, Tuple, TypeVar
+
+try:  # optional – vektorisierte Dominanzmatrix
+    import numpy as np  # type: ignore
+
+    HAS_NUMPY = True
+except Exception:  # pragma: no cover
+    HAS_NUMPY = False
+
+OBJECTIVES = ("makespan", "tardiness", "idleTime")
+
+Point = Sequence[float]
+T = TypeVar("T")
+
+
+def objective_vector(metrics: Dict[str, Any], keys: Sequence[str] = OBJECTIVES) -> tuple:
+    return tuple(metrics[k] for k in keys)
+
+
+def dominates(a: Point, b: Point) -> bool:
+    """a dominiert b: in keinem Ziel schlechter, in mindestens einem besser."""
+    strictly_better = False
+    for x, y in zip(a, b):
+        if x > y:
+            return False
+        if x < y:
+            strictly_better = True
+    return strictly_better
+
+
+def non_dominated_fronts(points: Sequence[Point]) -> List[List[int]]:
+    """Fronten als Index-Listen (Front 1 zuerst), Reihenfolge wie die klassische Sortierung."""
+    if not points:
+        return []
+    if HAS_NUMPY:
+        return _fronts_numpy(points)
+    return _fronts_python(points)
+
+
+def _fronts_numpy(points: Sequence[Point]) -> List[List[int]]:
+    M = np.asarray(points, dtype=float)
+    if M.ndim != 2:
+        M = M.reshape(len(points), -1)
+    a = M[:, None, :]
+    b = M[None, :, :]
+    D = (a <= b).all(axis=2) & (a < b).any(axis=2)                      # D[i, j]: i dominiert j
+    n_dom = D.sum(axis=0)
+
+    fronts: List[List[int]] = []
+    current = np.flatnonzero(n_dom == 0)
+    while current.size:
+        fronts.append(current.tolist())
+        n_dom -= D[current].sum(axis=0)
+        n_dom[current] = -1                                                # bereits zugeordnet
+        freed = np.flatnonzero(n_dom == 0)
+        if not freed.size:
+            break
+        # Klassische Reihenfolge: j wird beim letzten Dominator aus Front k frei,
+        # bei gleichem Dominator nach Index
+        sub = D[np.ix_(current, freed)]
+        last = (len(current) - 1) - np.argmax(sub[::-1], axis=0)
+        current = freed[np.lexsort((freed, last))]
+    return fronts
+
+
+def _fronts_python(points: Sequence[Point]) -> List[List[int]]:
+    n = len(points)
+    S: List[List[int]] = [[] for _ in range(n)]
+    n_dom = [0] * n
+    for i in range(n):
+        p = points[i]
+        for j in range(n):
+            if i == j:
+                continue
+            if dominates(p, points[j]):
+                S[i].append(j)
+            elif dominates(points[j], p):
+                n_dom[i] += 1
+    fronts: List[List[int]] = []
+    current = [i for i in range(n) if n_dom[i] == 0]
+    while current:
+        fronts.append(current)
+        next_front: List[int] = []
+        for i in current:
+            for j in S[i]:
+                n_dom[j] -= 1
+                if n_dom[j] == 0:
+                    next_front.append(j)
+        current = next_front
+    return fronts
+
+
+def hypervolume(points: Sequence[Point], reference: Point) -> float:
+    """Von `points` dominiertes Volumen bis `reference` (Minimierung; Punkte jenseits ref zählen nicht)."""
+    pts = [tuple(p) for p in points if all(x < r for x, r in zip(p, reference))]
+    if not pts:
+        return 0.0
+    return _hv_slices(pts, tuple(reference))
+
+
+def _hv_slices(pts: List[Tuple[float, ...]], ref: Tuple[float, ...]) -> float:
+    d = len(ref)
+    if d == 1:
+        return ref[0] - min(p[0] for p in pts)
+    if d == 2:
+        # Treppe: nach x aufsteigend, nur Punkte mit neuem y-Minimum tragen bei
+        area = 0.0
+        best_y = ref[1]
+        for x, y in sorted(pts):
+            if y < best_y:
+                area += (ref[0] - x) * (best_y - y)
+                best_y = y
+        return area
+    # Scheiben entlang des letzten Ziels: zwischen z_i und z_{i+1} gilt die (d-1)-Front aller Punkte mit z <= z_i
+    pts = sorted(pts, key=lambda p: p[-1])
+    volume = 0.0
+    for i, p in enumerate(pts):
+        upper = pts[i + 1][-1] if i + 1 < len(pts) else ref[-1]
+        if upper > p[-1]:
+            volume += _hv_slices([q[:-1] for q in pts[: i + 1]], ref[:-1]) * (upper - p[-1])
+    return volume
+
+
+class HypervolumeTracker:
+    def __init__(self, reference: Point) -> None:
+        self.reference = tuple(float(r) for r in reference)
+        self.value = 0.0
+        self.incremental_updates = 0
+        self.full_updates = 0
+        self._front: FrozenSet[Tuple[float, ...]] = frozenset()
+
+    def _contribution(self, p: Tuple[float, ...], others: Sequence[Tuple[float, ...]]) -> float:
+        box = 1.0
+        for x, r in zip(p, self.reference):
+            box *= r - x
+        limited = [tuple(max(a, b) for a, b in zip(p, q)) for q in others]
+        return box - hypervolume(limited, self.reference)
+
+    def update(self, points: Sequence[Point]) -> float:
+        """Neuer Stand der Punktmenge (z.B. Metriken der Harmony Memory); liefert das Hypervolumen."""
+        inside = list({tuple(p) for p in points if all(x < r for x, r in zip(p, self.reference))})
+        front = frozenset(inside[i] for i in non_dominated_fronts(inside)[0]) if inside else frozenset()
+        if front == self._front:
+            return self.value
+        added = front - self._front
+        removed = self._front - front
+        if all(any(_weakly_dominates(q, p) for q in added) for p in removed):
+            # HV(neue Front) = HV(alte Front ∪ neue Punkte): nur exklusive Beiträge addieren
+            current = list(self._front)
+            for p in sorted(added):
+                self.value += self._contribution(p, current)
+                current.append(p)
+            self.incremental_updates += 1
+        else:
+            self.value = hypervolume(list(front), self.reference)
+            self.full_updates += 1
+        self._front = front
+        return self.value
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "reference": list(self.reference),
+            "frontSize": len(self._front),
+            "incrementalUpdates": self.incremental_updates,
+            "fullUpdates": self.full_updates,
+        }
+
+
+def _weakly_dominates(a: Point, b: Point) -> bool:
+    return all(x <= y for x, y in zip(a, b))
+
+
+def reference_point(points: Sequence[Point], margin: float = 0.1) -> Tuple[float, ...]:
+    """Fester Referenzpunkt: schlechtester Wert je Ziel plus Abstand (mind. 1), damit Randpunkte beitragen."""
+    worst = [max(col) for col in zip(*points)]
+    return tuple(w + max(1.0, abs(w) * margin) for w in worst)
+
+
+class ParetoArchive(Generic[T]):
+    def __init__(self) -> None:
+        self._points: List[Tuple[float, ...]] = []
+        self._items: List[T] = []
+        self.inserted = 0
+        self.rejected = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def items(self) -> List[T]:
+        """Archivierte Elemente, sortiert nach (erstes Ziel, zweites Ziel, ...)."""
+        return list(self._items)
+
+    def points(self) -> List[Tuple[float, ...]]:
+        return list(self._points)
+
+    def add(self, point: Point, item: T) -> bool:
+        """Fügt `item` ein, falls `point` von keinem Archivpunkt (schwach) dominiert wird; verdrängt dominierte."""
+        p = tuple(point)
+        if len(p) == 2:
+            return self._add_staircase(p, item)
+        points = self._points
+        hi = bisect_right(points, p)
+        for i in range(hi):
+            if _weakly_dominates(points[i], p):
+                self.rejected += 1
+                return False
+        lo = bisect_left(points, p)
+        keep = [i for i in range(lo, len(points)) if not _weakly_dominates(p, points[i])]
+        removed = (len(points) - lo) - len(keep)
+        if removed:
+            self._points[lo:] = [points[i] for i in keep]
+            self._items[lo:] = [self._items[i] for i in keep]
+            self.evicted += removed
+        self._points.insert(lo, p)
+        self._items.insert(lo, item)
+        self.inserted += 1
+        return True
+
+    def _add_staircase(self, p: Tuple[float, ...], item: T) -> bool:
+        points = self._points
+        lo = bisect_left(points, p)
+        # Vorgänger (bzw. gleicher Punkt) hat das kleinste y aller Punkte mit x <= p.x
+        hi = lo + 1 if lo < len(points) and points[lo] == p else lo
+        if hi and points[hi - 1][1] <= p[1]:
+            self.rejected += 1
+            return False
+        end = lo
+        while end < len(points) and points[end][1] >= p[1]:
+            end += 1
+        self._points[lo:end] = [p]
+        self._items[lo:end] = [item]
+        self.evicted += end - lo
+        self.inserted += 1
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._points), "inserted": self.inserted, "rejected": self.rejected, "evicted": self.evicted}
@@ -0,0 +1,80 @@
+"""
+progress_stream
+---------------
+
+Optionaler Fortschrittskanal für langlaufende Optimierer (GA in der
+mittelfristigen Terminierung, MOAHS in der Feinterminierung).
+
+Pro Generation/Iteration wird eine NDJSON-Zeile geschrieben:
+
+  {"type": "progress", "stage": "PIPO_MOAHS", "iteration": 12, "evaluations": 325,
+   "elapsedMs": 812.4, "best": {...}, "bestSequence": ["order-1", ...]}
+
+Standardmäßig landen die Zeilen auf stderr (runPythonOnce filtert sie dort
+heraus). terminierung.serve setzt per set_sink() einen eigenen Sink und
+schickt die Events als Protokoll-Nachrichten mit der Request-ID zurück.
+
+Aktivierung über config.progress = true im Payload; ohne Flag ist der
+Reporter ein No-op.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, Optional, Sequence
+
+ProgressSink = Callable[[Dict[str, Any]], None]
+
+_SINK: Optional[ProgressSink] = None
+
+
+def set_sink(sink: Optional[ProgressSink]) -> None:
+    """Eigenen Empfänger setzen (None = zurück auf stderr)."""
+    global _SINK
+    _SINK = sink
+
+
+def _write_stderr(event: Dict[str, Any]) -> None:
+    sys.stderr.write(json.dumps(event) + "\n")
+    sys.stderr.flush()
+
+
+class ProgressReporter:
+    def __init__(self, stage: str, enabled: bool) -> None:
+        self.stage = stage
+        self.enabled = enabled
+        self.started = time.monotonic()
+        self.last_event: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], stage: str) -> "ProgressReporter":
+        return cls(stage, bool(config.get("progress")))
+
+    def elapsed_ms(self) -> float:
+        return (time.monotonic() - self.started) * 1000.0
+
+    def emit(
+        self,
+        iteration: int,
+        evaluations: int,
+        best: Dict[str, float],
+        best_sequence: Optional[Sequence[str]] = None,
+        **extra: Any,
+    ) -> None:
+        if not self.enabled:
+            return
+        event: Dict[str, Any] = {
+            "type": "progress",
+            "stage": self.stage,
+            "iteration": iteration,
+            "evaluations": evaluations,
+            "elapsedMs": round(self.elapsed_ms(), 1),
+            "best": best,
+        }
+        if best_sequence is not None:
+            event["bestSequence"] = list(best_sequence)
+        event.update(extra)
+        self.last_event = event
+        (_SINK or _write_stderr)(event)
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+terminierung.serve
+------------------
+
+Ein Prozess für alle Terminierungs-Skripte. Statt pro Tick `python3 skript.py`
+zu starten, werden die Algorithmus-Module hier lazy importiert und unter dem
+Skriptnamen registriert, den algorithm-bundle.actions.ts speichert
+(z.B. "python/terminierung/Becker_Feinterminierung_v2.py").
+
+Aufruf (aus dem Verzeichnis python/):
+
+  python -m terminierung.serve [--preload SKRIPT ...]          # NDJSON über stdin/stdout
+  python -m terminierung.serve --socket /tmp/terminierung.sock  # NDJSON über Unix-Socket
+
+Protokoll (eine Zeile = ein JSON-Objekt):
+
+  -> {"id": 1, "type": "run", "script": "python/terminierung/pap.py", "payload": {...}}
+  <- {"id": 1, "ok": true, "result": {...}, "stderr": "..."}
+  <- {"id": 1, "ok": false, "error": "...", "stderr": "..."}
+
+  -> {"id": 2, "type": "ping"}
+  <- {"id": 2, "ok": true, "pong": true, "pid": 1234, "handled": 17}
+
+  -> {"id": 3, "type": "scripts"}
+  <- {"id": 3, "ok": true, "scripts": [...], "loaded": [...]}
+
+Mit config.progress = true im Payload kommen vor der Antwort Zwischenstände
+der Optimierer (siehe progress_stream.py) mit derselben ID:
+
+  <- {"id": 1, "type": "progress", "stage": "PIPO_MOAHS", "iteration": 3, ...}
+
+Registrierte Skripte mit schedule_payload()/_schedule() werden direkt
+aufgerufen; Skripte, deren Logik nur in main() steckt, laufen mit umgebogenem
+stdin/stdout (worker.run_main). Nicht registrierte Pfade (eigene Bundles)
+werden per Dateipfad geladen (worker.load_script_module) und ebenfalls über
+main() ausgeführt.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import io
+import json
+import os
+import socketserver
+import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any, Callable, Dict, IO, Iterable, List, Optional, Tuple
+
+from .worker import MODULES as _MODULES, load_script_module, run_main
+
+TERMINIERUNG_DIR = os.path.dirname(os.path.abspath(__file__))
+PYTHON_DIR = os.path.dirname(TERMINIERUNG_DIR)
+PROJECT_ROOT = os.path.dirname(PYTHON_DIR)
+
+
+@dataclass(frozen=True)
+class ScriptEntry:
+    module: str                  # importierbarer Modulname
+    entry: str = "main"          # schedule_payload | _schedule | main
+
+
+# Bundle-Skriptname (relativ zum Projekt-Root, wie in der DB) -> Modul + Einstiegspunkt
+REGISTRY: Dict[str, ScriptEntry] = {
+    "python/terminierung/pap.py": ScriptEntry("terminierung.pap"),
+    "python/terminierung/pip.py": ScriptEntry("terminierung.pip"),
+    "python/terminierung/pipo.py": ScriptEntry("terminierung.pipo"),
+    "python/terminierung/FIFO_langfristig.py": ScriptEntry("terminierung.FIFO_langfristig"),
+    "python/terminierung/FIFO_mittelfristig.py": ScriptEntry("terminierung.FIFO_mittelfristig"),
+    "python/terminierung/FIFO_kurzfristig.py": ScriptEntry("terminierung.FIFO_kurzfristig"),
+    "python/terminierung/Becker_Terminierung_langfristig.py": ScriptEntry("terminierung.Becker_Terminierung_langfristig"),
+    "python/terminierung/Becker_Terminierung_langfristig_v2.py": ScriptEntry("terminierung.Becker_Terminierung_langfristig_v2"),
+    "python/terminierung/Ansatz_Becker_Mittelfristige_Terminierung.py": ScriptEntry(
+        "terminierung.Ansatz_Becker_Mittelfristige_Terminierung", "schedule_payload"
+    ),
+    "python/terminierung/Becker_Mittelfristige_Terminierung_v2.py": ScriptEntry(
+        "terminierung.Becker_Mittelfristige_Terminierung_v2", "schedule_payload"
+    ),
+    "python/terminierung/Ansatz_Becker_Feinterminierung.py": ScriptEntry(
+        "terminierung.Ansatz_Becker_Feinterminierung", "_schedule"
+    ),
+    "python/terminierung/Becker_Feinterminierung_v2.py": ScriptEntry(
+        "terminierung.Becker_Feinterminierung_v2", "_schedule"
+    ),
+    "python/operators/pap.py": ScriptEntry("operators.pap"),
+}
+
+def _ensure_import_paths() -> None:
+    # python/ für "terminierung.*"/"operators.*", terminierung/ für Geschwister-Importe der Skripte
+    for path in (PYTHON_DIR, TERMINIERUNG_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def normalize_script_name(script: str) -> str:
+    """Absoluten oder relativen Skriptpfad auf den Bundle-Namen (posix, relativ zum Projekt) abbilden."""
+    path = script if os.path.isabs(script) else os.path.join(PROJECT_ROOT, script)
+    path = os.path.normpath(path)
+    try:
+        rel = os.path.relpath(path, PROJECT_ROOT)
+    except ValueError:
+        return path
+    if rel.startswith(".."):
+        return path
+    return rel.replace(os.sep, "/")
+
+
+def _module_file(module_name: str) -> str:
+    return os.path.join(PYTHON_DIR, *module_name.split(".")) + ".py"
+
+
+def load_registered_module(entry: ScriptEntry) -> ModuleType:
+    """Lazy-Import eines registrierten Moduls; bei geänderter Datei wird neu geladen."""
+    _ensure_import_paths()
+    mtime = os.path.getmtime(_module_file(entry.module))
+    cached = _MODULES.get(entry.module)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    if cached is not None:
+        module = importlib.reload(cached[1])
+    else:
+        module = importlib.import_module(entry.module)
+    _MODULES[entry.module] = (mtime, module)
+    return module
+
+
+def resolve_script(script: str) -> Tuple[ModuleType, str]:
+    name = normalize_script_name(script)
+    entry = REGISTRY.get(name)
+    if entry is not None:
+        return load_registered_module(entry), entry.entry
+    path = name if os.path.isabs(name) else os.path.join(PROJECT_ROOT, name)
+    _ensure_import_paths()
+    return load_script_module(path), "main"
+
+
+def run_script(script: str, payload: Any) -> Tuple[Any, str]:
+    """Führt die Scheduling-Funktion eines Skripts aus und liefert (result, stderr)."""
+    module, entry = resolve_script(script)
+    stderr_buf = io.StringIO()
+    func: Optional[Callable[[Dict[str, Any]], Any]] = getattr(module, entry, None) if entry != "main" else None
+    if func is None:
+        return run_main(module, payload, stderr_buf), stderr_buf.getvalue()
+
+    try:
+        # Verirrte print()-Ausgaben dürfen das NDJSON-Protokoll nicht zerstören
+        with redirect_stdout(stderr_buf), redirect_stderr(stderr_buf):
+            result = func(payload if isinstance(payload, dict) else {})
+        # Einmal durch JSON, damit das Ergebnis exakt der main()-Ausgabe entspricht
+        return json.loads(json.dumps(result)), stderr_buf.getvalue()
+    except Exception as exc:
+        # Fehlerformat (PIP_V2_ERROR, PIPO_ERROR, ...) liefert das Skript selbst – ohne zweiten Lauf.
+        # Skripte ohne error_result() brechen auch im Einzelprozess ab -> ok: false mit Original-Traceback.
+        build_error = getattr(module, "error_result", None)
+        if not callable(build_error):
+            raise
+        traceback.print_exc(file=stderr_buf)
+        return json.loads(json.dumps(build_error(exc))), stderr_buf.getvalue()
+
+
+class Dispatcher:
+    def __init__(self) -> None:
+        self.handled = 0
+
+    def handle(self, request: Dict[str, Any], emit: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        req_id = request.get("id")
+        req_type = request.get("type", "run")
+        if req_type == "ping":
+            return {"id": req_id, "ok": True, "pong": True, "pid": os.getpid(), "handled": self.handled}
+        if req_type == "scripts":
+            return {"id": req_id, "ok": True, "scripts": sorted(REGISTRY), "loaded": sorted(_MODULES)}
+        if req_type != "run":
+            return {"id": req_id, "ok": False, "error": f"Unknown request type: {req_type}"}
+
+        script = request.get("script")
+        if not script:
+            return {"id": req_id, "ok": False, "error": "Missing 'script'"}
+        self.handled += 1
+        _ensure_import_paths()
+        import progress_stream  # gleicher Modulname wie in den Skripten (Import über terminierung/)
+
+        if emit is not None:
+            progress_stream.set_sink(lambda event: emit({"id": req_id, **event}))
+        try:
+            result, stderr = run_script(str(script), request.get("payload") or {})
+            return {"id": req_id, "ok": True, "result": result, "stderr": stderr.strip()}
+        except BaseException as exc:  # inkl. SystemExit aus Skripten
+            return {
+                "id": req_id,
+                "ok": False,
+                "error": f"{type(exc).__name__}: {exc}",
+                "stderr": traceback.format_exc(),
+            }
+        finally:
+            progress_stream.set_sink(None)
+
+    def serve_stream(self, lines: Iterable[str], out: IO[str]) -> None:
+        def write(message: Dict[str, Any]) -> None:
+            out.write(json.dumps(message) + "\n")
+            out.flush()
+
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except Exception as exc:
+                response: Dict[str, Any] = {"id": None, "ok": False, "error": f"Invalid JSON request: {exc}"}
+            else:
+                response = self.handle(request, emit=write)
+            write(response)
+
+
+def preload(scripts: List[str]) -> None:
+    for script in scripts:
+        try:
+            resolve_script(script)
+        except Exception as exc:
+            print(f"[serve] preload failed for {script}: {exc}", file=sys.stderr)
+
+
+def serve_socket(dispatcher: Dispatcher, socket_path: str) -> None:
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            reader = io.TextIOWrapper(self.rfile, encoding="utf-8")
+            writer = io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True)
+            dispatcher.serve_stream(reader, writer)
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    # Bewusst nicht threaded: die Skripte biegen sys.stdin/stdout um und sind nicht thread-safe
+    with socketserver.UnixStreamServer(socket_path, Handler) as server:
+        print(f"[serve] listening on {socket_path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(socket_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="NDJSON dispatcher for terminierung scripts")
+    parser.add_argument("--socket", help="Unix socket path (default: stdin/stdout)")
+    parser.add_argument("--preload", nargs="*", default=[], help="scripts to import at startup")
+    args = parser.parse_args()
+
+    _ensure_import_paths()
+    preload(args.preload)
+    dispatcher = Dispatcher()
+    if args.socket:
+        serve_socket(dispatcher, args.socket)
+    else:
+        dispatcher.serve_stream(sys.stdin, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+sim_checkpoints
+---------------
+
+Prefix-Checkpoints für die Kapazitätssimulationen (Delta-Re-Simulation).
+
+Swap-Mutation, Crossover und Pitch-Adjustment ändern oft nur einen Suffix der
+Auftragsreihenfolge. Die Simulatoren legen deshalb alle `interval` Positionen
+einen Schnappschuss ihres Zustands ab (Maschinenverfügbarkeit, letzter Step,
+Zähler, Ergebnisse des gerade abgeschlossenen Blocks). Ein neuer Kandidat, der
+einen Präfix mit einem bereits simulierten Kandidaten teilt, setzt beim tiefsten
+passenden Checkpoint auf und simuliert nur den Rest.
+
+Die Schnappschüsse liegen in einem Trie über Blöcken von `interval` Tokens
+(ein Token pro Position, z.B. (order_idx, variant)). Die Keys sind die exakten
+Token-Tupel, es gibt also keine Hash-Kollisionen; das Ergebnis ist bitgleich zur
+vollständigen Simulation. Der Zustand eines Knotens enthält nur die Ergebnisse
+seines eigenen Blocks, beim Wiederaufsetzen sammelt der Aufrufer die Blöcke
+entlang des Pfads ein (resume liefert sie mit).
+
+Bei mehr als `max_states` Schnappschüssen wird der Trie verworfen und neu
+aufgebaut – einfacher als LRU über Trie-Knoten und für GA/MOAHS ausreichend,
+da die aktuelle Population ihn sofort wieder füllt. Der Kandidat, der den Reset
+auslöst, legt danach keine Schnappschüsse mehr ab (sein Pfad hängt nicht mehr
+am neuen Trie); ab dem nächsten resume() wird wieder gespeichert.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Hashable, List, Sequence, Tuple
+
+_Node = Dict[Tuple[Hashable, ...], Tuple[Any, "_Node"]]
+
+# Knoten nach einem Reset: save() legt darunter nichts ab
+_DETACHED: _Node = {}
+
+
+class PrefixCheckpoints:
+    def __init__(self, interval: int = 8, max_states: int = 20000) -> None:
+        self.interval = max(1, int(interval))
+        self.max_states = max(1, int(max_states))
+        self._roots: Dict[Hashable, _Node] = {}
+        self.states = 0
+        self.resumes = 0
+        self.positions_skipped = 0
+        self.resets = 0
+
+    def root(self, context: Hashable = None) -> _Node:
+        """Trie-Wurzel für einen Kontext (z.B. die Vorab-Zuweisung der fixen Stationen)."""
+        node = self._roots.get(context)
+        if node is None:
+            node = self._roots[context] = {}
+        return node
+
+    def resume(self, tokens: Sequence[Hashable], context: Hashable = None) -> Tuple[int, List[Any], _Node]:
+        """
+        Tiefsten Checkpoint für den Präfix von `tokens` suchen.
+        Liefert (Position, Zustände entlang des Pfads, Knoten zum Weiterschreiben).
+        Es wird nie die volle Länge zurückgegeben – mindestens der letzte Block wird simuliert.
+        """
+        node = self.root(context)
+        k = self.interval
+        path: List[Any] = []
+        pos = 0
+        limit = len(tokens) - 1
+        while pos + k <= limit:
+            entry = node.get(tuple(tokens[pos:pos + k]))
+            if entry is None:
+                break
+            state, node = entry
+            path.append(state)
+            pos += k
+        if pos:
+            self.resumes += 1
+            self.positions_skipped += pos
+        return pos, path, node
+
+    def save(self, node: _Node, block: Tuple[Hashable, ...], state: Any) -> _Node:
+        """Schnappschuss nach `block` unter `node` ablegen, liefert den Kindknoten."""
+        if node is _DETACHED:
+            return node
+        if self.states >= self.max_states:
+            self._roots.clear()
+            self.states = 0
+            self.resets += 1
+            return _DETACHED
+        entry = node.get(block)
+        if entry is not None:
+            return entry[1]
+        child: _Node = {}
+        node[block] = (state, child)
+        self.states += 1
+        return child
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "interval": self.interval,
+            "states": self.states,
+            "resumes": self.resumes,
+            "positionsSkipped": self.positions_skipped,
+            "resets": self.resets,
+        }
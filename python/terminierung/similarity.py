@@ -0,0 +1,238 @@
+"""
+similarity
+----------
+
+Mengenähnlichkeit (Jaccard) für das Batching der Terminierungsskripte.
+
+StepInterner / Bitmasken
+    Step- bzw. Op-Signatur-Strings bekommen beim ersten Auftreten eine
+    Bitposition; jeder Auftrag wird als int-Bitmaske gespeichert. Jaccard ist
+    dann popcount(a & b) / popcount(a | b) – ohne Mengen-Objekte pro Paar.
+    Ganze Matrizen (Batch-Debug-Ausgabe) laufen ab MATRIX_NUMPY_MIN Aufträgen
+    vektorisiert: Masken als Byte-Matrix, popcount per 256er-Tabelle über
+    alle Paare auf einmal. Die Werte sind identisch zur Mengenvariante
+    (gleiche ganzzahlige Zähler/Nenner, eine float-Division).
+    `empty` ist der Wert für zwei leere Mengen – die Skripte unterscheiden
+    sich hier (langfristig 0.0, mittelfristig 1.0).
+
+MinHashLSH
+    Kandidatensuche für Jaccard >= Schwelle, ohne alle Paare zu vergleichen.
+    Jede Menge bekommt eine MinHash-Signatur aus num_perm Hashfunktionen
+    h_i(x) = (a_i·x + b_i) mod P über einen stabilen Hash des Tokens (nicht
+    Pythons hash() – der ist pro Prozess gesalzen). Es gilt
+    P[min h_i(A) = min h_i(B)] = J(A, B). Die Signatur wird in b Bänder zu
+    je r Zeilen geteilt; Mengen mit einem gleichen Band landen im selben
+    Bucket. r wird aus der Schwelle s gewählt, sodass ein Paar mit J = s mit
+    mindestens `recall` Wahrscheinlichkeit Kandidat wird: 1 - (1 - s^r)^b.
+    Kandidaten werden vom Aufrufer exakt geprüft – es gibt keine falschen
+    Treffer, nur (seltene) verpasste Paare knapp an der Schwelle.
+
+    Mit NumPy werden alle Signaturen auf einmal gebildet (minimum.reduceat)
+    und die Bänder per np.unique gruppiert; ohne NumPy dieselben Hashes in
+    Python – die Kandidaten sind in beiden Fällen identisch.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import random
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+try:  # optional – vektorisierte Signaturen und Bänder
+    import numpy as np  # type: ignore
+
+    HAS_NUMPY = True
+except Exception:  # pragma: no cover
+    HAS_NUMPY = False
+
+# Mersenne-Primzahl 2^31-1: a·x + b bleibt in int64
+_PRIME = (1 << 31) - 1
+
+# Ab dieser Matrixgröße lohnt der NumPy-Overhead
+MATRIX_NUMPY_MIN = 16
+
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+else:  # pragma: no cover - Python < 3.10
+    def popcount(x: int) -> int:
+        return bin(x).count("1")
+
+
+class StepInterner:
+    """Token -> Bitposition (in Reihenfolge des ersten Auftretens)."""
+
+    def __init__(self) -> None:
+        self.bits: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.bits)
+
+    def mask(self, items: Iterable[str]) -> int:
+        m = 0
+        bits = self.bits
+        for t in items:
+            b = bits.get(t)
+            if b is None:
+                b = len(bits)
+                bits[t] = b
+            m |= 1 << b
+        return m
+
+
+def jaccard_bits(a: int, b: int, empty: float = 0.0) -> float:
+    union = a | b
+    if not union:
+        return empty
+    return popcount(a & b) / popcount(union)
+
+
+def jaccard_matrix_bits(masks: Sequence[int], empty: float = 0.0) -> List[List[float]]:
+    """n×n-Matrix (Diagonale 1.0) als Listen – direkt JSON-fähig."""
+    n = len(masks)
+    if HAS_NUMPY and n >= MATRIX_NUMPY_MIN:
+        return _jaccard_matrix_numpy(masks, empty)
+    matrix = [[1.0] * n for _ in range(n)]
+    for i in range(n):
+        a = masks[i]
+        row = matrix[i]
+        for j in range(i + 1, n):
+            row[j] = matrix[j][i] = jaccard_bits(a, masks[j], empty)
+    return matrix
+
+
+def mean_pairwise_jaccard_bits(masks: Sequence[int], empty: float = 0.0) -> float:
+    """Mittlere Jaccard-Ähnlichkeit über alle Paare i < j (1.0 bei höchstens einem Auftrag)."""
+    n = len(masks)
+    if n <= 1:
+        return 1.0
+    sims = [jaccard_bits(masks[i], masks[j], empty) for i in range(n) for j in range(i + 1, n)]
+    return sum(sims) / len(sims)
+
+
+if HAS_NUMPY:
+    _BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _jaccard_matrix_numpy(masks: Sequence[int], empty: float) -> List[List[float]]:
+    width = max(1, (max(m.bit_length() for m in masks) + 7) // 8)
+    B = np.frombuffer(b"".join(m.to_bytes(width, "little") for m in masks), dtype=np.uint8).reshape(len(masks), width)
+    n = len(masks)
+    sizes = _BYTE_POPCOUNT[B].sum(axis=1, dtype=np.int64)
+    inter = np.empty((n, n), dtype=np.int64)
+    step = max(1, (1 << 22) // (n * width))  # Zeilenblöcke: Zwischenspeicher <= ~4 MB
+    for lo in range(0, n, step):
+        inter[lo:lo + step] = _BYTE_POPCOUNT[B[lo:lo + step, None, :] & B[None, :, :]].sum(axis=2, dtype=np.int64)
+    union = sizes[:, None] + sizes[None, :] - inter
+    with np.errstate(invalid="ignore", divide="ignore"):
+        M = np.where(union > 0, inter / np.maximum(union, 1), empty)
+    np.fill_diagonal(M, 1.0)
+    return M.tolist()
+
+
+def token_hash(token: str) -> int:
+    """Stabiler Hash in [0, P) (gleich über Prozesse und Läufe)."""
+    return int.from_bytes(hashlib.blake2b(str(token).encode("utf-8"), digest_size=8).digest(), "little") % _PRIME
+
+
+def lsh_rows(threshold: float, num_perm: int, recall: float = 0.99) -> int:
+    """Größtes r (Zeilen pro Band), bei dem ein Paar mit J = threshold noch mit >= recall gefunden wird."""
+    best = 1
+    for r in range(1, num_perm + 1):
+        bands = num_perm // r
+        if 1.0 - (1.0 - threshold ** r) ** bands >= recall:
+            best = r
+        else:
+            break
+    return best
+
+
+class MinHashLSH:
+    """
+    LSH-Index über sets[0..n-1]; candidates(i) liefert die Indizes, die mit sets[i]
+    mindestens ein Band teilen (inkl. i). Leere Mengen werden nie Kandidaten.
+    """
+
+    def __init__(
+        self,
+        sets: Sequence[Iterable[str]],
+        threshold: float,
+        num_perm: int = 128,
+        seed: int = 1,
+        recall: float = 0.99,
+    ) -> None:
+        rng = random.Random(seed)
+        self.num_perm = max(1, int(num_perm))
+        self.rows = lsh_rows(threshold, self.num_perm, recall)
+        self.bands = self.num_perm // self.rows
+        coeffs = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(self.num_perm)]
+
+        vocab: Dict[str, int] = {}
+        token_ids = [[vocab.setdefault(t, len(vocab)) for t in items] for items in sets]
+        hashes = [token_hash(t) for t in vocab]
+        self.size = len(token_ids)
+
+        self._use_numpy = HAS_NUMPY
+        if self._use_numpy:
+            self._build_numpy(token_ids, hashes, coeffs)
+        else:
+            self._build_python(token_ids, hashes, coeffs)
+
+    def _build_numpy(self, token_ids: List[List[int]], hashes: List[int], coeffs: List[Tuple[int, int]]) -> None:
+        a = np.array([c[0] for c in coeffs], dtype=np.int64)
+        b = np.array([c[1] for c in coeffs], dtype=np.int64)
+        H = (np.array(hashes, dtype=np.int64)[:, None] * a[None, :] + b[None, :]) % _PRIME
+
+        nonempty = np.array([i for i, ids in enumerate(token_ids) if ids], dtype=np.intp)
+        self._band_inv: List[np.ndarray] = []
+        self._band_order: List[np.ndarray] = []
+        self._band_starts: List[np.ndarray] = []
+        self._slot = np.full(self.size, -1, dtype=np.intp)
+        self._slot[nonempty] = np.arange(len(nonempty))
+        self._members = nonempty
+        if not len(nonempty):
+            return
+        flat = np.fromiter((t for i in nonempty for t in token_ids[i]), dtype=np.intp)
+        lengths = np.array([len(token_ids[i]) for i in nonempty], dtype=np.intp)
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        sig = np.minimum.reduceat(H[flat], offsets, axis=0)       # (Mengen × num_perm)
+
+        r = self.rows
+        for band in range(self.bands):
+            _, inv = np.unique(sig[:, band * r:(band + 1) * r], axis=0, return_inverse=True)
+            inv = inv.reshape(-1)
+            order = np.argsort(inv, kind="stable")
+            starts = np.searchsorted(inv[order], np.arange(inv.max() + 2))
+            self._band_inv.append(inv)
+            self._band_order.append(order)
+            self._band_starts.append(starts)
+
+    def _build_python(self, token_ids: List[List[int]], hashes: List[int], coeffs: List[Tuple[int, int]]) -> None:
+        rows = [tuple((a * x + b) % _PRIME for a, b in coeffs) for x in hashes]
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = defaultdict(list)
+        self._band_keys: List[List[Tuple[int, Tuple[int, ...]]]] = []
+        r = self.rows
+        for i, ids in enumerate(token_ids):
+            if not ids:
+                self._band_keys.append([])
+                continue
+            sig = tuple(min(col) for col in zip(*(rows[t] for t in ids)))
+            keys = [(band, sig[band * r:(band + 1) * r]) for band in range(self.bands)]
+            for key in keys:
+                self._buckets[key].append(i)
+            self._band_keys.append(keys)
+
+    def candidates(self, idx: int) -> Set[int]:
+        if self._use_numpy:
+            slot = self._slot[idx]
+            if slot < 0:
+                return set()
+            parts = []
+            for inv, order, starts in zip(self._band_inv, self._band_order, self._band_starts):
+                g = inv[slot]
+                parts.append(order[starts[g]:starts[g + 1]])
+            return set(self._members[np.unique(np.concatenate(parts))].tolist())
+        out: Set[int] = set()
+        for key in self._band_keys[idx]:
+            out.update(self._buckets[key])
+        return out
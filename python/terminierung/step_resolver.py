@@ -0,0 +1,134 @@
+"""
+step_resolver
+-------------
+
+Indizierte Zuordnung Sequenz-Step -> Op für build_ops_from_sequence
+(mittelfristige Terminierung und Feinterminierung).
+
+Die Namen einer Op-Liste (meta.step, sonst label/setupFamily/bg/id) werden
+einmal pro Auftrag indiziert. Die Regeln entsprechen dem bisherigen
+Fallback-Loop über dem_ops_by_name / mon_ops_by_name:
+
+  1. exact       – Step ist ein Name                       (dict, O(1))
+  2. substring   – Step ist Teil eines Namens oder umgekehrt
+  3. normalized  – Gleichheit nach BGT- -> BG-              (dict, O(1))
+
+Für 2./3. gewinnt wie im Loop der zuerst eingetragene Name, für den eine der
+beiden Regeln greift; bei Gleichstand zählt substring (wurde im Loop zuerst
+geprüft). "Step in Name" läuft über str.find auf den mit \\0 verketteten
+Namen (erster Treffer = frühester Name), "Name in Step" über einen Präfix-Trie
+der Namen, der von jeder Startposition des Steps aus abgelaufen wird.
+
+resolve() liefert zusätzlich die Regel, die gegriffen hat. Die Aufrufer
+zählen sie in einem Dict statt pro Aufruf stderr-Warnungen zu schreiben.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+RULE_EXACT = "exact"
+RULE_SUBSTRING = "substring"
+RULE_NORMALIZED = "normalized"
+RULE_UNMATCHED = "unmatched"
+
+Resolution = Tuple[Optional[Dict[str, Any]], str]
+
+_END = ""  # Trie-Schlüssel für "Name endet hier" (Zeichen-Keys sind nie leer)
+
+
+def normalize_step(name: str) -> str:
+    """BGT-PS-X <-> BG-PS-X (T entfernen)."""
+    return name.replace("BGT-", "BG-")
+
+
+def op_names(op: Dict[str, Any]) -> Tuple[Any, Any]:
+    """(Primärname meta.step, Fallback label/setupFamily/bg/id) einer Op."""
+    meta = op.get("meta", {})
+    primary_name = meta.get("step") if isinstance(meta, dict) else None
+    fallback_name = op.get("label") or op.get("setupFamily") or op.get("bg") or op.get("id", "")
+    return primary_name, fallback_name
+
+
+class StepResolver:
+    def __init__(self, ops: Sequence[Dict[str, Any]]) -> None:
+        # Die indizierte Op-Liste selbst (Legacy-Zuordnung ohne × arbeitet positionsweise darauf)
+        self.ops = ops
+        # Gleiche Befüllung wie bisher: spätere Ops überschreiben den Wert,
+        # die Position des Namens bleibt die des ersten Eintrags
+        self.by_name: Dict[Any, Dict[str, Any]] = {}
+        for op in ops:
+            primary_name, fallback_name = op_names(op)
+            if primary_name:
+                self.by_name[primary_name] = op
+            if fallback_name and fallback_name != primary_name:
+                self.by_name[fallback_name] = op
+        self._names: List[str] = [name for name in self.by_name if isinstance(name, str)]
+        self._indexed = False
+        self._memo: Dict[str, Resolution] = {}
+
+    def keys(self) -> List[Any]:
+        return list(self.by_name)
+
+    def _build_index(self) -> None:
+        # Erst beim ersten Nicht-Exakt-Treffer aufbauen – meist matchen alle Steps exakt
+        self._joined = "\0".join(self._names)
+        self._starts: List[int] = []
+        pos = 0
+        for name in self._names:
+            self._starts.append(pos)
+            pos += len(name) + 1
+        self._normalized: Dict[str, int] = {}
+        self._trie: Dict[str, Any] = {}
+        for rank, name in enumerate(self._names):
+            self._normalized.setdefault(normalize_step(name), rank)
+            node = self._trie
+            for ch in name:
+                node = node.setdefault(ch, {})
+            node.setdefault(_END, rank)
+        self._indexed = True
+
+    def _substring_rank(self, step: str) -> Optional[int]:
+        """Frühester Name, der den Step enthält oder im Step enthalten ist."""
+        best: Optional[int] = None
+        hit = self._joined.find(step)
+        if hit >= 0:
+            best = bisect_right(self._starts, hit) - 1
+        trie = self._trie
+        for start in range(len(step)):
+            node = trie
+            for ch in step[start:]:
+                node = node.get(ch)
+                if node is None:
+                    break
+                rank = node.get(_END)
+                if rank is not None and (best is None or rank < best):
+                    best = rank
+        return best
+
+    def resolve(self, step: str) -> Resolution:
+        """(Op, Regel) für einen Sequenz-Step; (None, "unmatched") ohne Treffer."""
+        op = self.by_name.get(step)
+        if op:
+            return op, RULE_EXACT
+        cached = self._memo.get(step)
+        if cached is not None:
+            return cached
+        if not self._indexed:
+            self._build_index()
+        sub_rank = self._substring_rank(step)
+        norm_rank = self._normalized.get(normalize_step(step))
+        if sub_rank is not None and (norm_rank is None or sub_rank <= norm_rank):
+            result: Resolution = (self.by_name[self._names[sub_rank]], RULE_SUBSTRING)
+        elif norm_rank is not None:
+            result = (self.by_name[self._names[norm_rank]], RULE_NORMALIZED)
+        else:
+            result = (None, RULE_UNMATCHED)
+        self._memo[step] = result
+        return result
+
+
+def count_rule(match_stats: Optional[Dict[str, int]], rule: str) -> None:
+    if match_stats is not None:
+        match_stats[rule] = match_stats.get(rule, 0) + 1
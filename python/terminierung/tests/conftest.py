@@ -0,0 +1,9 @@
+import os
+import sys
+
+TERMINIERUNG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Wie terminierung.serve: python/ für "terminierung.*", terminierung/ für die flachen Geschwister-Importe
+for path in (os.path.dirname(TERMINIERUNG_DIR), TERMINIERUNG_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
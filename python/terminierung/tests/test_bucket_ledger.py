@@ -0,0 +1,139 @@
+import random
+
+import pytest
+
+import bucket_ledger
+from bucket_ledger import BucketLedger, CapacityIndex, utilization_columns, window_spread
+
+
+def random_spans(rng, n, bucket):
+    spans = []
+    for _ in range(n):
+        start = rng.choice([rng.uniform(-5 * bucket, 40 * bucket), float(rng.randint(-5, 40) * bucket)])
+        length = rng.choice([0.0, rng.uniform(1, 0.5 * bucket), rng.uniform(1, 8 * bucket), float(bucket)])
+        spans.append((start, start + length, rng.choice([0.0, rng.uniform(1, 500)])))
+    return spans
+
+
+def summed_workload(bucket, spans, k):
+    """Bisherige Schleife: Anteil jedes Loses am Bucket k über alle Lose aufsummieren."""
+    wl = 0.0
+    for s, e, work in spans:
+        if e <= s or work <= 0.0:
+            continue
+        overlap = max(0.0, min(e, k + bucket) - max(s, k))
+        if overlap > 0:
+            wl += work * (overlap / (e - s))
+    return wl
+
+
+def linear_scan(ledger, first_slot, n_slots, before, after, work, target):
+    """Bisherige CTP-Suche: jeden Slot über alle berührten Buckets per util_at prüfen."""
+    for a in range(n_slots):
+        s = first_slot + a * ledger.bucket
+        probe = (s - before, s + after, work)
+        if all(ledger.util_at(k, probe) <= target for k, _ in window_spread(ledger.bucket, *probe)):
+            return a
+    return None
+
+
+def test_ledger_matches_summed_workload():
+    rng = random.Random(5)
+    for _ in range(100):
+        bucket = rng.choice([15, 60, 480, 1440])
+        capacity = rng.choice([0.0, 480.0, 2 * 480.0])
+        spans = random_spans(rng, rng.randint(0, 30), bucket)
+        ledger = BucketLedger(bucket, capacity)
+        for span in spans:
+            ledger.add(*span)
+        probe = random_spans(rng, 1, bucket)[0]
+        for k in range(-6 * bucket, 50 * bucket, bucket):
+            wl = summed_workload(bucket, spans, k)
+            assert ledger.load.get(k, 0.0) == wl
+            if capacity > 0:
+                assert ledger.util_at(k) == min(1.0, wl / capacity)
+                with_probe = summed_workload(bucket, spans + [probe], k)
+                assert ledger.util_at(k, probe) == pytest.approx(min(1.0, with_probe / capacity), rel=1e-12)
+            else:
+                assert ledger.util_at(k, probe) == 0.0
+
+
+def test_next_bucket():
+    ledger = BucketLedger(60, 120.0)
+    assert ledger.next_bucket(0.0) == 60
+    assert ledger.next_bucket(59.9) == 60
+    assert ledger.next_bucket(60.0) == 120
+
+
+@pytest.mark.skipif(not bucket_ledger.HAS_NUMPY, reason="numpy nicht installiert")
+def test_dense_workload_numpy_matches_python():
+    rng = random.Random(1)
+    for _ in range(300):
+        bucket = rng.choice([15, 60, 480, 1440])
+        spans = random_spans(rng, rng.randint(0, 40), bucket)
+        starts_np, load_np = bucket_ledger._dense_workload_numpy(bucket, spans)
+        starts_py, load_py = bucket_ledger._dense_workload_python(bucket, spans)
+        assert starts_np == starts_py
+        assert load_np == pytest.approx(load_py, rel=1e-9, abs=1e-9)
+
+
+def test_utilization_columns_match_ledger():
+    rng = random.Random(2)
+    bucket, capacity = 480, 960.0
+    spans = random_spans(rng, 50, bucket)
+    ledger = BucketLedger(bucket, capacity)
+    for span in spans:
+        ledger.add(*span)
+    cols = utilization_columns(bucket, capacity, spans)
+    assert set(ledger.load) <= set(cols["bucketStart"])
+    for k, util in zip(cols["bucketStart"], cols["utilization"]):
+        assert util == pytest.approx(ledger.util_at(k), abs=1e-12)
+    assert cols["capacityMin"] == [capacity] * len(cols["bucketStart"])
+
+
+def test_earliest_slot_matches_linear_scan():
+    rng = random.Random(3)
+    for _ in range(200):
+        bucket = rng.choice([60, 120, 480, 1440])
+        capacity = rng.choice([1, 2, 4]) * min(bucket, 480)
+        ledger = BucketLedger(bucket, capacity)
+        for _ in range(rng.randint(0, 60)):
+            s = rng.uniform(0, 40 * bucket)
+            ledger.add(s, s + rng.uniform(1, 5 * bucket), rng.uniform(10, 3 * capacity))
+        first_slot = ledger.next_bucket(rng.uniform(0, 3 * bucket))
+        alpha, beta = rng.choice([(0.0, 0.0), (0.5, 0.5), (1.2, 0.3)])
+        target = rng.choice([0.3, 0.5, 0.8, 0.95])
+        n_slots = rng.choice([1, 30, 60])
+        machines = rng.choice([1, 2, 4])
+        procs = [rng.uniform(1, 6 * bucket) for _ in range(20)]
+        d_max = max(procs) / machines
+        index = CapacityIndex.from_ledger(ledger, first_slot - alpha * d_max,
+                                          first_slot + n_slots * bucket + (beta + 1.0) * d_max)
+        for p in procs:
+            d = p / machines
+            before, after = alpha * d, (beta + 1.0) * d
+            a = index.earliest_slot(first_slot, n_slots, before, after, p, target)
+            assert a == linear_scan(ledger, first_slot, n_slots, before, after, p, target)
+            if a is not None:
+                # Zusage einbuchen wie ctp_promise_orders, damit spätere Suchen auf vollerem Ledger laufen
+                s = first_slot + a * bucket
+                ledger.add(s - before, s + after, p)
+                index.add(s - before, s + after, p)
+
+
+def test_index_tracks_ledger_loads():
+    rng = random.Random(4)
+    ledger = BucketLedger(60, 120.0)
+    index = CapacityIndex.from_ledger(ledger, 0, 60 * 100)
+    for _ in range(200):
+        s = rng.uniform(0, 90 * 60)
+        span = (s, s + rng.uniform(1, 600), rng.uniform(1, 200))
+        ledger.add(*span)
+        index.add(*span)
+    for k in range(0, 60 * 100, 60):
+        assert index.load_at(k) == pytest.approx(ledger.load.get(k, 0.0))
+    limit = 60.0
+    above = [k for k in range(0, 60 * 100, 60) if ledger.load.get(k, 0.0) > limit]
+    below = [k for k in range(0, 60 * 100, 60) if ledger.load.get(k, 0.0) <= limit]
+    assert index.first_above(0, 60 * 99, limit) == (above[0] if above else None)
+    assert index.first_below(0, 60 * 99, limit) == (below[0] if below else None)
@@ -0,0 +1,34 @@
+from genome_cache import FitnessCache, genome_key
+
+
+def test_genome_key_separates_orders_and_variants():
+    assert genome_key([1, 2, 3], [0, 1]) == genome_key((1, 2, 3), (0, 1))
+    assert len(genome_key([1, 2, 3])) == 16
+    assert genome_key([1, 2, 3], [0]) != genome_key([1, 2], [3, 0])
+    assert genome_key([1, 2, 3]) != genome_key([1, 2, 3], [0])
+    assert genome_key([1, 2]) != genome_key([2, 1])
+
+
+def test_cache_evicts_least_recently_used():
+    cache = FitnessCache(maxsize=2)
+    a, b, c = genome_key([0]), genome_key([1]), genome_key([2])
+    cache.put(a, 1.0)
+    cache.put(b, 2.0)
+    assert cache.get(a) == 1.0  # a ist jetzt der jüngste Eintrag
+    cache.put(c, 3.0)
+    assert b not in cache
+    assert a in cache and c in cache
+    assert cache.get(b) is None
+    assert cache.stats() == {"size": 2, "maxSize": 2, "hits": 1, "misses": 1, "evictions": 1}
+
+
+def test_put_refreshes_existing_key():
+    cache = FitnessCache(maxsize=2)
+    a, b, c = genome_key([0]), genome_key([1]), genome_key([2])
+    cache.put(a, 1.0)
+    cache.put(b, 2.0)
+    cache.put(a, 5.0)
+    cache.put(c, 3.0)
+    assert cache.get(a) == 5.0
+    assert b not in cache
+    assert len(cache) == 2
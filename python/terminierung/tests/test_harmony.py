@@ -0,0 +1,97 @@
+import random
+from collections import Counter
+
+import pytest
+
+import harmony
+from harmony import AliasTable, HarmonyImproviser, PositionHistogram, UnusedPool
+
+
+def pairwise_similarity(sequences):
+    """Bisherige Ähnlichkeitsschätzung der Harmony Memory: Positionsvergleich über alle Plan-Paare."""
+    pairs = 0
+    total = 0
+    for i in range(len(sequences)):
+        for j in range(i + 1, len(sequences)):
+            a, b = sequences[i], sequences[j]
+            pairs += sum(1 for x, y in zip(a, b) if x == y)
+            total += len(a)
+    return pairs / total if total else 0.0
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_histogram_matches_pairwise_comparison(monkeypatch, use_numpy):
+    if use_numpy and not harmony.HAS_NUMPY:
+        pytest.skip("numpy nicht installiert")
+    monkeypatch.setattr(harmony, "HAS_NUMPY", use_numpy)
+    rng = random.Random(1)
+    n = 12
+    base = list(range(n))
+    memory = [rng.sample(base, n) for _ in range(6)]
+    hist = PositionHistogram(n, memory)
+    assert hist.similarity() == pytest.approx(pairwise_similarity(memory), abs=1e-15)
+    for _ in range(200):
+        # Austausch wie in _select_harmony_memory: Pläne raus, ähnliche Pläne rein
+        if memory and rng.random() < 0.5:
+            hist.remove(memory.pop(rng.randrange(len(memory))))
+        else:
+            seq = list(rng.choice(memory)) if memory else rng.sample(base, n)
+            i, j = rng.randrange(n), rng.randrange(n)
+            seq[i], seq[j] = seq[j], seq[i]
+            memory.append(seq)
+            hist.add(seq)
+        assert hist.similarity() == pytest.approx(pairwise_similarity(memory), abs=1e-15)
+
+
+def test_alias_table_reproduces_weights():
+    rng = random.Random(2)
+    for _ in range(50):
+        weights = [rng.choice([0.0, rng.uniform(0.01, 5)]) for _ in range(rng.randint(1, 20))]
+        if not any(weights):
+            weights[0] = 1.0
+        table = AliasTable(weights)
+        # Exakte Verteilung aus den Spalten: prob[i] bleibt bei i, der Rest geht an alias[i]
+        mass = [0.0] * len(weights)
+        for i in range(table.n):
+            mass[i] += table.prob[i] / table.n
+            mass[table.alias[i]] += (1.0 - table.prob[i]) / table.n
+        total = sum(weights)
+        assert mass == pytest.approx([w / total for w in weights], abs=1e-12)
+
+
+def test_alias_table_samples_only_positive_weights():
+    table = AliasTable([0.0, 3.0, 0.0, 1.0])
+    rng = random.Random(3)
+    counts = Counter(table.sample(rng) for _ in range(20000))
+    assert set(counts) == {1, 3}
+    assert counts[1] / 20000 == pytest.approx(0.75, abs=0.02)
+
+
+def test_unused_pool_tracks_remaining_jobs():
+    rng = random.Random(4)
+    pool = UnusedPool(30)
+    remaining = set(range(30))
+    while remaining:
+        job = pool.pick(rng)
+        assert job in remaining
+        victim = rng.choice([job, rng.choice(sorted(remaining))])
+        pool.take(victim)
+        remaining.discard(victim)
+        assert len(pool) == len(remaining)
+        assert sorted(pool.items) == sorted(remaining)
+        assert all((j in pool) == (j in remaining) for j in range(30))
+
+
+def test_improviser_draws_from_memory():
+    memory = [[0, 1, 2, 3], [3, 2, 1, 0]]
+    improviser = HarmonyImproviser(memory, [[0, 1], [0, 2]], memory_tries=3)
+    rng = random.Random(5)
+    unused = UnusedPool(4)
+    assert improviser.memory_job(0, unused, rng) in (0, 3)
+    unused.take(0)
+    unused.take(3)
+    assert improviser.memory_job(0, unused, rng) is None
+    assert improviser.memory_variant(0, rng) == 0
+    assert improviser.memory_variant(1, rng) in (1, 2)
+    assert improviser.memory_variant(2, rng) is None
+    assert HarmonyImproviser([]).memory_job(0, UnusedPool(1), rng) is None
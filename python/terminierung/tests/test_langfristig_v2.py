@@ -0,0 +1,33 @@
+import random
+
+import pytest
+
+from Becker_Terminierung_langfristig_v2 import LSH_MIN_ORDERS, cluster_by_jaccard
+from similarity import StepInterner
+
+
+def enriched_orders(n, seed):
+    # Familien ähnlicher Schrittfolgen; Jaccard innerhalb >= 0.6, zwischen Familien 0
+    rng = random.Random(seed)
+    interner = StepInterner()
+    orders = []
+    for i in range(n):
+        fam = rng.randrange(12)
+        base = ["F%d-BG-%d" % (fam, k) for k in range(20)]
+        extra = ["F%d-X-%d" % (fam, k) for k in range(6)]
+        seq = set(base) - set(rng.sample(base, rng.randint(0, 3))) | set(rng.sample(extra, rng.randint(0, 2)))
+        orders.append({"orderId": "ORD-%04d" % i, "dueDate": rng.uniform(0, 5000), "seqSet": seq, "seqBits": interner.mask(seq)})
+    return orders
+
+
+def cluster_ids(clusters):
+    return [[o["orderId"] for o in cluster] for cluster in clusters]
+
+
+@pytest.mark.parametrize("threshold", [0.3, 0.5])
+def test_lsh_clusters_match_exact_clusters(threshold):
+    orders = enriched_orders(LSH_MIN_ORDERS + 150, seed=7)
+    lsh = cluster_by_jaccard(orders, threshold, q_max=10)
+    exact = cluster_by_jaccard(orders, threshold, q_max=10, exact=True)
+    assert cluster_ids(lsh) == cluster_ids(exact)
+    assert sum(len(c) for c in lsh) == len(orders)
@@ -0,0 +1,112 @@
+from Becker_Mittelfristige_Terminierung_v2 import (
+    CapacityModel,
+    GAOrder,
+    GAStopCriteria,
+    optimize_sequence_ga,
+    simulate_with_capacity,
+)
+from op_tables import KIND_DEM, KIND_MON, compile_op_lists
+
+WEIGHTS = [5.0, 1.0, 3.0, 2.0, 4.0, 0.5]
+ORDERS = [GAOrder(f"o{i}", 0.0, 10.0, (1.0, 2.0, 3.0), []) for i in range(len(WEIGHTS))]
+
+
+def weighted_position(seq):
+    return (sum(pos * WEIGHTS[i] for pos, i in enumerate(seq)), 0.0, 0.0)
+
+
+def run_ga(stop=None, generations=30):
+    return optimize_sequence_ga(
+        ORDERS,
+        lam=0.0,
+        population=8,
+        generations=generations,
+        mutation_rate=0.3,
+        elite=2,
+        replications=1,
+        seed=11,
+        eval_fn=weighted_position,
+        stop=stop,
+    )
+
+
+def test_stall_stops_after_unchanged_generations():
+    stop = GAStopCriteria(stall_generations=3)
+    assert not stop.after_generation(10.0)
+    assert not stop.after_generation(9.0)
+    assert not stop.after_generation(9.0)
+    assert not stop.after_generation(9.0 + 1e-12)
+    assert stop.after_generation(9.5)
+    assert stop.stop_reason == "stall"
+    assert stop.summary(20)["generationsRun"] == 5
+
+
+def test_time_budget_stops_after_first_generation():
+    stop = GAStopCriteria(time_budget_ms=0.0)
+    assert stop.deadline_reached()
+    best_seq, history, components, _ = run_ga(stop)
+    assert stop.stop_reason == "timeBudget"
+    assert stop.generations_run == 1
+    assert len(history) == 1
+    assert sorted(best_seq) == list(range(len(ORDERS)))
+    assert components == weighted_position(best_seq)
+
+
+def test_stall_criterion_keeps_incumbent():
+    full_seq, full_history, _, _ = run_ga()
+    stop = GAStopCriteria(stall_generations=2)
+    best_seq, history, components, _ = run_ga(stop)
+    assert stop.stop_reason in ("stall", "completed")
+    assert stop.generations_run == len(history) <= len(full_history)
+    assert history == full_history[: len(history)]
+    assert components[0] == history[-1]
+    assert weighted_position(best_seq)[0] == history[-1]
+    summary = stop.summary(30)
+    assert summary["generationsPlanned"] == 30 and summary["stallGenerations"] == 2
+
+
+def test_without_limits_the_run_is_unchanged():
+    assert run_ga(None) == run_ga(GAStopCriteria())
+    stop = GAStopCriteria()
+    run_ga(stop)
+    assert stop.stop_reason == "completed"
+
+
+def op(station, step, duration):
+    return {"stationId": station, "meta": {"step": step}, "expectedDuration": duration}
+
+
+def variant_tables():
+    # Variante 0 hat lange A-Demontagen, Variante 1 lange B-Demontagen
+    op_lists = [
+        [
+            [op("dem", "A", 9), op("dem", "B", 2), op("mon", "M", 3)],
+            [op("dem", "A", 1), op("dem", "B", 8), op("mon", "N", 5)],
+        ]
+        for _ in range(3)
+    ]
+    orders = [GAOrder(f"o{i}", float(i), 20.0 + i, (1.0, 2.0, 3.0), []) for i in range(3)]
+    return orders, *compile_op_lists(op_lists)
+
+
+def test_with_ranges_matches_fresh_build():
+    orders, tables, ranges = variant_tables()
+    first = [r[0] for r in ranges]
+    second = [r[1] for r in ranges]
+    model = CapacityModel.build(orders, tables, first, 2, 2, dem_flex_share=0.5, setup_minutes=4.0)
+    assert model.assignment_names(KIND_DEM) == ["A"]
+
+    derived = model.with_ranges(tables, second)
+    fresh = CapacityModel.build(orders, tables, second, 2, 2, dem_flex_share=0.5, setup_minutes=4.0)
+    assert derived == fresh
+    assert derived.assignment_names(KIND_DEM) == ["B"]
+    assert derived.assignment_names(KIND_MON) == ["N", None]
+    assert derived.assignment_key != model.assignment_key
+    # Das Ausgangsmodell bleibt unverändert
+    assert model.assignment_names(KIND_DEM) == ["A"]
+    assert (derived.totals, derived.fixed, derived.flex) == (model.totals, model.fixed, model.flex)
+
+    for seq in ([0, 1, 2], [2, 0, 1]):
+        assert simulate_with_capacity(seq, orders, tables, second, derived, True) == simulate_with_capacity(
+            seq, orders, tables, second, fresh, True
+        )
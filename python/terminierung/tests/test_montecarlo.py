@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+import montecarlo
+from montecarlo import TardinessSampler, triangular_from_uniform
+
+
+def random_instance(rng, n):
+    tfns = []
+    for _ in range(n):
+        a = rng.uniform(10, 100)
+        m = a + rng.choice([0.0, rng.uniform(0, 50)])
+        b = m + rng.choice([0.0, rng.uniform(0, 50)])
+        tfns.append((a, m, b))
+    ready = [rng.uniform(0, 200) for _ in range(n)]
+    due = [rng.choice([None, rng.uniform(50, 2000)]) for _ in range(n)]
+    return tfns, ready, due
+
+
+@pytest.mark.skipif(not montecarlo.HAS_NUMPY, reason="numpy nicht installiert")
+def test_numpy_samples_are_bit_identical_to_python_loop():
+    rng = random.Random(1)
+    tfns, _, _ = random_instance(rng, 50)
+    seeds = [rng.randrange(1 << 40) for _ in range(20)] + [0, 1, 42]
+    matrix = montecarlo._triangular_matrix(seeds, tfns)
+    for row, seed in zip(matrix.tolist(), seeds):
+        r = random.Random(seed)
+        assert row == [triangular_from_uniform(r.random(), tfn) for tfn in tfns]
+
+
+@pytest.mark.skipif(not montecarlo.HAS_NUMPY, reason="numpy nicht installiert")
+def test_sampler_backends_agree(monkeypatch):
+    rng = random.Random(2)
+    tfns, ready, due = random_instance(rng, 30)
+    sequences = [rng.sample(range(30), 30) for _ in range(8)]
+    fast = TardinessSampler(tfns, ready, due, replications=25, seed=7)
+    monkeypatch.setattr(montecarlo, "HAS_NUMPY", False)
+    plain = TardinessSampler(tfns, ready, due, replications=25, seed=7)
+    assert plain.samples == fast.samples
+    expected = plain.totals_many(sequences, start_time=5.0)
+    monkeypatch.setattr(montecarlo, "HAS_NUMPY", True)
+    got = fast.totals_many(sequences, start_time=5.0)
+    for row, ref in zip(got, expected):
+        assert row == pytest.approx(ref, rel=1e-12)
+    assert fast.totals(sequences[0], 5.0) == pytest.approx(expected[0], rel=1e-12)
+
+
+def test_degenerate_tfn_is_constant():
+    assert triangular_from_uniform(0.3, (5.0, 5.0, 5.0)) == 5.0
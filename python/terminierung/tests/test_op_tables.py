@@ -0,0 +1,48 @@
+from op_tables import KIND_DEM, KIND_MON, OpTables, compile_op_lists, meta_step
+
+
+def op(station, step, duration):
+    return {"stationId": station, "meta": {"step": step}, "expectedDuration": duration}
+
+
+def test_meta_step():
+    assert meta_step({"meta": {"step": "BG-1"}}) == "BG-1"
+    assert meta_step({"meta": "kaputt"}) is None
+    assert meta_step({}) is None
+
+
+def test_intern_step_reserves_zero_for_none():
+    tables = OpTables()
+    assert tables.intern_step(None) == 0
+    a = tables.intern_step("A")
+    assert tables.intern_step("B") == a + 1
+    assert tables.intern_step("A") == a
+    assert tables.step_name(a) == "A"
+    assert tables.step_valid == [False, True, True]
+    assert tables.intern_step("") == 3 and not tables.step_valid[3]
+
+
+def test_compile_matches_dict_reads():
+    op_lists = [
+        [[op("DEM-1", "A", 4), op("mon-2", "B", "2.5")], [op("Demontage", None, None)]],
+        [[{"stationId": None, "expectedDuration": 1}], []],
+    ]
+    tables, ranges = compile_op_lists(op_lists)
+    assert len(tables) == 4
+    assert ranges == [[(0, 2), (2, 3)], [(3, 4), (4, 4)]]
+    for i, variants in enumerate(op_lists):
+        for v, ops in enumerate(variants):
+            begin, end = ranges[i][v]
+            assert end - begin == len(ops)
+            for k, o in zip(range(begin, end), ops):
+                station = (o.get("stationId") or "").lower()
+                assert tables.stations[k] == station
+                assert tables.kinds[k] == (KIND_DEM if "dem" in station else KIND_MON)
+                assert tables.step_name(tables.steps[k]) == meta_step(o)
+                assert tables.durations[k] == float(o.get("expectedDuration") or 0.0)
+
+
+def test_custom_step_getter():
+    tables, ranges = compile_op_lists([[[{"stationId": "mon", "step": "X"}]]], step_of=lambda o: o.get("step"))
+    assert tables.kinds == [KIND_MON]
+    assert tables.step_name(tables.steps[0]) == "X"
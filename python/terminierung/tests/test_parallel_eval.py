@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from parallel_eval import ParallelEvaluator
+
+PARENT_PID = os.getpid()
+
+
+def square(x):
+    return x * x
+
+
+def fails_in_worker(x):
+    # Im Hauptprozess korrekt, im Worker ein Fehler -> Pool fällt aus
+    if os.getpid() != PARENT_PID:
+        raise RuntimeError("worker kaputt")
+    return x * x
+
+
+class Context:
+    def __init__(self, offset):
+        self.offset = offset
+
+    def fitness(self, genome):
+        seq, variants = genome
+        return sum(i * (s + v) for i, (s, v) in enumerate(zip(seq, variants))) + self.offset
+
+
+def test_results_match_sequential_order():
+    evaluator = ParallelEvaluator(square, workers=2)
+    try:
+        items = list(range(50))
+        assert evaluator(items) == [square(x) for x in items]
+        assert evaluator([]) == []
+        assert evaluator.executor is not None
+    finally:
+        evaluator.close()
+    assert evaluator.executor is None
+
+
+def test_bound_context_method():
+    context = Context(offset=3)
+    genomes = [([3, 1, 2, 0], [0, 1, 0, 2]), ([0, 1, 2, 3], [1, 1, 1, 1]), ([2, 0, 3, 1], [0, 0, 0, 0])]
+    evaluator = ParallelEvaluator(context.fitness, workers=2)
+    try:
+        assert evaluator(genomes) == [context.fitness(g) for g in genomes]
+    finally:
+        evaluator.close()
+
+
+def test_pool_failure_falls_back_to_sequential(capsys):
+    evaluator = ParallelEvaluator(fails_in_worker, workers=2, label="[TEST]")
+    items = list(range(10))
+    assert evaluator(items) == [x * x for x in items]
+    assert evaluator.executor is None
+    assert "[TEST] WARNING: process pool failed" in capsys.readouterr().err
+    # Danach bleibt es sequentiell
+    assert evaluator(items[:3]) == [0, 1, 4]
+
+
+def test_error_in_sequential_evaluation_propagates():
+    evaluator = ParallelEvaluator(fails_in_worker, workers=2)
+    evaluator.close()
+    with pytest.raises(TypeError):
+        evaluator(["a"])
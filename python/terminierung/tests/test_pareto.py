@@ -0,0 +1,111 @@
+import itertools
+import random
+
+import pytest
+
+import pareto
+from pareto import HypervolumeTracker, ParetoArchive, dominates, hypervolume, non_dominated_fronts
+
+
+def deb_fronts(points):
+    """Klassische O(M·N²)-Sortierung nach Deb (bisheriges _fast_non_dominated_sort)."""
+    n = len(points)
+    S = {i: [] for i in range(n)}
+    n_dom = {i: 0 for i in range(n)}
+    for i in range(n):
+        for j in range(n):
+            if i != j:
+                if dominates(points[i], points[j]):
+                    S[i].append(j)
+                elif dominates(points[j], points[i]):
+                    n_dom[i] += 1
+    fronts = []
+    current = [i for i in range(n) if n_dom[i] == 0]
+    while current:
+        fronts.append(current)
+        nxt = []
+        for i in current:
+            for j in S[i]:
+                n_dom[j] -= 1
+                if n_dom[j] == 0:
+                    nxt.append(j)
+        current = nxt
+    return fronts
+
+
+def random_points(rng, n, dims, grid):
+    # Kleines Raster erzeugt viele Gleichstände und Duplikate
+    return [tuple(float(rng.randint(0, grid)) for _ in range(dims)) for _ in range(n)]
+
+
+def brute_hypervolume(points, ref):
+    """Hypervolumen über das Gitter aller Koordinaten: Zelle zählt, wenn ein Punkt sie dominiert."""
+    pts = [p for p in points if all(x < r for x, r in zip(p, ref))]
+    axes = [sorted({p[d] for p in pts} | {ref[d]}) for d in range(len(ref))]
+    volume = 0.0
+    for cell in itertools.product(*(range(len(a) - 1) for a in axes)):
+        lower = [axes[d][i] for d, i in enumerate(cell)]
+        if any(all(x <= c for x, c in zip(p, lower)) for p in pts):
+            size = 1.0
+            for d, i in enumerate(cell):
+                size *= axes[d][i + 1] - axes[d][i]
+            volume += size
+    return volume
+
+
+@pytest.mark.parametrize("dims", [2, 3])
+def test_fronts_match_deb_sort(dims):
+    rng = random.Random(dims)
+    for _ in range(200):
+        points = random_points(rng, rng.randint(1, 60), dims, rng.choice([3, 10, 1000]))
+        expected = deb_fronts(points)
+        if pareto.HAS_NUMPY:
+            assert pareto._fronts_numpy(points) == expected
+        assert pareto._fronts_python(points) == expected
+        assert non_dominated_fronts(points) == expected
+
+
+def test_fronts_empty():
+    assert non_dominated_fronts([]) == []
+
+
+@pytest.mark.parametrize("dims", [2, 3])
+def test_hypervolume_matches_brute_force(dims):
+    rng = random.Random(10 + dims)
+    for _ in range(100):
+        points = random_points(rng, rng.randint(0, 12), dims, 8)
+        ref = (8.5,) * dims
+        assert hypervolume(points, ref) == pytest.approx(brute_hypervolume(points, ref))
+
+
+def test_hypervolume_tracker_matches_recomputation():
+    rng = random.Random(7)
+    ref = (50.0, 50.0, 50.0)
+    tracker = HypervolumeTracker(ref)
+    memory = random_points(rng, 20, 3, 60)
+    for _ in range(300):
+        # Harmony-Memory-artig: mal neue Punkte dazu, mal willkürlich kürzen
+        if rng.random() < 0.7:
+            memory.append(tuple(float(rng.randint(0, 60)) for _ in range(3)))
+        else:
+            memory = rng.sample(memory, max(1, len(memory) // 2))
+        assert tracker.update(memory) == pytest.approx(brute_hypervolume(memory, ref))
+    assert tracker.incremental_updates > 0
+    assert tracker.full_updates > 0
+
+
+@pytest.mark.parametrize("dims", [2, 3])
+def test_archive_keeps_exactly_the_non_dominated_points(dims):
+    rng = random.Random(20 + dims)
+    for _ in range(100):
+        archive = ParetoArchive()
+        seen = []
+        for k in range(rng.randint(1, 80)):
+            p = tuple(float(rng.randint(0, 15)) for _ in range(dims))
+            accepted = archive.add(p, k)
+            assert accepted == (not any(all(x <= y for x, y in zip(q, p)) for q in seen))
+            seen.append(p)
+            # Erwartet: erster Vertreter jedes nicht-dominierten Punkts, lexikographisch sortiert
+            expected = sorted({q for q in seen if not any(dominates(r, q) for r in seen)})
+            assert archive.points() == expected
+            assert [seen[i] for i in archive.items()] == expected
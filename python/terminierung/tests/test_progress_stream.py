@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+import progress_stream
+from progress_stream import ProgressReporter
+
+
+@pytest.fixture(autouse=True)
+def reset_sink():
+    yield
+    progress_stream.set_sink(None)
+
+
+def test_disabled_reporter_is_silent(capsys):
+    events = []
+    progress_stream.set_sink(events.append)
+    reporter = ProgressReporter.from_config({}, "PIP_GA")
+    reporter.emit(1, 10, {"fitness": 1.0})
+    assert events == [] and reporter.last_event is None
+    assert capsys.readouterr().err == ""
+
+
+def test_events_go_to_stderr_by_default(capsys):
+    reporter = ProgressReporter.from_config({"progress": True}, "PIP_GA")
+    reporter.emit(2, 40, {"fitness": 3.5}, ["o1", "o2"], stopReason="stall")
+    lines = capsys.readouterr().err.splitlines()
+    assert len(lines) == 1
+    event = json.loads(lines[0])
+    assert event == reporter.last_event
+    assert event["type"] == "progress" and event["stage"] == "PIP_GA"
+    assert (event["iteration"], event["evaluations"]) == (2, 40)
+    assert event["best"] == {"fitness": 3.5}
+    assert event["bestSequence"] == ["o1", "o2"]
+    assert event["stopReason"] == "stall"
+    assert event["elapsedMs"] >= 0
+
+
+def test_sink_receives_events(capsys):
+    events = []
+    progress_stream.set_sink(events.append)
+    reporter = ProgressReporter("PIPO_MOAHS", True)
+    reporter.emit(0, 5, {"hv": 0.1})
+    reporter.emit(1, 9, {"hv": 0.2})
+    assert [e["iteration"] for e in events] == [0, 1]
+    assert "bestSequence" not in events[0]
+    assert capsys.readouterr().err == ""
@@ -0,0 +1,161 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import types
+
+import pytest
+
+from terminierung import serve
+
+SCRIPT = textwrap.dedent(
+    """
+    import json
+    import sys
+
+
+    def main():
+        payload = json.load(sys.stdin)
+        print("debug line", file=sys.stderr)
+        if payload.get("fail"):
+            raise ValueError("kaputt")
+        print(json.dumps({"sum": sum(payload["values"]), "echo": payload}))
+
+
+    if __name__ == "__main__":
+        main()
+    """
+)
+
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / "bundle_script.py"
+    path.write_text(SCRIPT)
+    return str(path)
+
+
+def test_normalize_script_name():
+    root = serve.PROJECT_ROOT
+    assert serve.normalize_script_name("python/terminierung/pap.py") == "python/terminierung/pap.py"
+    assert serve.normalize_script_name(os.path.join(root, "python", "terminierung", "pip.py")) == "python/terminierung/pip.py"
+    assert serve.normalize_script_name("python/terminierung/../terminierung/pipo.py") == "python/terminierung/pipo.py"
+    outside = os.path.abspath(os.path.join(root, "..", "elsewhere.py"))
+    assert serve.normalize_script_name(outside) == outside
+
+
+def test_registry_modules_exist():
+    for name, entry in serve.REGISTRY.items():
+        assert os.path.isfile(os.path.join(serve.PROJECT_ROOT, name))
+        assert os.path.isfile(serve._module_file(entry.module))
+
+
+def test_run_matches_one_shot_process(script):
+    payload = {"values": [1, 2, 3.5]}
+    one_shot = subprocess.run([sys.executable, script], input=json.dumps(payload), capture_output=True, text=True, check=True)
+    response = serve.Dispatcher().handle({"id": 7, "type": "run", "script": script, "payload": payload})
+    assert response["ok"] is True
+    assert response["id"] == 7
+    assert response["result"] == json.loads(one_shot.stdout)
+    assert response["stderr"] == "debug line"
+
+
+def test_run_failure_is_reported(script):
+    response = serve.Dispatcher().handle({"id": 1, "script": script, "payload": {"fail": True}})
+    assert response["ok"] is False
+    assert response["error"] == "ValueError: kaputt"
+    assert "Traceback" in response["stderr"]
+
+
+def test_protocol_requests():
+    dispatcher = serve.Dispatcher()
+    assert dispatcher.handle({"id": 1, "type": "ping"})["pong"] is True
+    assert dispatcher.handle({"id": 2, "type": "bogus"}) == {"id": 2, "ok": False, "error": "Unknown request type: bogus"}
+    assert dispatcher.handle({"id": 3, "type": "run"}) == {"id": 3, "ok": False, "error": "Missing 'script'"}
+    scripts = dispatcher.handle({"id": 4, "type": "scripts"})
+    assert scripts["scripts"] == sorted(serve.REGISTRY)
+
+
+def test_serve_stream_answers_each_line(script):
+    dispatcher = serve.Dispatcher()
+    lines = [
+        json.dumps({"id": 1, "script": script, "payload": {"values": [2]}}),
+        "",
+        "{not json",
+        json.dumps({"id": 2, "type": "ping"}),
+    ]
+    out = io.StringIO()
+    dispatcher.serve_stream(lines, out)
+    responses = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["id"] for r in responses] == [1, None, 2]
+    assert responses[0]["result"]["sum"] == 2
+    assert responses[1]["ok"] is False
+    assert responses[2]["handled"] == 1
+
+
+def test_progress_events_carry_request_id(tmp_path):
+    path = tmp_path / "progress_script.py"
+    path.write_text(
+        textwrap.dedent(
+            """
+            import json
+            import sys
+
+            from progress_stream import ProgressReporter
+
+
+            def main():
+                payload = json.load(sys.stdin)
+                reporter = ProgressReporter.from_config(payload.get("config", {}), "TEST")
+                for it in range(3):
+                    reporter.emit(it, 10 * (it + 1), {"cost": 3 - it}, ["a", "b"])
+                print(json.dumps({"done": True}))
+
+
+            if __name__ == "__main__":
+                main()
+            """
+        )
+    )
+    events = []
+    response = serve.Dispatcher().handle(
+        {"id": "r1", "script": str(path), "payload": {"config": {"progress": True}}}, emit=events.append
+    )
+    assert response["ok"] is True
+    assert [e["iteration"] for e in events] == [0, 1, 2]
+    assert all(e["id"] == "r1" and e["type"] == "progress" and e["stage"] == "TEST" for e in events)
+    assert events[-1]["bestSequence"] == ["a", "b"]
+
+    # Ohne config.progress bleibt der Reporter stumm, der Sink ist nach dem Request wieder zurückgesetzt
+    events.clear()
+    serve.Dispatcher().handle({"id": "r2", "script": str(path), "payload": {}}, emit=events.append)
+    assert events == []
+    import progress_stream
+
+    assert progress_stream._SINK is None
+
+
+def test_registered_function_error_uses_error_result(monkeypatch):
+    module = types.ModuleType("fake_scheduler")
+    calls = []
+
+    def schedule(payload):
+        calls.append(payload)
+        raise RuntimeError("kein Plan")
+
+    module.schedule = schedule
+    module.error_result = lambda exc: {"error": str(exc), "plan": []}
+    monkeypatch.setattr(serve, "resolve_script", lambda script: (module, "schedule"))
+
+    response = serve.Dispatcher().handle({"id": 5, "script": "python/terminierung/fake.py", "payload": {"x": 1}})
+    assert response["ok"] is True
+    assert response["result"] == {"error": "kein Plan", "plan": []}
+    assert "RuntimeError: kein Plan" in response["stderr"]
+    assert calls == [{"x": 1}]  # kein zweiter Lauf
+
+    del module.error_result
+    response = serve.Dispatcher().handle({"id": 6, "script": "python/terminierung/fake.py", "payload": {}})
+    assert response["ok"] is False
+    assert response["error"] == "RuntimeError: kein Plan"
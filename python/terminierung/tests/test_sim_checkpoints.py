@@ -0,0 +1,75 @@
+import random
+
+from sim_checkpoints import PrefixCheckpoints
+
+
+def simulate(tokens, checkpoints, context=None):
+    """Kleiner Simulator nach dem Muster der Aufrufer: Zustand = laufende Summe, Block-Ergebnisse = Tokens."""
+    pos, path, node = checkpoints.resume(tokens, context)
+    total = path[-1][0] if path else 0
+    results = [r for _, block in path for r in block]
+    k = checkpoints.interval
+    while pos < len(tokens):
+        block = tuple(tokens[pos:pos + k])
+        total += sum(block)
+        results.extend(block)
+        if len(block) == k and pos + k < len(tokens):
+            node = checkpoints.save(node, block, (total, list(block)))
+        pos += k
+    return total, results
+
+
+def test_resume_skips_shared_prefix():
+    cp = PrefixCheckpoints(interval=2)
+    seq = [1, 2, 3, 4, 5, 6, 7]
+    assert simulate(seq, cp) == (28, seq)
+    assert cp.stats()["states"] == 3
+
+    pos, path, _ = cp.resume([1, 2, 3, 4, 9, 9, 9])
+    assert pos == 4
+    assert [state[0] for state in path] == [3, 10]
+    assert simulate([1, 2, 3, 4, 9, 9, 9], cp) == (37, [1, 2, 3, 4, 9, 9, 9])
+    assert cp.resumes == 2
+    assert cp.positions_skipped == 8
+
+
+def test_full_length_is_never_resumed():
+    cp = PrefixCheckpoints(interval=2)
+    simulate([1, 2, 3, 4], cp)
+    pos, _, _ = cp.resume([1, 2, 3, 4])
+    assert pos == 2
+
+
+def test_contexts_are_separate():
+    cp = PrefixCheckpoints(interval=2)
+    simulate([1, 2, 3, 4, 5], cp, context="a")
+    assert cp.resume([1, 2, 3, 4, 5], context="b")[0] == 0
+    assert cp.resume([1, 2, 3, 4, 5], context="a")[0] == 4
+
+
+def test_results_unchanged_across_resets():
+    rng = random.Random(1)
+    cp = PrefixCheckpoints(interval=3, max_states=30)
+    base = list(range(40))
+    for _ in range(300):
+        seq = list(base)
+        i = rng.randrange(len(seq))
+        seq[i:] = rng.sample(seq[i:], len(seq) - i)
+        assert simulate(seq, cp) == (sum(seq), seq)
+        assert cp.states <= cp.max_states
+    assert cp.resets > 0
+    assert cp.resumes > 0
+
+
+def test_save_after_reset_is_detached():
+    cp = PrefixCheckpoints(interval=1, max_states=2)
+    node = cp.root()
+    node = cp.save(node, (1,), "s1")
+    node = cp.save(node, (2,), "s2")
+    detached = cp.save(node, (3,), "s3")
+    assert cp.resets == 1
+    assert cp.states == 0
+    # Der auslösende Kandidat legt nichts mehr ab
+    assert cp.save(detached, (4,), "s4") is detached
+    assert cp.states == 0
+    assert cp.resume([1, 2, 3])[0] == 0
@@ -0,0 +1,109 @@
+import random
+
+import pytest
+
+import similarity
+from similarity import (
+    MinHashLSH,
+    StepInterner,
+    jaccard_bits,
+    jaccard_matrix_bits,
+    lsh_rows,
+    mean_pairwise_jaccard_bits,
+)
+
+
+def set_jaccard(a, b, empty=0.0):
+    union = a | b
+    return len(a & b) / len(union) if union else empty
+
+
+def random_step_sets(rng, n):
+    pool = ["BG-PS-%d" % i for i in range(150)]
+    return [set(rng.sample(pool, rng.randint(0, 40))) for _ in range(n)]
+
+
+def family_sets(rng, families, per_family):
+    # Mengen einer Familie liegen weit über, Mengen verschiedener Familien weit unter jeder Testschwelle
+    sets = []
+    for f in range(families):
+        base = ["F%d-BG-%d" % (f, i) for i in range(20)]
+        extra = ["F%d-X-%d" % (f, i) for i in range(10)]
+        for _ in range(per_family):
+            items = set(base) - set(rng.sample(base, rng.randint(0, 2)))
+            items |= set(rng.sample(extra, rng.randint(0, 1)))
+            sets.append(items)
+    return sets
+
+
+def test_interner_assigns_bits_in_first_seen_order():
+    interner = StepInterner()
+    assert interner.mask(["b", "a", "b"]) == 0b11
+    assert interner.mask(["c", "a"]) == 0b110
+    assert interner.bits == {"b": 0, "a": 1, "c": 2}
+    assert len(interner) == 3
+
+
+def test_jaccard_bits_matches_set_jaccard():
+    rng = random.Random(1)
+    interner = StepInterner()
+    sets = random_step_sets(rng, 60)
+    masks = [interner.mask(s) for s in sets]
+    for i in range(len(sets)):
+        for j in range(len(sets)):
+            for empty in (0.0, 1.0):
+                assert jaccard_bits(masks[i], masks[j], empty) == set_jaccard(sets[i], sets[j], empty)
+
+
+@pytest.mark.parametrize("n", [5, similarity.MATRIX_NUMPY_MIN, 40])
+def test_jaccard_matrix_matches_pairwise(n):
+    rng = random.Random(n)
+    interner = StepInterner()
+    sets = random_step_sets(rng, n) + [set(), set()]
+    masks = [interner.mask(s) for s in sets]
+    matrix = jaccard_matrix_bits(masks, empty=0.5)
+    for i in range(len(sets)):
+        for j in range(len(sets)):
+            expected = 1.0 if i == j else set_jaccard(sets[i], sets[j], 0.5)
+            assert matrix[i][j] == pytest.approx(expected, abs=1e-15)
+
+
+def test_mean_pairwise_jaccard():
+    rng = random.Random(2)
+    interner = StepInterner()
+    sets = random_step_sets(rng, 12)
+    masks = [interner.mask(s) for s in sets]
+    sims = [set_jaccard(sets[i], sets[j]) for i in range(12) for j in range(i + 1, 12)]
+    assert mean_pairwise_jaccard_bits(masks) == pytest.approx(sum(sims) / len(sims))
+    assert mean_pairwise_jaccard_bits(masks[:1]) == 1.0
+
+
+@pytest.mark.parametrize("threshold", [0.2, 0.5, 0.8])
+def test_lsh_rows_meets_recall(threshold):
+    r = lsh_rows(threshold, 128)
+    assert 1.0 - (1.0 - threshold ** r) ** (128 // r) >= 0.99
+    if r < 128:
+        assert 1.0 - (1.0 - threshold ** (r + 1)) ** (128 // (r + 1)) < 0.99
+
+
+def test_candidates_cover_similar_sets():
+    sets = family_sets(random.Random(3), 6, 15) + [set()]
+    lsh = MinHashLSH(sets, 0.5)
+    for i, a in enumerate(sets[:-1]):
+        cands = lsh.candidates(i)
+        assert i in cands
+        assert {j for j, b in enumerate(sets) if set_jaccard(a, b) >= 0.5} <= cands
+    assert lsh.candidates(len(sets) - 1) == set()
+
+
+@pytest.mark.skipif(not similarity.HAS_NUMPY, reason="NumPy nicht installiert")
+def test_numpy_and_python_candidates_agree(monkeypatch):
+    rng = random.Random(5)
+    pool = ["BG-PS-%d" % i for i in range(60)]
+    sets = family_sets(rng, 4, 10) + [set(rng.sample(pool, rng.randint(0, 15))) for _ in range(40)]
+    fast = MinHashLSH(sets, 0.4, num_perm=64)
+    monkeypatch.setattr(similarity, "HAS_NUMPY", False)
+    slow = MinHashLSH(sets, 0.4, num_perm=64)
+    assert (fast.rows, fast.bands) == (slow.rows, slow.bands)
+    for i in range(len(sets)):
+        assert fast.candidates(i) == slow.candidates(i)
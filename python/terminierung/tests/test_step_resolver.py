@@ -0,0 +1,80 @@
+import random
+
+from step_resolver import (
+    RULE_EXACT,
+    RULE_NORMALIZED,
+    RULE_SUBSTRING,
+    RULE_UNMATCHED,
+    StepResolver,
+    count_rule,
+    op_names,
+)
+
+
+def legacy_lookup(ops, step):
+    """Bisheriger Fallback-Loop aus build_ops_from_sequence (dem_ops_by_name / mon_ops_by_name)."""
+    by_name = {}
+    for op in ops:
+        primary_name, fallback_name = op_names(op)
+        if primary_name:
+            by_name[primary_name] = op
+        if fallback_name and fallback_name != primary_name:
+            by_name[fallback_name] = op
+    op = by_name.get(step)
+    if op:
+        return op
+    for key, candidate_op in by_name.items():
+        if step in key or key in step:
+            return candidate_op
+        if step.replace("BGT-", "BG-") == key.replace("BGT-", "BG-"):
+            return candidate_op
+    return None
+
+
+def random_ops(rng):
+    parts = ["BG", "BGT", "PS", "BT", "X", "A", "B"]
+    ops = []
+    for i in range(rng.randint(1, 12)):
+        name = "-".join(rng.choice(parts) for _ in range(rng.randint(1, 4)))
+        op = {"id": "op%d" % i}
+        if rng.random() < 0.7:
+            op["meta"] = {"step": name}
+        if rng.random() < 0.5:
+            op["label"] = rng.choice([name, name + "-L", "BGT-" + name])
+        ops.append(op)
+    return ops
+
+
+def test_resolve_matches_legacy_loop():
+    rng = random.Random(1)
+    parts = ["BG", "BGT", "PS", "BT", "X", "A", "B", "Q"]
+    for _ in range(500):
+        ops = random_ops(rng)
+        resolver = StepResolver(ops)
+        for _ in range(20):
+            step = "-".join(rng.choice(parts) for _ in range(rng.randint(1, 4)))
+            op, rule = resolver.resolve(step)
+            assert op is legacy_lookup(ops, step)
+            assert (rule == RULE_UNMATCHED) == (op is None)
+
+
+def test_resolve_reports_rule():
+    ops = [
+        {"id": "1", "meta": {"step": "BG-PS-1"}},
+        {"id": "2", "meta": {"step": "BG-PS-22-LONG"}},
+        {"id": "3", "label": "BT-7"},
+    ]
+    resolver = StepResolver(ops)
+    assert resolver.resolve("BT-7") == (ops[2], RULE_EXACT)
+    assert resolver.resolve("PS-22") == (ops[1], RULE_SUBSTRING)
+    assert resolver.resolve("X-BG-PS-1") == (ops[0], RULE_SUBSTRING)  # Name steckt im Step
+    assert resolver.resolve("BGT-PS-1") == (ops[0], RULE_NORMALIZED)
+    assert resolver.resolve("Y-9") == (None, RULE_UNMATCHED)
+
+
+def test_count_rule():
+    stats = {}
+    count_rule(stats, RULE_EXACT)
+    count_rule(stats, RULE_EXACT)
+    count_rule(None, RULE_EXACT)
+    assert stats == {RULE_EXACT: 2}
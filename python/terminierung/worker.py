@@ -0,0 +1,76 @@
+"""
+worker
+------
+
+Ausführung der Terminierungs-Skripte in einem warmen, langlebigen Prozess
+(genutzt von serve.py, das der Worker-Pool in lib/scheduling/python-pool.ts
+startet).
+
+Jedes Skript wird genau einmal importiert (inkl. matplotlib etc.) und danach
+pro Request nur noch ausgeführt:
+
+- load_script_module(): Import per Dateipfad, gecached nach mtime – bei
+  geänderter Datei wird neu geladen.
+- run_main(): main() des Skripts mit umgebogenem stdin/stdout. main() liest
+  stdin und schreibt das Ergebnis nach stdout; beides läuft pro Request über
+  StringIO, damit das Verhalten exakt dem Einzelprozess-Aufruf entspricht und
+  Debug-Prints das NDJSON-Protokoll nicht zerstören.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import json
+import os
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+from types import ModuleType
+from typing import Any, Dict, Tuple
+
+# Geladene Module: Modulname bzw. Dateipfad -> (mtime, Modul)
+MODULES: Dict[str, Tuple[float, ModuleType]] = {}
+
+
+def load_script_module(path: str) -> ModuleType:
+    """Importiert ein Skript einmalig (per Dateipfad) und cached das Modul."""
+    path = os.path.abspath(path)
+    mtime = os.path.getmtime(path)
+    cached = MODULES.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    # Skript-Verzeichnis in sys.path, damit Geschwister-Importe wie beim Direktaufruf funktionieren
+    script_dir = os.path.dirname(path)
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+
+    module_name = "_terminierung_worker_" + "".join(ch if ch.isalnum() else "_" for ch in path)
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load script {path}")
+    module = importlib.util.module_from_spec(spec)
+    # dataclasses lösen Annotationen über sys.modules auf -> vor exec registrieren
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        sys.modules.pop(module_name, None)
+        raise
+    MODULES[path] = (mtime, module)
+    return module
+
+
+def run_main(module: ModuleType, payload: Any, stderr_buf: io.StringIO) -> Any:
+    """Führt main() eines Skripts mit umgeleitetem stdin/stdout aus und liefert das JSON-Ergebnis."""
+    if not callable(getattr(module, "main", None)):
+        raise ImportError(f"Script {module.__name__} has no main() entry point")
+    stdout_buf = io.StringIO()
+    saved_stdin = sys.stdin
+    sys.stdin = io.StringIO(json.dumps(payload))
+    try:
+        with redirect_stdout(stdout_buf), redirect_stderr(stderr_buf):
+            module.main()
+    finally:
+        sys.stdin = saved_stdin
+    return json.loads(stdout_buf.getvalue())